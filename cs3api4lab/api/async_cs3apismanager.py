@@ -0,0 +1,136 @@
+import asyncio
+import concurrent.futures
+import threading
+
+from jupyter_server.services.contents.manager import AsyncContentsManager
+
+from cs3api4lab.api.cs3apismanager import CS3APIsManager
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+"""
+Asynchronous version of CS3APIsManager, enabled with
+c.ServerApp.contents_manager_class = 'cs3api4lab.AsyncCS3APIsManager'
+
+The file operations are done by a CS3APIsManager in a pool of async_max_workers threads,
+the event loop only awaits them, so requests of concurrent users overlap instead of
+waiting for each other.
+"""
+class AsyncCS3APIsManager(AsyncContentsManager):
+    cs3_config = None
+    log = None
+
+    def __init__(self, parent=None, log=None, **kwargs):
+        super().__init__(**kwargs)
+        self.cs3_config = Cs3ConfigManager.get_config()
+        self.log = log
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.cs3_config.async_max_workers,
+                                                               thread_name_prefix='cs3api4lab')
+        self._manager = _WorkerCS3APIsManager(parent, log, **kwargs)
+        self._manager.notary = self.notary
+
+    async def _run(self, func, *args, **kwargs):
+        # the loop of the current call, a manager may be used from consecutive asyncio.run() calls
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          lambda: self._manager.call_from_loop(loop, func, *args, **kwargs))
+
+    async def dir_exists(self, path):
+        return await self._run(self._manager.dir_exists, path)
+
+    async def is_hidden(self, path):
+        return await self._run(self._manager.is_hidden, path)
+
+    async def file_exists(self, path=''):
+        return await self._run(self._manager.file_exists, path)
+
+    async def get(self, path, content=True, type=None, format=None):
+        return await self._run(self._manager.get, path, content=content, type=type, format=format)
+
+    async def get_etag(self, path, content=True, type=None, format=None):
+        return await self._run(self._manager.get_etag, path, content=content, type=type, format=format)
+
+    async def get_kernel_path(self, path, model=None):
+        return await self._run(self._manager.get_kernel_path, path, model)
+
+    async def save(self, model, path):
+        return await self._run(self._manager.save, model, path)
+
+    async def new(self, model=None, path=''):
+        return await self._run(self._manager.new, model, path)
+
+    async def delete_file(self, path):
+        return await self._run(self._manager.delete_file, path)
+
+    async def rename_file(self, old_path, new_path):
+        return await self._run(self._manager.rename_file, old_path, new_path)
+
+    async def delete(self, path):
+        return await self._run(self._manager.delete, path)
+
+    async def rename(self, old_path, new_path):
+        return await self._run(self._manager.rename, old_path, new_path)
+
+    #
+    # Notebook hack - disable checkpoint
+    #
+    async def create_checkpoint(self, path):
+        return self._manager.create_checkpoint(path)
+
+    async def restore_checkpoint(self, checkpoint_id, path):
+        pass
+
+    async def list_checkpoints(self, path):
+        return self._manager.list_checkpoints(path)
+
+    async def delete_checkpoint(self, checkpoint_id, path):
+        pass
+
+
+class _WorkerCS3APIsManager(CS3APIsManager):
+    """
+    CS3APIsManager used from the worker threads of AsyncCS3APIsManager. The notebook notary keeps
+    its signatures in SQLite, which can't be used from other threads, so trusting and signing
+    notebooks is done on the event loop thread.
+    """
+    apply_nest_asyncio = False
+
+    def __init__(self, parent, log, **kwargs):
+        super().__init__(parent, log, **kwargs)
+        # the event loop that is waiting for the call running in this worker thread
+        self._calling_loop = threading.local()
+
+    def call_from_loop(self, loop, func, *args, **kwargs):
+        self._calling_loop.loop = loop
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._calling_loop.loop = None
+
+    def mark_trusted_cells(self, nb, path=''):
+        return self._call_on_loop(super().mark_trusted_cells, nb, path)
+
+    def check_and_sign(self, nb, path=''):
+        return self._call_on_loop(super().check_and_sign, nb, path)
+
+    def _call_on_loop(self, func, *args):
+        loop = getattr(self._calling_loop, 'loop', None)
+        if loop is None or self._in_loop_thread(loop):
+            return func(*args)
+
+        future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        loop.call_soon_threadsafe(run)
+        return future.result()
+
+    @staticmethod
+    def _in_loop_thread(loop):
+        try:
+            return asyncio.get_running_loop() is loop
+        except RuntimeError:
+            return False
@@ -5,7 +5,11 @@ CS3 File API for the JupyterLab Extension
 
 Authors:
 """
+import base64
+import collections
 import http
+import itertools
+import json
 import time
 import urllib.parse
 import grpc
@@ -14,17 +18,23 @@ import requests
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
-from google.protobuf.json_format import MessageToDict
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
 
-from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileLockedError
+from cs3api4lab.exception.exceptions import ResourceNotFoundError, FileLockedError, InvalidTypeError
 
 from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.model_utils import ModelUtils
+from cs3api4lab.utils.upload_stream import UploadStream
+from cs3api4lab.api.directory_cursors import DirectoryCursors
 from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.api.stat_result import StatResult
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.auth.channel_connector import ChannelConnector
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.locks.heartbeat import LockHeartbeat
 
 
 class Cs3FileApi:
@@ -40,10 +50,12 @@ class Cs3FileApi:
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
         self.storage_api = StorageApi(log)
         self.lock_api = LockApiFactory.create(log, self.config)
+        self.lock_heartbeat = LockHeartbeat.get_heartbeat(log)
+        self.directory_cursors = DirectoryCursors(self.config.directory_cursor_ttl, self.config.directory_cursor_max_open)
 
     def mount_point(self):
         """
@@ -55,52 +67,38 @@ class Cs3FileApi:
             "path": response.path
         }
 
-    def stat_info(self, file_path, endpoint='/'):
+    def stat_info(self, file_path, endpoint='/', cached=True, projection=StatProjection.FULL, metadata_keys=None):
         """
-        Stat a file and returns (size, mtime) as well as other extended info using the given userid as access token.
+        Stat a file and returns (size, mtime) as well as other extended info using the given userid as access token,
+        as a StatResult which is read like a dict.
         Note that endpoint here means the storage id. Note that fileid can be either a path (which MUST begin with /)
-        or an id (which MUST NOT start with a /).
+        or an id (which MUST NOT start with a /). With cached=False the stat cache is bypassed.
+        The projection and metadata_keys limit the stat to the needed fields, see StatProjection.
         """
         time_start = time.time()
-        stat = self.storage_api.stat(file_path, endpoint)
+        stat = self.storage_api.stat(file_path, endpoint, cached, projection, metadata_keys)
         if stat.status.code == cs3code.CODE_OK:
             time_end = time.time()
             self.log.info('msg="Invoked stat" fileid="%s" elapsedTimems="%.1f"' % (file_path, (time_end - time_start) * 1000))
-            return {
-                'inode': {'storage_id': stat.info.id.storage_id,
-                          'opaque_id': stat.info.id.opaque_id},
-                'filepath': stat.info.path,
-                'userid': stat.info.owner.opaque_id,
-                'size': stat.info.size,
-                'mtime': stat.info.mtime.seconds,
-                'type': stat.info.type,
-                'mime_type': stat.info.mime_type,
-                'idp': stat.info.owner.idp,
-                'permissions': stat.info.permission_set,
-                'arbitrary_metadata': MessageToDict(stat.info.arbitrary_metadata),
-            }
+            return StatResult(stat.info)
         elif stat.status.code == cs3code.CODE_NOT_FOUND:
             self.log.info('msg="Failed stat" fileid="%s" reason="%s"' % (file_path, stat.status.message))
             raise FileNotFoundError(stat.status.message + ", file " + file_path)
         else:
             self._handle_error(stat)
         
+    def stat_file_info(self, file_path, endpoint='/', cached=True):
+        """
+        Stat a file to read or write it: the arbitrary metadata is limited to the keys the lock API needs.
+        """
+        return self.stat_info(file_path, endpoint, cached, StatProjection.BASIC, self.lock_api.stat_metadata_keys)
+
     def read_file(self, stat, endpoint=None):
         """
         Read a file using the given userid as access token.
         """
         if stat:
-            # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
-            if self.config.dev_env and "/home/" in stat['filepath']:
-                opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
-                storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
-                stat = self.stat_info(opaque_id, storage_id)
-
-            try:
-                self.lock_api.set_lock(stat)
-            except IOError:
-                self.log.info("File %s locked, opening in read-only mode" % stat['filepath'])
-
+            stat = self.lock_for_read(stat)
         else:
             msg = "%s: %s" % (stat.status.code, stat.status.message)
             self.log.error('msg="Error when stating file for read" reason="%s"' % msg)
@@ -113,27 +111,124 @@ class Cs3FileApi:
             self.log.error('msg="Exception when downloading file from Reva" reason="%s"' % e)
             raise IOError(e)
 
-        size = len(file_get.content)
-        chunk_size = self.config.chunk_size
-        for i in range(0, size, chunk_size):
-            yield file_get.content[i:i + self.config.chunk_size]
+        try:
+            for chunk in file_get.iter_content(chunk_size=self.config.chunk_size):
+                yield chunk
+        except requests.exceptions.RequestException as e:
+            self.log.error('msg="Exception when streaming file from Reva" reason="%s"' % e)
+            raise IOError(e)
+        finally:
+            file_get.close()
+
+    def lock_for_read(self, stat):
+        """
+        Locks the file for the current user before it's read, a file locked by someone else is opened read-only.
+        Returns the stat of the file to read.
+        """
+        stat = self._resolve_dev_stat(stat)
+        try:
+            self.lock_heartbeat.acquire(self.lock_api, stat)
+        except IOError:
+            self.log.info("File %s locked, opening in read-only mode" % stat['filepath'])
+        return stat
 
-    def write_file(self, file_path, content, endpoint=None, format=None):
+    def read_range(self, stat, offset, length, endpoint=None):
+        """
+        Read length bytes of a file starting at offset, without downloading the rest of it.
+        If the data gateway ignores the Range header the download is streamed until the range is read.
+        """
+        stat = self._resolve_dev_stat(stat)
+        if offset >= stat['size'] or length <= 0:
+            return b''
+
+        init_file_download = self.storage_api.init_file_download(stat['filepath'], endpoint)
+        try:
+            file_get = self.storage_api.download_content(init_file_download, offset, length)
+        except requests.exceptions.RequestException as e:
+            self.log.error('msg="Exception when downloading file range from Reva" reason="%s"' % e)
+            raise IOError(e)
+
+        try:
+            if file_get.status_code == http.HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE:
+                return b''
+            if file_get.status_code == http.HTTPStatus.PARTIAL_CONTENT:
+                skip = 0
+            elif file_get.status_code == http.HTTPStatus.OK:
+                self.log.debug('msg="Range requests not supported, streaming the file" filepath="%s"' % stat['filepath'])
+                skip = offset
+            else:
+                self.log.error('msg="Error downloading file range from Reva" code="%d" reason="%s"' % (
+                    file_get.status_code, file_get.reason))
+                raise IOError(file_get.reason)
+
+            content = bytearray()
+            for chunk in file_get.iter_content(chunk_size=min(self.config.chunk_size, offset + length)):
+                if skip >= len(chunk):
+                    skip -= len(chunk)
+                    continue
+                content += chunk[skip:skip + length - len(content)]
+                skip = 0
+                if len(content) >= length:
+                    break
+            return bytes(content)
+        except requests.exceptions.RequestException as e:
+            self.log.error('msg="Exception when streaming file range from Reva" reason="%s"' % e)
+            raise IOError(e)
+        finally:
+            file_get.close()
+
+    def get_file_range(self, file_path, offset, length, format='base64'):
+        """
+        Returns a model of a part of a file, used by the frontend to read large files range by range.
+        The file is locked like in read_file, a range is at most file_range_max_chunks times chunk_size bytes.
+        """
+        file_path = FileUtils.normalize_path(file_path)
+        try:
+            offset = int(offset)
+            length = int(length)
+        except ValueError:
+            raise InvalidTypeError('offset and length must be integers')
+        if offset < 0 or length < 0:
+            raise InvalidTypeError('offset and length must not be negative')
+        max_length = self.config.chunk_size * self.config.file_range_max_chunks
+        if length > max_length:
+            raise InvalidTypeError('length must not be greater than %d' % max_length)
+
+        stat = self.lock_for_read(self.stat_info(file_path, self.config.endpoint, projection=StatProjection.BASIC))
+        content = self.read_range(stat, offset, length, self.config.endpoint)
+        if format == 'text':
+            content = content.decode('utf-8', errors='replace')
+        else:
+            format = 'base64'
+            content = base64.b64encode(content).decode('ascii')
+
+        return {
+            'path': file_path,
+            'offset': offset,
+            'length': length,
+            'size': stat['size'],
+            'format': format,
+            'content': content
+        }
+
+    def write_file(self, file_path, content, endpoint=None, format=None, content_size=None):
         """
         Write a file using the given userid as access token. The entire content is written
         and any pre-existing file is deleted (or moved to the previous version if supported).
+        The content (bytes, text, base64 text, a file-like object or an iterator of bytes) is streamed
+        to the data gateway in chunks; content_size is required only for iterators.
         """
         time_start = time.time()
 
         stat = None
         try:
-            stat = self.stat_info(file_path, endpoint)
+            stat = self.stat_file_info(file_path, endpoint, cached=False)
             if stat:
                 # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
                 if self.config.dev_env and "/home/" in stat['filepath']:
                     opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
                     storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
-                    stat = self.stat_info(opaque_id, storage_id)
+                    stat = self.stat_file_info(opaque_id, storage_id, cached=False)
 
                 # file_path = self.lock_manager.resolve_file_path(stat)
         except Exception as e:
@@ -141,21 +236,28 @@ class Cs3FileApi:
 
         if stat:
             # fixme - this might cause overwriting/locking issues due to unexpected error codes
-            self.lock_api.set_lock(stat)
+            # no lock calls while the heartbeat keeps the lock alive
+            self.lock_heartbeat.acquire(self.lock_api, stat)
 
-        content_size = FileUtils.calculate_content_size(content, format)
+        if content_size is None:
+            content_size = FileUtils.calculate_content_size(content, format)
+        content_size = str(content_size)
         init_file_upload = self.storage_api.init_file_upload(file_path, endpoint, content_size)
+        upload_stream = UploadStream(content, content_size, format, self.config.chunk_size)
 
         try:
-            upload_response = self.storage_api.upload_content(file_path, content, content_size, init_file_upload)
+            upload_response = self.storage_api.upload_content(file_path, upload_stream, content_size, init_file_upload)
 
         except requests.exceptions.RequestException as e:
             self.log.error('msg="Exception when uploading file to Reva" reason="%s"' % e)
             raise IOError(e)
 
+        finally:
+            self._invalidate_stat(file_path, endpoint, stat)
+
         time_end = time.time()
 
-        if upload_response.status_code != http.HTTPStatus.OK:
+        if upload_response.status_code not in (http.HTTPStatus.OK, http.HTTPStatus.CREATED, http.HTTPStatus.NO_CONTENT):
             self.log.error(
                 'msg="Error uploading file to Reva" code="%d" reason="%s"' % (upload_response.status_code, upload_response.reason))
             raise IOError(upload_response.reason)
@@ -166,6 +268,15 @@ class Cs3FileApi:
 
         return file_path
 
+    def release_lock(self, file_path, endpoint=None):
+        """
+        Release the lock of the user on a file when it's closed, the heartbeat stops refreshing it.
+        """
+        file_path = FileUtils.normalize_path(file_path)
+        stat = self._resolve_dev_stat(self.stat_file_info(file_path, endpoint or self.config.endpoint, cached=False))
+        self.lock_heartbeat.release(self.lock_api, stat)
+        self.log.info('msg="Released lock" filepath="%s"' % file_path)
+
     def remove(self, file_path, endpoint=None):
         """
         Remove a file or container using the given userid as access token.
@@ -174,6 +285,7 @@ class Cs3FileApi:
         reference = FileUtils.get_reference(file_path, endpoint)
         req = cs3sp.DeleteRequest(ref=reference)
         res = self.cs3_api.Delete(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        self.storage_api.invalidate_stat(file_path, endpoint)
 
         if res.status.code == cs3code.CODE_NOT_FOUND:
             self.log.info('msg="File or folder not found on remove" filepath="%s"' % file_path)
@@ -205,12 +317,127 @@ class Cs3FileApi:
         self.log.debug(
             'msg="Invoked read container" filepath="%s" elapsedTimems="%.1f"' % (path, (tend - tstart) * 1000))
 
-        out = []
-        for info in res.infos:
-            if self.config.mount_dir != '/' and len(self.config.mount_dir) > 0 and info.path.startswith(self.config.mount_dir):
-                info.path = info.path.rsplit(self.config.mount_dir)[-1]
-            out.append(info)
-        return out
+        return [self._strip_mount_dir(info) for info in res.infos]
+
+    def list_directory(self, path, endpoint=None):
+        """
+        Read a directory with ListContainerStream, entries are yielded as they arrive from the gateway.
+        """
+        for response in self._list_container_stream(path, endpoint):
+            yield response.info
+
+    def read_directory_page(self, path, limit=100, cursor=None):
+        """
+        Returns a model with a page of the directory entries and the cursor of the next page, None after the last one.
+        The stream of a page is kept open and continued by the next page, a gateway that paginates itself
+        is asked for the page after its page token instead. If the stream was closed in the meantime,
+        the directory is read again and the entries of the previous pages are skipped.
+        """
+        path = FileUtils.normalize_path(path)
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise InvalidTypeError('limit must be an integer')
+        if limit <= 0:
+            raise InvalidTypeError('limit must be positive')
+        position = self._decode_cursor(cursor) if cursor else {}
+        offset = position.get('offset', 0)
+        key = (self.config.reva_host, self.config.client_id, path)
+
+        tstart = time.time()
+        stream = None
+        if position.get('page_token'):
+            stream = self._list_container_stream(path, self.config.endpoint, limit, position['page_token'])
+        elif position.get('id'):
+            stream = self.directory_cursors.take(position['id'], key)
+        if stream is None:
+            # the page size only helps when the gateway starts from the requested entry
+            stream = self._list_container_stream(path, self.config.endpoint, 0 if offset else limit)
+            collections.deque(itertools.islice(stream, offset), maxlen=0)
+
+        infos = []
+        next_page_token = None
+        try:
+            for response in stream:
+                infos.append(response.info)
+                next_page_token = response.next_page_token or None
+                if len(infos) == limit:
+                    break
+        except Exception:
+            stream.close()
+            raise
+
+        next_position = None
+        if next_page_token:
+            # cancels the call, the gateway continues from its page token
+            stream.close()
+            next_position = {'page_token': next_page_token}
+        elif len(infos) == limit:
+            next_position = {'id': self.directory_cursors.put(key, stream, position.get('id'))}
+        else:
+            stream.close()
+        if next_position is not None:
+            next_position['offset'] = offset + len(infos)
+
+        tend = time.time()
+        self.log.debug('msg="Invoked read container page" filepath="%s" offset="%d" limit="%d" elapsedTimems="%.1f"' % (
+            path, offset, limit, (tend - tstart) * 1000))
+
+        return {
+            'path': path,
+            'limit': limit,
+            'content': ModelUtils.convert_container_to_content_models(infos),
+            'next_cursor': self._encode_cursor(next_position) if next_position else None
+        }
+
+    @staticmethod
+    def _encode_cursor(position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise InvalidTypeError('invalid cursor')
+        if not isinstance(position, dict) or not isinstance(position.get('offset', 0), int):
+            raise InvalidTypeError('invalid cursor')
+        return position
+
+    def _list_container_stream(self, path, endpoint, page_size=0, page_token=''):
+        reference = FileUtils.get_reference(path, endpoint)
+        req = cs3sp.ListContainerStreamRequest(ref=reference, page_size=page_size, page_token=page_token)
+        responses = self.cs3_api.ListContainerStream(request=req,
+                                                     metadata=[('x-access-token', self.auth.authenticate())])
+        received = False
+        try:
+            for response in responses:
+                received = True
+                self._check_list_container_status(path, response.status)
+                self._strip_mount_dir(response.info)
+                yield response
+        except grpc.RpcError as e:
+            if received or e.code() != grpc.StatusCode.UNIMPLEMENTED:
+                raise
+            self.log.info('msg="ListContainerStream not supported, falling back to ListContainer" filepath="%s"' % path)
+            for info in self.read_directory(path, endpoint):
+                yield cs3sp.ListContainerStreamResponse(info=info)
+        finally:
+            responses.cancel()
+
+    def _check_list_container_status(self, path, status):
+        if status.code == cs3code.CODE_NOT_FOUND:
+            raise ResourceNotFoundError(f"directory {path} not found")
+        if status.code == cs3code.CODE_UNAUTHENTICATED:
+            self.auth.raise_401_error()
+        if status.code != cs3code.CODE_OK:
+            self.log.warning('msg="Failed to read container" filepath="%s" reason="%s"' % (path, status.message))
+            raise IOError(status.message)
+
+    def _strip_mount_dir(self, info):
+        if self.config.mount_dir != '/' and len(self.config.mount_dir) > 0 and info.path.startswith(self.config.mount_dir):
+            info.path = info.path.rsplit(self.config.mount_dir)[-1]
+        return info
 
     def move(self, source_path, destination_path, endpoint=None):
         """
@@ -221,7 +448,7 @@ class Cs3FileApi:
         dest_reference = FileUtils.get_reference(destination_path, endpoint)
 
         # fixme - this might cause overwriting issues due to unexpected error codes
-        stat = self.storage_api.stat(destination_path, endpoint)
+        stat = self.storage_api.stat(destination_path, endpoint, cached=False, projection=StatProjection.EXISTS)
         if stat.status.code == cs3code.CODE_OK:
             self.log.error('msg="Failed to move" source="%s" destination="%s" reason="%s"' % (
                 source_path, destination_path, "file already exists"))
@@ -229,6 +456,8 @@ class Cs3FileApi:
 
         req = cs3sp.MoveRequest(source=src_reference, destination=dest_reference)
         res = self.cs3_api.Move(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        self.storage_api.invalidate_stat(source_path, endpoint)
+        self.storage_api.invalidate_stat(destination_path, endpoint)
 
         if res.status.code == cs3code.CODE_NOT_FOUND:
             raise ResourceNotFoundError(f"source {source_path} not found")
@@ -250,6 +479,7 @@ class Cs3FileApi:
         reference = FileUtils.get_reference(path, endpoint)
         req = cs3sp.CreateContainerRequest(ref=reference)
         res = self.cs3_api.CreateContainer(request=req, metadata=[('x-access-token', self.auth.authenticate())])
+        self.storage_api.invalidate_stat(path, endpoint)
 
         if res.status.code != cs3code.CODE_OK:
             self.log.warning('msg="Failed to create container" filepath="%s" reason="%s"' % (path, res.status.message))
@@ -262,6 +492,21 @@ class Cs3FileApi:
     def get_home_dir(self):
         return self.config.home_dir if self.config.home_dir else ""
 
+    def _invalidate_stat(self, file_path, endpoint, stat):
+        resource_id = None
+        if stat:
+            resource_id = storage_provider.ResourceId(storage_id=stat['inode']['storage_id'],
+                                                      opaque_id=stat['inode']['opaque_id'])
+        self.storage_api.invalidate_stat(file_path, endpoint, resource_id)
+
+    def _resolve_dev_stat(self, stat):
+        # additional request until this issue is resolved https://github.com/cs3org/reva/issues/3243
+        if self.config.dev_env and "/home/" in stat['filepath']:
+            opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
+            storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
+            stat = self.stat_file_info(opaque_id, storage_id)
+        return stat
+
     def _handle_error(self, response):
         self.log.error(response)
         raise Exception("Incorrect server response: " +
@@ -14,6 +14,7 @@ import grpc
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.share_registry import ShareRegistry
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.auth.channel_connector import ChannelConnector
 
@@ -40,11 +41,12 @@ class Cs3OcmShareApi:
         self.file_api = Cs3FileApi(log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = grpc_gateway.GatewayAPIStub(intercept_channel)
         self.public_share_api = link_api_grpc.LinkAPIStub(channel)
         self.ocm_share_api = ocm_api_grpc.OcmAPIStub(channel)
         self.provider_api = ocm_provider_api_grpc.ProviderAPIStub(channel)
+        self.share_registry = ShareRegistry.get_registry()
         return
 
     def create(self, opaque_id, idp, domain, endpoint, file_path, grantee_type=GRANTEE_TYPE_USER, role=Role.EDITOR, reshare=True):
@@ -71,6 +73,7 @@ class Cs3OcmShareApi:
                                                      metadata=self._token())
         if self._is_code_ok(response):
             self.log.info("OCM share created:\n")
+            self.share_registry.set(self._cache_user(), response.share.id.opaque_id, ShareRegistry.OCM_SHARE)
             return self._map_share(response.share)
         elif response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ResourceNotFoundError(f"resource {file_path} not found")
@@ -89,6 +92,7 @@ class Cs3OcmShareApi:
 
         if self._is_code_ok(response):
             self.log.info("OCM share deleted: " + share_id)
+            self.share_registry.forget(self._cache_user(), share_id)
             return
         elif response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ShareNotFoundError(f"ocm share {share_id} not found")
@@ -154,6 +158,8 @@ class Cs3OcmShareApi:
 
         if not self._is_code_ok(response):
             self._handle_error(response, "Error listing OCM share:")
+        self.share_registry.set_all(self._cache_user(), [share.id.opaque_id for share in response.shares],
+                                    ShareRegistry.OCM_SHARE)
         return response
 
     def get(self, share_id):
@@ -162,6 +168,7 @@ class Cs3OcmShareApi:
         request = ocm_api.GetOCMShareRequest(ref=ref)
         response = self.ocm_share_api.GetOCMShare(request=request, metadata=self._token())
         if response.status.code == cs3_code.CODE_OK:
+            self.share_registry.set(self._cache_user(), share_id, ShareRegistry.OCM_SHARE)
             return self._map_share(response.share)
         elif response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ShareNotFoundError(f"ocm share {share_id} not found")
@@ -181,6 +188,8 @@ class Cs3OcmShareApi:
         if not self._is_code_ok(response):
             self._handle_error(response, "Error listing OCM received shares: ")
 
+        self.share_registry.set_all(self._cache_user(), [share.share.id.opaque_id for share in response.shares],
+                                    ShareRegistry.OCM_RECEIVED)
         return response
 
     def get_received_share(self, share_id):
@@ -190,6 +199,7 @@ class Cs3OcmShareApi:
         response = self.ocm_share_api.GetReceivedOCMShare(request=request,
                                                           metadata=self._token())
         if response.status.code == cs3_code.CODE_OK:
+            self.share_registry.set(self._cache_user(), share_id, ShareRegistry.OCM_RECEIVED)
             return self._map_share(response.share.share, response.share.state)
         elif response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ShareNotFoundError(f"ocm share {share_id} not found")
@@ -275,6 +285,9 @@ class Cs3OcmShareApi:
     def _token(self):
         return [('x-access-token', self.auth.authenticate())]
 
+    def _cache_user(self):
+        return self.config.reva_host, self.config.client_id
+
     def _get_resource_info(self, endpoint, file_id):
         ref = FileUtils.get_reference(file_id, endpoint)
         stat_response = self.cs3_api.Stat(request=storage_provider.StatRequest(ref=ref),
@@ -14,7 +14,6 @@ import cs3.types.v1beta1.types_pb2 as cs3_types
 import cs3.storage.provider.v1beta1.provider_api_pb2 as storage_provider
 import cs3.rpc.v1beta1.code_pb2 as cs3_code
 
-import grpc
 
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
@@ -35,7 +34,7 @@ class Cs3PublicShareApi:
         self.file_api = Cs3FileApi(log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = grpc_gateway.GatewayAPIStub(intercept_channel)
         self.public_share_api = link_api_grpc.LinkAPIStub(channel)
         return
@@ -13,12 +13,13 @@ import cs3.storage.provider.v1beta1.provider_api_pb2 as storage_provider
 import cs3.storage.provider.v1beta1.resources_pb2 as storage_resources
 import cs3.identity.user.v1beta1.resources_pb2 as identity_res
 import cs3.rpc.v1beta1.code_pb2 as cs3_code
-import grpc
 
 from tornado import escape
 
 from cs3api4lab.api.storage_api import StorageApi
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.received_share_index import ReceivedShareIndex
+from cs3api4lab.api.share_registry import ShareRegistry
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.utils.file_utils import FileUtils
@@ -45,11 +46,12 @@ class Cs3ShareApi:
 
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = grpc_gateway.GatewayAPIStub(intercept_channel)
         self.file_api = Cs3FileApi(log)
         self.storage_api = StorageApi(log)
-
+        self.received_share_index = ReceivedShareIndex.get_index(log)
+        self.share_registry = ShareRegistry.get_registry()
 
     def create(self, endpoint, file_path, grantee, idp, role, grantee_type):
         share_permissions = self._get_share_permissions(role)
@@ -63,6 +65,7 @@ class Cs3ShareApi:
         if create_response.status.code == cs3_code.CODE_OK:
             self.log.info("Created share: " + endpoint + file_path + " for " + idp + ":" + grantee)
             self.log.info(create_response)
+            self.share_registry.set(self._cache_user(), create_response.share.id.opaque_id, ShareRegistry.SHARE)
             return self._map_given_share(create_response.share)
         elif create_response.status.code == cs3_code.CODE_NOT_FOUND:
             self.log.error(f"Resource {file_path} not found")
@@ -81,6 +84,8 @@ class Cs3ShareApi:
 
         if self._is_code_ok(list_response):
             self.log.debug(f"List shares response for user {self.config.client_id}:\n{list_response}")
+            self.share_registry.set_all(self._cache_user(), [share.id.opaque_id for share in list_response.shares],
+                                        ShareRegistry.SHARE)
         else:
             self.log.error("Error listing shares response for user: " + self.config.client_id)
             self._handle_error(list_response)
@@ -110,10 +115,13 @@ class Cs3ShareApi:
         share = self.cs3_api.GetShare(request, metadata=[('x-access-token', self.auth.authenticate())])
 
         if self._is_code_ok(share):
+            self.share_registry.set(self._cache_user(), opaque_id, ShareRegistry.SHARE)
             return share
-        else:
+        elif share.status.code == cs3_code.CODE_NOT_FOUND:
             self.log.error(f"Error getting share for opaque_id {opaque_id}")
             raise ShareNotFoundError(f"Error getting share for opaque_id {opaque_id}")
+        else:
+            self._handle_error(share)
 
     def remove(self, share_id):
         share_id_object = sharing_res.ShareId(opaque_id=share_id)
@@ -124,6 +132,7 @@ class Cs3ShareApi:
         if remove_response.status.code == cs3_code.CODE_OK:
             self.log.info("Successfully removed share with ID: " + share_id)
             self.log.info(remove_response)
+            self.share_registry.forget(self._cache_user(), share_id)
         elif remove_response.status.code == cs3_code.CODE_NOT_FOUND:
             raise ShareNotFoundError("Error removing share with ID: " + share_id)
         else:
@@ -146,28 +155,42 @@ class Cs3ShareApi:
         else:
             self._handle_error(update_response)
 
-    def get_share_received(self, path):
-        share_filters = []
-        stat = self.storage_api.stat(path, self.config.endpoint)
+    def get_share_received(self, path, resource_id=None):
+        """
+        Returns the received share of the file, or of the shared directory the file is in, None if there is none.
+        The resource id of the file is taken from its stat when it's not given.
+        """
+        if resource_id is None:
+            stat = self.storage_api.stat(path, self.config.endpoint)
 
-        if stat.status.code == cs3_code.CODE_NOT_FOUND or stat.status.code == cs3_code.CODE_INTERNAL:
-            return None
+            if stat.status.code == cs3_code.CODE_NOT_FOUND or stat.status.code == cs3_code.CODE_INTERNAL:
+                return None
+            resource_id = {'storage_id': stat.info.id.storage_id, 'opaque_id': stat.info.id.opaque_id}
 
         # fix opaque_id on local/localhome driver
-        opaque_id = urllib.parse.unquote(stat.info.id.opaque_id)
-        storage_id = urllib.parse.unquote(stat.info.id.storage_id)
+        opaque_id = urllib.parse.unquote(resource_id['opaque_id'])
+        storage_id = urllib.parse.unquote(resource_id['storage_id'])
 
         # remove after https://github.com/cs3org/reva/issues/3243 is fixed
         opaque_id = FileUtils.fix_dev_opaque(opaque_id, self.config.dev_env)
 
+        if self.received_share_index.enabled:
+            try:
+                return self.received_share_index.get_share(self._cache_user(), (storage_id, opaque_id), path,
+                                                           self._list_all_received)
+            except ShareError as e:
+                # the index of the user couldn't be loaded, the share is looked up on its own
+                self.log.warning('msg="Error loading received shares index" user="%s" reason="%s"' % (
+                    self.config.client_id, e))
+
         resource = storage_resources.ResourceId(
             storage_id=storage_id,
             opaque_id=opaque_id
         )
-        share_filters.append(sharing_res.Filter(
+        share_filters = [sharing_res.Filter(
             resource_id=resource,
             type=sharing_res.Filter.Type.TYPE_RESOURCE_ID
-        ))
+        )]
 
         list_response = self.cs3_api.ListReceivedShares(
             request=sharing.ListReceivedSharesRequest(filters=share_filters),
@@ -178,6 +201,26 @@ class Cs3ShareApi:
             share = list_response.shares.pop().share
         return share  # this should return only one share
 
+    def index_received_path(self, resource_id, path):
+        """
+        Records the path of a received shared directory, files below it are looked up by path in the index
+        """
+        if self.received_share_index.enabled:
+            self.received_share_index.set_path(self._cache_user(), resource_id, path)
+
+    def _list_all_received(self):
+        list_response = self.cs3_api.ListReceivedShares(request=sharing.ListReceivedSharesRequest(),
+                                                        metadata=[('x-access-token', self.auth.authenticate())])
+        if not self._is_code_ok(list_response):
+            self.log.error("Error retrieving received shares for user: " + self.config.client_id)
+            self._handle_error(list_response)
+        self.share_registry.set_all(self._cache_user(), [share.share.id.opaque_id for share in list_response.shares],
+                                    ShareRegistry.RECEIVED)
+        return list_response.shares
+
+    def _cache_user(self):
+        return self.config.reva_host, self.config.client_id
+
     def list_received(self, path=None):
         self.log.info("Listing received shares")
         list_request = self._shares_received_filter_by_resource(path)
@@ -188,6 +231,8 @@ class Cs3ShareApi:
             self.log.error("Error retrieving received shares for user: " + self.config.client_id)
             self._handle_error(list_response)
 
+        self.share_registry.set_all(self._cache_user(), [share.share.id.opaque_id for share in list_response.shares],
+                                    ShareRegistry.RECEIVED)
         self.log.debug(f"Retrieved received shares for user {self.config.client_id}:\n{list_response}")
         return list_response
 
@@ -316,15 +361,7 @@ class Cs3ShareApi:
 
     def update_received(self, share_id, state=State.ACCEPTED):
         share_state = ShareUtils.map_state(state)
-        list_request = sharing.ListReceivedSharesRequest()
-        list_response = self.cs3_api.ListReceivedShares(request=list_request,
-                                                        metadata=[('x-access-token', self.auth.authenticate())])
-        share_to_update = None
-        for share in list_response.shares:
-            if share_id == share.share.id.opaque_id:
-                share_to_update = share
-        if not share_to_update:
-            raise ShareNotFoundError(f"Received share {share_id} not found")
+        share_to_update = self.get_received(share_id)
 
         update_request = sharing.UpdateReceivedShareRequest(
             share=sharing_res.ReceivedShare(
@@ -337,6 +374,8 @@ class Cs3ShareApi:
 
         update_response = self.cs3_api.UpdateReceivedShare(request=update_request,
                                                            metadata=[('x-access-token', self.auth.authenticate())])
+        # the index is loaded again on the next role lookup
+        self.received_share_index.invalidate(self._cache_user())
         if self._is_code_ok(update_response):
             self.log.info("Successfully updated share: " + share_id + " with state " + state)
             self.log.info(update_response)
@@ -345,6 +384,18 @@ class Cs3ShareApi:
             self._handle_error(update_response)
         return update_response.share
 
+    def get_received(self, share_id):
+        ref = sharing_res.ShareReference(id=sharing_res.ShareId(opaque_id=share_id))
+        get_response = self.cs3_api.GetReceivedShare(request=sharing.GetReceivedShareRequest(ref=ref),
+                                                     metadata=[('x-access-token', self.auth.authenticate())])
+        if get_response.status.code == cs3_code.CODE_NOT_FOUND:
+            raise ShareNotFoundError(f"Received share {share_id} not found")
+        if not self._is_code_ok(get_response):
+            self._handle_error(get_response)
+
+        self.share_registry.set(self._cache_user(), share_id, ShareRegistry.RECEIVED)
+        return get_response.share
+
     def _resolve_share_permissions(self, share):
         has_move_permission = share.permissions.permissions.move is True
         has_delete_permission = share.permissions.permissions.delete is True
@@ -1,8 +1,12 @@
+import concurrent.futures
+import threading
+
 import cs3.identity.user.v1beta1.resources_pb2 as id_res
 import cs3.identity.user.v1beta1.user_api_pb2 as user_api
 import cs3.identity.user.v1beta1.user_api_pb2_grpc as user_api_grpc
 import cs3.ocm.invite.v1beta1.invite_api_pb2 as ia
 import cs3.ocm.invite.v1beta1.invite_api_pb2_grpc as iag
+from cs3api4lab.api.user_cache import UserCache
 from cs3api4lab.auth.channel_connector import ChannelConnector
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.config.config_manager import Cs3ConfigManager
@@ -10,6 +14,8 @@ import cs3.rpc.v1beta1.code_pb2 as cs3_code
 
 
 class Cs3UserApi:
+    __query_executor = None
+    __query_executor_lock = threading.Lock()
 
     def __init__(self, log):
         channel = ChannelConnector.get_channel()
@@ -17,6 +23,7 @@ class Cs3UserApi:
         self.config = Cs3ConfigManager().get_config()
         self.auth = Auth.get_authenticator(config=self.config, log=log)
         self.invite_api = iag.InviteAPIStub(channel)
+        self.user_cache = UserCache.get_cache()
 
     def get_user(self, idp, opaque_id):
         user_info = self.get_user_info(idp, opaque_id)
@@ -27,20 +34,49 @@ class Cs3UserApi:
         return user_info
 
     def get_user_info(self, idp, opaque_id):
+        user_info = self.user_cache.get(idp, opaque_id)
+        if user_info is not None:
+            return dict(user_info)
+
         user_id = id_res.UserId(idp=idp, opaque_id=opaque_id)
         request = user_api.GetUserRequest(user_id=user_id, skip_fetching_user_groups=True)
         response = self.api.GetUser(request=request)
 
         if response.status.code == cs3_code.CODE_OK:
-            return {"username": response.user.username,
-                    "display_name": response.user.display_name,
-                    "full_name": response.user.display_name + " (" + response.user.username + ")",
-                    "idp": response.user.id.idp,
-                    "opaque_id": response.user.id.opaque_id,
-                    "mail": response.user.mail}
+            user_info = {"username": response.user.username,
+                         "display_name": response.user.display_name,
+                         "full_name": response.user.display_name + " (" + response.user.username + ")",
+                         "idp": response.user.id.idp,
+                         "opaque_id": response.user.id.opaque_id,
+                         "mail": response.user.mail}
+            self.user_cache.set(idp, opaque_id, user_info)
+            return dict(user_info)
+
+        if response.status.code == cs3_code.CODE_NOT_FOUND:
+            self.user_cache.set(idp, opaque_id, {})
 
         return {}
 
+    def prefetch_users(self, user_ids):
+        """
+        Fetches the users with the given (idp, opaque_id) ids that aren't cached yet concurrently,
+        returns a dict of all the user infos keyed by the ids
+        """
+        user_ids = set(user_ids)
+        users = {}
+        for user_id in user_ids:
+            user_info = self.user_cache.get(*user_id)
+            if user_info is not None:
+                users[user_id] = dict(user_info)
+
+        missing = [user_id for user_id in user_ids if user_id not in users]
+        if missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.share_lookup_workers) as executor:
+                for user_id, user_info in zip(missing, executor.map(lambda user_id: self.get_user_info(*user_id), missing)):
+                    users[user_id] = user_info
+
+        return users
+
     def find_accepted_users(self, opaque_id):
         if self.config.enable_ocm:
             ocm_response = self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=opaque_id),
@@ -77,18 +113,49 @@ class Cs3UserApi:
         if len(query) < 3:
             return []
 
-        users = []
-        user_by_username = self.get_user_info_by_claim('username', query)
-        if user_by_username:
-            users.append(user_by_username)
+        cache_user = (self.config.reva_host, self.config.client_id)
+        users = self.user_cache.get_query(cache_user, query)
+        if users is not None:
+            return [dict(user_info) for user_info in users]
 
-        user_by_mail = self.get_user_info_by_claim('mail', query)
-        if user_by_mail:
-            users.append(user_by_mail)
+        executor = self._get_query_executor()
+        lookups = [executor.submit(self._find_users_by_claim, 'username', query),
+                   executor.submit(self._find_users_by_claim, 'mail', query),
+                   executor.submit(self._find_users, query)]
+        if self.config.enable_ocm:
+            lookups.append(executor.submit(self._find_accepted_users, query))
 
+        users = []
+        user_ids = set()
+        for lookup in lookups:
+            for user_info in lookup.result():
+                user_id = (user_info['idp'], user_info['opaque_id'])
+                if user_id not in user_ids:
+                    user_ids.add(user_id)
+                    users.append(user_info)
+
+        self.user_cache.set_query(cache_user, query, users)
+        return [dict(user_info) for user_info in users]
+
+    @classmethod
+    def _get_query_executor(cls):
+        # shared by the queries of all the users, the lookups of a query are queued while others are running
+        if cls.__query_executor is None:
+            with cls.__query_executor_lock:
+                if cls.__query_executor is None:
+                    cls.__query_executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=4, thread_name_prefix='cs3api4lab-user-query')
+        return cls.__query_executor
+
+    def _find_users_by_claim(self, claim, value):
+        user_info = self.get_user_info_by_claim(claim, value)
+        return [user_info] if user_info else []
+
+    def _find_users(self, query):
         response = self.api.FindUsers(user_api.FindUsersRequest(filter=query, skip_fetching_user_groups=True),
                                       metadata=[('x-access-token', self.auth.authenticate())])
 
+        users = []
         for user in response.users:
             users.append({"username": user.username,
                           "display_name": user.display_name,
@@ -96,18 +163,18 @@ class Cs3UserApi:
                           "idp": user.id.idp,
                           "opaque_id": user.id.opaque_id,
                           "mail": user.mail})
+        return users
 
-        ocm_users = []
-        if self.config.enable_ocm:
-            ocm_response = self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=query),
-                                                             metadata=[('x-access-token', self.auth.authenticate())])
+    def _find_accepted_users(self, query):
+        ocm_response = self.invite_api.FindAcceptedUsers(ia.FindAcceptedUsersRequest(filter=query),
+                                                         metadata=[('x-access-token', self.auth.authenticate())])
 
-            for user in ocm_response.accepted_users:
-                ocm_users.append({"username": "",
-                                  "display_name": user.display_name,
-                                  "full_name": user.display_name,
-                                  "idp": user.id.idp,
-                                  "opaque_id": user.id.opaque_id,
-                                  "mail": user.mail})
-
-        return users + ocm_users
+        ocm_users = []
+        for user in ocm_response.accepted_users:
+            ocm_users.append({"username": "",
+                              "display_name": user.display_name,
+                              "full_name": user.display_name,
+                              "idp": user.id.idp,
+                              "opaque_id": user.id.opaque_id,
+                              "mail": user.mail})
+        return ocm_users
@@ -1,12 +1,16 @@
+import codecs
+import hashlib
 import nbformat
 import os
 import posixpath
+import tempfile
+import threading
+import time
 import nest_asyncio
 
 import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 
-from base64 import decodebytes
 from jupyter_server.services.contents.manager import ContentsManager
 from requests import HTTPError
 
@@ -17,11 +21,13 @@ from nbformat.v4 import new_notebook
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.utils.share_utils import ShareUtils
 from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.upload_stream import UploadStream
 from cs3api4lab.api.share_api_facade import ShareAPIFacade
 from cs3api4lab.utils.model_utils import ModelUtils
 from cs3api4lab.utils.asyncify import asyncify
 from cs3api4lab.api.storage_api import StorageApi
-from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.api.service_registry import ServiceRegistry
 from cs3api4lab.exception.exceptions import ResourceNotFoundError
 
 """
@@ -35,18 +41,23 @@ class CS3APIsManager(ContentsManager):
     cs3_config = None
     log = None
     file_api = None
+    apply_nest_asyncio = True
 
     def __init__(self, parent, log, **kwargs):
         super().__init__(**kwargs)
         self.cs3_config = Cs3ConfigManager.get_config()
         self.log = log
-        self.file_api = Cs3FileApi(self.log)
-        self.share_api = ShareAPIFacade(log)
-        self.storage_api = StorageApi(log)
-        self.lock_api = LockApiFactory.create(log, self.cs3_config)
+        registry = ServiceRegistry.get_registry(log)
+        self.file_api = registry.get(Cs3FileApi)
+        self.share_api = registry.get(ShareAPIFacade)
+        self.storage_api = registry.get(StorageApi)
+        self.lock_api = registry.get_lock_api()
+        self._chunked_uploads = {}
+        self._chunked_uploads_lock = threading.Lock()
 
         #line below must be run in order for loop.run_until_complete() to work
-        nest_asyncio.apply()
+        if self.apply_nest_asyncio:
+            nest_asyncio.apply()
 
     # _is_dir is already async, so no need to asyncify this
     def dir_exists(self, path):
@@ -100,7 +111,8 @@ class CS3APIsManager(ContentsManager):
         """
         path = FileUtils.normalize_path(path)
         try:
-            file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
+            # the same projection as the file model, so that get() finds the stat in the cache
+            file_info = self.file_api.stat_file_info(path, self.cs3_config.endpoint)
         except FileNotFoundError:
             return False
 
@@ -141,6 +153,39 @@ class CS3APIsManager(ContentsManager):
 
         raise web.HTTPError(404, u'Resource %s does not exist' % path)
 
+    @asyncify
+    def get_etag(self, path, content=True, type=None, format=None):
+        """
+        Returns the HTTP ETag of the model get() returns for the same arguments, derived from the Reva etag
+        of the file or directory, so it's known without downloading the file or listing the directory.
+        A file read with its content is locked first, like get() does, so that a client answered with 304
+        holds the lock of the model it keeps. None if the path can't be stat'ed or Reva sends no etag.
+        """
+        path = FileUtils.normalize_path(path)
+        try:
+            # not cached, a changed file must not be answered with 304; the fresh stat also refreshes the cache
+            file_info = self.file_api.stat_file_info(path, self.cs3_config.endpoint, cached=False)
+        except Exception:
+            return None
+
+        if not file_info['etag']:
+            return None
+
+        representation = [file_info['etag'], file_info['filepath'], str(content), str(type), str(format)]
+        if file_info['type'] == resource_types.RESOURCE_TYPE_FILE:
+            if content:
+                # reading the file locks it, so the model stays valid only while the user holds the lock
+                self.file_api.lock_for_read(file_info)
+            if not self._is_notebook_model(path, type):
+                # the file model tells if the user can write to the file
+                representation.append(str(self._is_editor(file_info)))
+
+        return '"%s"' % hashlib.sha1('\0'.join(representation).encode()).hexdigest()
+
+    @staticmethod
+    def _is_notebook_model(path, type):
+        return type == 'notebook' or (type is None and path.endswith('.ipynb'))
+
     @asyncify
     def get_kernel_path(self, path, model=None):
         """
@@ -199,6 +244,9 @@ class CS3APIsManager(ContentsManager):
                 # if not self.checkpoints.list_checkpoints(path):
                 #     self.create_checkpoint(path)
 
+            elif model['type'] == 'file' and 'chunk' in model:
+                self._save_chunk(path, model['content'], model['format'], model['chunk'])
+
             elif model['type'] == 'file':
                 self._save_file(path, model['content'], model['format'])
 
@@ -222,6 +270,9 @@ class CS3APIsManager(ContentsManager):
             validation_message = model.get('message', None)
             model = self._notebook_model(path, content=False)
 
+        elif model['type'] == 'file' and model.get('chunk', -1) != -1:
+            # the file is committed to Reva with the last chunk, there is nothing to stat yet
+            model = ModelUtils.create_empty_file_model(path)
         elif model['type'] == 'file':
             model = self._file_model(path, content=False, format=None)
         elif model['type'] == 'directory':
@@ -313,11 +364,14 @@ class CS3APIsManager(ContentsManager):
     def _read_file(self, stat, file_format=None):
         if file_format is None or file_format == "text":
             try:
-                content = ''
+                # chunks can split multi-byte characters, so decode incrementally
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                content = []
                 for chunk in self.file_api.read_file(stat, self.cs3_config.endpoint):
-                    content += chunk.decode('utf-8')
+                    content.append(decoder.decode(chunk))
+                content.append(decoder.decode(b'', final=True))
 
-                return content
+                return ''.join(content)
             except UnicodeError as e:
                 if file_format == "text":
                     raise HTTPError(
@@ -334,6 +388,16 @@ class CS3APIsManager(ContentsManager):
 
     @asyncify
     def _dir_model(self, path, content):
+        if not content:
+            # without content the directory is stat'ed, the frontend reads large listings page by page
+            stat = self.storage_api.stat(path, self.cs3_config.endpoint, projection=StatProjection.BASIC)
+            if stat.status.code != cs3code.CODE_OK:
+                raise web.HTTPError(404, u'%s does not exist' % path)
+            model = ModelUtils.convert_info_to_base_model(path, stat.info)
+            model['size'] = None
+            model['type'] = 'directory'
+            return model
+
         try:
             cs3_container = self.file_api.read_directory(path, self.cs3_config.endpoint)
             model = ModelUtils.convert_container_to_directory_model(path, cs3_container, content)
@@ -346,7 +410,7 @@ class CS3APIsManager(ContentsManager):
         file_info = None
         model = ModelUtils.create_empty_file_model(path)
         try:
-            file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
+            file_info = self.file_api.stat_file_info(path, self.cs3_config.endpoint)
         except Exception as e:
             self.log.info('File % does not exists' % path)
 
@@ -375,7 +439,7 @@ class CS3APIsManager(ContentsManager):
 
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
     def _notebook_model(self, path, content):
-        file_info = self.file_api.stat_info(path, self.cs3_config.endpoint)
+        file_info = self.file_api.stat_file_info(path, self.cs3_config.endpoint)
 
         model = ModelUtils.update_file_model(ModelUtils.create_empty_file_model(path), file_info)
         model['type'] = 'notebook'
@@ -396,7 +460,7 @@ class CS3APIsManager(ContentsManager):
             return True
 
         path = FileUtils.normalize_path(path)
-        stat = self.storage_api.stat(path)
+        stat = self.storage_api.stat(path, projection=StatProjection.TYPE)
         return stat.status.code == cs3code.CODE_OK and stat.info.type == resource_types.RESOURCE_TYPE_CONTAINER
 
     @asyncify
@@ -405,18 +469,97 @@ class CS3APIsManager(ContentsManager):
             raise web.HTTPError(400, "Must specify format of file contents as 'text' or 'base64'", )
 
         try:
-            if format is None or format == 'text':
-                bcontent = content.encode('utf8')
-            else:
-                b64_bytes = content.encode('ascii')
-                bcontent = decodebytes(b64_bytes)
-
-            self.file_api.write_file(path, bcontent, self.cs3_config.endpoint, format)
+            # the content is encoded (or base64 decoded) chunk by chunk while it's uploaded
+            self.file_api.write_file(path, content, self.cs3_config.endpoint, format)
 
         except Exception as e:
             self.log.error(u'Error saving: %s %s', path, e)
             raise web.HTTPError(400, u'Error saving %s: %s' % (path, e))
 
+    @asyncify
+    def _save_chunk(self, path, content, format, chunk):
+        """
+        JupyterLab uploads large files in chunks numbered 1..N, the last one is -1. The chunks are staged
+        in a local temporary file and the whole file is uploaded to Reva once, when the last chunk arrives.
+        """
+        if format != 'base64':
+            raise web.HTTPError(400, "Chunked uploads must be base64 encoded")
+
+        with self._chunked_uploads_lock:
+            self._remove_stale_chunked_uploads()
+            if chunk == 1:
+                self._discard_chunked_upload(path)
+                self._chunked_uploads[path] = {'file': tempfile.TemporaryFile(), 'updated': time.time(),
+                                               'lock': threading.Lock(), 'discarded': False, 'chunks': 0}
+            upload = self._chunked_uploads.get(path)
+            if upload is None:
+                raise web.HTTPError(400, u'No upload in progress for %s, chunk %s' % (path, chunk))
+            if chunk != -1 and chunk != upload['chunks'] + 1:
+                # e.g. a late chunk of a previous upload of the same path
+                raise web.HTTPError(400, u'Unexpected chunk %s of %s, expected chunk %s' % (
+                    chunk, path, upload['chunks'] + 1))
+            upload['chunks'] += 1
+            upload['updated'] = time.time()
+            if chunk == -1:
+                del self._chunked_uploads[path]
+
+        # the chunks of an upload are appended one at a time, the upload may be discarded in the meantime
+        # by a new upload of the same path or by the sweep of stale uploads
+        with upload['lock']:
+            if upload['discarded']:
+                upload['file'].close()
+                raise web.HTTPError(400, u'Upload of %s was restarted or expired, chunk %s' % (path, chunk))
+
+            staged_file = upload['file']
+            try:
+                for data in UploadStream(content, FileUtils.calculate_content_size(content, format), format,
+                                         self.cs3_config.chunk_size):
+                    staged_file.write(data)
+                upload['updated'] = time.time()
+
+                if chunk == -1:
+                    content_size = staged_file.tell()
+                    staged_file.seek(0)
+                    self.file_api.write_file(path, staged_file, self.cs3_config.endpoint, content_size=content_size)
+                    staged_file.close()
+
+            except Exception as e:
+                self.log.error(u'Error saving chunk %s: %s %s', chunk, path, e)
+                with self._chunked_uploads_lock:
+                    self._discard_chunked_upload(path, upload)
+                staged_file.close()
+                raise web.HTTPError(400, u'Error saving %s: %s' % (path, e))
+
+            if upload['discarded']:
+                staged_file.close()
+                raise web.HTTPError(400, u'Upload of %s was restarted or expired, chunk %s' % (path, chunk))
+
+    def _discard_chunked_upload(self, path, upload=None):
+        """
+        Drops the staged upload of the path, if upload is given only when it is still the upload of the path.
+        Called with _chunked_uploads_lock held; a temporary file that is being written is closed by its writer.
+        """
+        if upload is None:
+            upload = self._chunked_uploads.get(path)
+        if upload is None:
+            return
+        if self._chunked_uploads.get(path) is upload:
+            del self._chunked_uploads[path]
+
+        upload['discarded'] = True
+        if upload['lock'].acquire(blocking=False):
+            try:
+                upload['file'].close()
+            finally:
+                upload['lock'].release()
+
+    def _remove_stale_chunked_uploads(self):
+        expired = time.time() - self.cs3_config.chunked_upload_timeout
+        for path in [path for path, upload in self._chunked_uploads.items()
+                     if upload['updated'] < expired and not upload['lock'].locked()]:
+            self.log.info(u'Discarding unfinished chunked upload of %s', path)
+            self._discard_chunked_upload(path)
+
     # can't be async because SQLite (used for jupyter notebooks) doesn't allow multithreaded operations by default
     def _save_notebook(self, path, nb, format):
 
@@ -457,7 +600,7 @@ class CS3APIsManager(ContentsManager):
             is_editor = False
 
         # check if file is shared with me
-        role = self.share_api.get_share_received_role(file_info['filepath'])
+        role = self.share_api.get_share_received_role(file_info['filepath'], file_info['inode'])
         if is_editor and role and role == Role.VIEWER:
             is_editor = False
 
@@ -0,0 +1,103 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class DirectoryCursors:
+    """
+    Directory listings kept open between the pages of a paginated listing, so that the next page continues
+    the ListContainerStream of the previous one instead of reading the directory from the start again.
+    A listing is bound to the user and the path it was opened for. Listings that aren't continued within
+    directory_cursor_ttl seconds are closed by a background timer, which cancels their call, and at most
+    directory_cursor_max_open listings are kept.
+    """
+
+    def __init__(self, ttl, max_open):
+        self.ttl = ttl
+        self.max_open = max_open
+        self._listings = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def put(self, key, stream, cursor_id=None):
+        """
+        Keeps the stream of a listing whose next page will be requested, returns the id of its cursor
+        """
+        if self.max_open <= 0 or self.ttl <= 0:
+            stream.close()
+            return None
+
+        cursor_id = cursor_id or uuid.uuid4().hex
+        with self._lock:
+            self._listings[cursor_id] = (key, stream, time.monotonic() + self.ttl)
+            closed = self._remove_expired() + self._remove_over_limit()
+            self._start()
+        for stream in closed:
+            stream.close()
+        return cursor_id
+
+    def take(self, cursor_id, key):
+        """
+        Returns the stream of the listing and stops keeping it, None if the listing was closed
+        or belongs to another user or path. The caller puts the stream back after reading the page.
+        """
+        with self._lock:
+            closed = self._remove_expired()
+            listing = self._listings.get(cursor_id)
+            if listing is not None and listing[0] == key:
+                del self._listings[cursor_id]
+            else:
+                listing = None
+        for stream in closed:
+            stream.close()
+        return listing[1] if listing else None
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            streams = [stream for _, stream, _ in self._listings.values()]
+            self._listings.clear()
+        for stream in streams:
+            stream.close()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._listings)
+
+    def sweep(self):
+        """
+        Closes the listings that weren't continued in time, closing a listing cancels its call
+        """
+        with self._lock:
+            closed = self._remove_expired()
+        for stream in closed:
+            stream.close()
+
+    def _run(self):
+        try:
+            self.sweep()
+        finally:
+            with self._lock:
+                self._timer = None
+                if self._listings:
+                    self._start()
+
+    def _start(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.ttl, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _remove_expired(self):
+        now = time.monotonic()
+        expired = [cursor_id for cursor_id, (_, _, expires) in self._listings.items() if expires <= now]
+        return [self._listings.pop(cursor_id)[1] for cursor_id in expired]
+
+    def _remove_over_limit(self):
+        closed = []
+        while len(self._listings) > self.max_open:
+            closed.append(self._listings.popitem(last=False)[1][1])
+        return closed
@@ -0,0 +1,160 @@
+import threading
+import time
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+
+class _UserShares:
+
+    def __init__(self, fetch, now):
+        self.fetch = fetch
+        self.by_resource = {}
+        # paths of the shared containers, files below them get the role of the share
+        self.paths = {}
+        self.last_used = now
+
+
+class ReceivedShareIndex:
+    """
+    Process-wide index of the shares received by the users, keyed by the resource id of the shared resource
+    and by the path of the shared containers. The index of a user is loaded with a single ListReceivedShares
+    on first use and refreshed by a background timer every received_share_index_interval seconds, until it
+    hasn't been used for received_share_index_max_idle seconds. Accepting or rejecting a share invalidates it.
+    """
+    __index_instance = None
+    __index_lock = threading.Lock()
+
+    def __init__(self, log, interval, max_idle):
+        self.log = log
+        self.interval = interval
+        self.max_idle = max_idle
+        self.users = {}
+        self._lock = threading.RLock()
+        self._timer = None
+
+    @classmethod
+    def get_index(cls, log=None):
+        if cls.__index_instance is None:
+            with cls.__index_lock:
+                if cls.__index_instance is None:
+                    config = Cs3ConfigManager.get_config()
+                    cls.__index_instance = ReceivedShareIndex(log, config.received_share_index_interval,
+                                                              config.received_share_index_max_idle)
+        return cls.__index_instance
+
+    @classmethod
+    def clean(cls):
+        if cls.__index_instance is not None:
+            cls.__index_instance.stop()
+        cls.__index_instance = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def get_share(self, user, resource_id, path=None, fetch=None):
+        """
+        Returns the received share of the resource, or of the shared container the path is in, None if there is none.
+        fetch() returns the received shares of the user, it's called when the index of the user isn't loaded.
+        """
+        entry = self._get_entry(user, fetch)
+        with self._lock:
+            share = entry.by_resource.get(resource_id)
+            if share is not None or not path:
+                return share
+
+            parent = path.rstrip('/')
+            while parent:
+                parent = parent.rsplit('/', 1)[0]
+                resource_key = entry.paths.get(parent or '/')
+                if resource_key is not None:
+                    return entry.by_resource.get(resource_key)
+            return None
+
+    def set_path(self, user, resource_id, path):
+        """
+        Records the path of a shared container, e.g. when the received shares are listed with their stats
+        """
+        with self._lock:
+            entry = self.users.get(user)
+            if entry is not None and resource_id in entry.by_resource:
+                entry.paths[path.rstrip('/') or '/'] = resource_id
+
+    def refresh(self, user):
+        """
+        Lists the received shares of the user again and applies the differences to the index
+        """
+        with self._lock:
+            entry = self.users.get(user)
+        if entry is not None:
+            self._apply(entry, entry.fetch())
+
+    def invalidate(self, user):
+        with self._lock:
+            self.users.pop(user, None)
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.users.clear()
+
+    def beat(self):
+        """
+        Refreshes the indexes of the users and forgets the idle ones
+        """
+        now = time.monotonic()
+        with self._lock:
+            for user in [user for user, entry in self.users.items() if now - entry.last_used >= self.max_idle]:
+                del self.users[user]
+            users = list(self.users)
+
+        for user in users:
+            try:
+                self.refresh(user)
+            except Exception as e:
+                # the index is kept until the next refresh
+                self.log.error('msg="Error refreshing received shares" user="%s" reason="%s"' % (user[1], e))
+
+    def _get_entry(self, user, fetch):
+        now = time.monotonic()
+        with self._lock:
+            entry = self.users.get(user)
+            if entry is not None:
+                entry.last_used = now
+                return entry
+
+        entry = _UserShares(fetch, now)
+        self._apply(entry, fetch())
+        with self._lock:
+            self.users.setdefault(user, entry)
+            self._start()
+            return self.users[user]
+
+    def _apply(self, entry, received_shares):
+        shares = {(received.share.resource_id.storage_id, received.share.resource_id.opaque_id): received.share
+                  for received in received_shares}
+        with self._lock:
+            for resource_id in [resource_id for resource_id in entry.by_resource if resource_id not in shares]:
+                del entry.by_resource[resource_id]
+            for resource_id, share in shares.items():
+                if entry.by_resource.get(resource_id) != share:
+                    entry.by_resource[resource_id] = share
+            entry.paths = {path: resource_id for path, resource_id in entry.paths.items()
+                           if resource_id in entry.by_resource}
+
+    def _run(self):
+        try:
+            self.beat()
+        finally:
+            with self._lock:
+                self._timer = None
+                if self.users:
+                    self._start()
+
+    def _start(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
@@ -0,0 +1,52 @@
+import threading
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.locks.factory import LockApiFactory
+
+
+class ServiceRegistry:
+    """
+    Long-lived API instances shared by the request handlers and the contents manager. Every API class
+    is instantiated once per process, on first use, instead of building its gRPC stubs on every request.
+    The API classes keep no per-request state, so the instances are used from many threads at once.
+    """
+    __registry_instance = None
+    __registry_lock = threading.Lock()
+
+    def __init__(self, log):
+        self.log = log
+        self._services = {}
+        # constructors of the services can ask the registry for other services
+        self._lock = threading.RLock()
+
+    @classmethod
+    def get_registry(cls, log=None):
+        if cls.__registry_instance is None:
+            with cls.__registry_lock:
+                if cls.__registry_instance is None:
+                    cls.__registry_instance = ServiceRegistry(log)
+        return cls.__registry_instance
+
+    @classmethod
+    def get_service(cls, service_class, log=None):
+        return cls.get_registry(log).get(service_class)
+
+    @classmethod
+    def clean(cls):
+        cls.__registry_instance = None
+
+    def get(self, service_class, factory=None):
+        """
+        Returns the shared instance of service_class, created with factory() or service_class(log)
+        """
+        service = self._services.get(service_class)
+        if service is None:
+            with self._lock:
+                service = self._services.get(service_class)
+                if service is None:
+                    service = factory() if factory else service_class(self.log)
+                    self._services[service_class] = service
+        return service
+
+    def get_lock_api(self):
+        return self.get(LockApiFactory, lambda: LockApiFactory.create(self.log, Cs3ConfigManager.get_config()))
@@ -0,0 +1,58 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter that applies the configured timeouts to requests that don't set their own
+    """
+
+    def __init__(self, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class Session(LoggingConfigurable):
+    session = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        config = Cs3ConfigManager.get_config()
+
+        # only idempotent requests are retried, upload bodies are streamed and can't be sent again
+        retry = Retry(total=config.http_max_retries,
+                      backoff_factor=config.http_backoff_factor,
+                      status_forcelist=[502, 503, 504],
+                      allowed_methods=frozenset(['GET', 'HEAD', 'OPTIONS']),
+                      raise_on_status=False)
+        adapter = TimeoutHTTPAdapter(timeout=(config.http_connect_timeout, config.http_read_timeout),
+                                     pool_connections=config.http_pool_connections,
+                                     pool_maxsize=config.http_pool_maxsize,
+                                     max_retries=retry)
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self.session = session
+
+
+class SessionConnector:
+    """
+    Shares one pool of keep-alive HTTP connections to the data gateways between all StorageApi instances
+    """
+    __session_instance = None
+
+    @classmethod
+    def get_session(cls):
+        if cls.__session_instance is None:
+            cls.__session_instance = Session()
+        return cls.__session_instance.session
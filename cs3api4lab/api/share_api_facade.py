@@ -1,3 +1,4 @@
+import concurrent.futures
 import urllib.parse
 
 import cs3.ocm.provider.v1beta1.provider_api_pb2_grpc as ocm_provider_api_grpc
@@ -12,12 +13,14 @@ from cs3api4lab.api.cs3_user_api import Cs3UserApi
 
 from cs3api4lab.api.cs3_share_api import Cs3ShareApi
 from cs3api4lab.api.cs3_ocm_share_api import Cs3OcmShareApi
+from cs3api4lab.api.share_registry import ShareRegistry
+from cs3api4lab.api.stat_projection import StatProjection
 
 from cs3api4lab.utils.share_utils import ShareUtils
 from cs3api4lab.utils.model_utils import ModelUtils
 from cs3api4lab.utils.file_utils import FileUtils
 from cs3api4lab.api.storage_api import StorageApi
-from cs3api4lab.exception.exceptions import OCMDisabledError
+from cs3api4lab.exception.exceptions import OCMDisabledError, ShareNotFoundError
 
 class ShareAPIFacade:
     def __init__(self, log):
@@ -34,6 +37,7 @@ class ShareAPIFacade:
         self.ocm_share_api = Cs3OcmShareApi(log)
 
         self.storage_api = StorageApi(log)
+        self.share_registry = ShareRegistry.get_registry()
         return
 
     def create(self, endpoint, file_path, opaque_id, idp, role=Role.EDITOR, grantee_type=Grantee.USER, reshare=True):
@@ -47,9 +51,9 @@ class ShareAPIFacade:
         else:
             return self.share_api.create(endpoint, file_path, opaque_id, idp, role, grantee_type)
 
-    def get_share_received_role(self, path):
+    def get_share_received_role(self, path, resource_id=None):
         """Check if share has viewer or editor permissions"""
-        share = self.share_api.get_share_received(path)
+        share = self.share_api.get_share_received(path, resource_id)
 
         role = None
         if share:
@@ -93,7 +97,8 @@ class ShareAPIFacade:
             result = self.share_api.update_received(share_id, state)
 
         stat = self.file_api.stat_info(urllib.parse.unquote(result.share.resource_id.opaque_id),
-                                       result.share.resource_id.storage_id)  # todo remove this and use storage_logic
+                                       result.share.resource_id.storage_id,
+                                       projection=StatProjection.BASIC)  # todo remove this and use storage_logic
         return ModelUtils.map_share_to_base_model(result.share, stat)
 
     def remove(self, share_id):
@@ -185,53 +190,76 @@ class ShareAPIFacade:
         return not bool(self.user_api.get_user_info(idp, opaque_id))
 
     def is_share(self, opaque_id):
+        """Checks if the id is a regular share created by the user, the share is fetched if the id isn't known yet"""
+        kind = self.share_registry.get(self._cache_user(), opaque_id)
+        if kind is not None:
+            return kind == ShareRegistry.SHARE
+
         try:
             self.share_api.get(opaque_id)
-        except Exception:
+        except ShareNotFoundError:
             return False
 
         return True
 
     def is_ocm_share(self, share_id):
-        """Checks if share is present on shares list"""
-        for share in self.share_api.list().shares:
-            if share.id.opaque_id == share_id:
-                return False
-        return True
+        """Checks if share is neither a regular share created by the user nor a regular received share"""
+        kind = self.share_registry.get(self._cache_user(), share_id)
+        if kind is not None:
+            return kind in (ShareRegistry.OCM_SHARE, ShareRegistry.OCM_RECEIVED)
+        if self.is_share(share_id):
+            return False
+
+        try:
+            self.share_api.get_received(share_id)
+        except ShareNotFoundError:
+            return True
+
+        return False
 
     def is_ocm_received_share(self, share_id):
-        """Checks if share is present on OCM received shares list"""
+        """Checks if share is an OCM received share, the share is fetched if the id isn't known yet"""
         if self.config.enable_ocm:
+            kind = self.share_registry.get(self._cache_user(), share_id)
+            if kind is not None:
+                return kind == ShareRegistry.OCM_RECEIVED
             try:
                 # if OCM is not enabled on IOP side this call will fail
-                received_shares = self.ocm_share_api.list_received()
-                for share in received_shares.shares:
-                    if share_id == share.share.id.opaque_id:
-                        return True
+                self.ocm_share_api.get_received_share(share_id)
+                return True
+            except ShareNotFoundError:
+                return False
             except Exception as e:
                 self.log.error("Error checking OCM " + str(e))
         return False
 
+    def _cache_user(self):
+        return self.config.reva_host, self.config.client_id
+
     def map_shares(self, share_list, ocm_share_list, received=False):
         """Converts both types of shares into Jupyter model"""
-        share_list_mapped = self.map_shares_to_model(share_list, received)
+        shares = self._get_shares(share_list, received)
+        if ocm_share_list:
+            shares += self._get_shares(ocm_share_list, received)
+        users, stats = self._lookup_share_details(shares)
+
+        share_list_mapped = self.map_shares_to_model(share_list, received, users, stats)
         if ocm_share_list:
-            ocm_share_list_mapped = self.map_shares_to_model(ocm_share_list, received)
+            ocm_share_list_mapped = self.map_shares_to_model(ocm_share_list, received, users, stats)
             for share in ocm_share_list_mapped['content']:
                 share_list_mapped['content'].append(share)
         return share_list_mapped
 
-    def map_shares_to_model(self, list_response, received=False):
+    def map_shares_to_model(self, list_response, received=False, users=None, stats=None):
+        if users is None or stats is None:
+            users, stats = self._lookup_share_details(self._get_shares(list_response, received))
+
         respond_model = ModelUtils.create_respond_model()
-        share_no = 0
-        for share in list_response.shares:
-            if received:
-                share = share.share
+        for received_share in list_response.shares:
+            share = received_share.share if received else received_share
             try:
-                user = self.user_api.get_user_info(share.owner.idp, share.owner.opaque_id)
-                stat = self.file_api.stat_info(urllib.parse.unquote(share.resource_id.opaque_id),
-                                               share.resource_id.storage_id)  # todo remove this and use storage_logic
-                # stat = self.storage_logic.stat_info(urllib.parse.unquote(share.resource_id.opaque_id), share.resource_id.storage_id)
+                user = users[(share.owner.idp, share.owner.opaque_id)]
+                stat = stats[(share.resource_id.storage_id, share.resource_id.opaque_id)].result()
 
                 if stat['type'] == Resources.RESOURCE_TYPE_FILE:
                     if hasattr(share.permissions.permissions,
@@ -244,6 +272,9 @@ class ShareAPIFacade:
                     if hasattr(share.permissions.permissions,
                                'list_container') and share.permissions.permissions.list_container is False:
                         continue
+                    if received:
+                        self.share_api.index_received_path(
+                            (share.resource_id.storage_id, share.resource_id.opaque_id), stat['filepath'])
                     model = ModelUtils.map_share_to_dir_model(share, stat, optional={
                         'owner': user['display_name']
                     })
@@ -254,10 +285,32 @@ class ShareAPIFacade:
                 continue
 
             if received:
-                model['state'] = ShareUtils.map_state(list_response.shares[share_no].state)
+                model['state'] = ShareUtils.map_state(received_share.state)
             model['resource_id'] = {'storage_id': share.resource_id.storage_id,
                                     'opaque_id': share.resource_id.opaque_id}
             respond_model['content'].append(model)
-            share_no = share_no + 1
 
         return respond_model
+
+    @staticmethod
+    def _get_shares(list_response, received=False):
+        return [share.share if received else share for share in list_response.shares]
+
+    def _lookup_share_details(self, shares):
+        """
+        Fetches the owners and the stats of the shared resources concurrently, every distinct owner
+        and resource is fetched once. Returns a dict of user infos keyed by (idp, opaque_id)
+        and a dict of stat futures keyed by (storage_id, opaque_id).
+        """
+        owners = {(share.owner.idp, share.owner.opaque_id) for share in shares}
+        resources = {(share.resource_id.storage_id, share.resource_id.opaque_id) for share in shares}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.share_lookup_workers) as executor:
+            # todo remove this and use storage_logic
+            # the models only need the path, size and type, not the arbitrary metadata
+            stats = {resource: executor.submit(self.file_api.stat_info, urllib.parse.unquote(resource[1]), resource[0],
+                                               projection=StatProjection.BASIC)
+                     for resource in resources}
+            users = self.user_api.prefetch_users(owners)
+
+        return users, stats
@@ -0,0 +1,48 @@
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.ttl_cache import TTLCache
+
+
+class ShareRegistry:
+    """
+    Process-wide registry of the kind of the share ids seen by the users: regular or OCM, given or received.
+    Ids are recorded as shares are created, listed and fetched, so that the facade can route updates, removals
+    and state changes without probing with Get* calls or scanning share lists. The kind of an id never changes,
+    the registry only forgets ids when they're removed or evicted (share_registry_size ids are kept).
+    """
+    SHARE = 'share'
+    RECEIVED = 'received'
+    OCM_SHARE = 'ocm_share'
+    OCM_RECEIVED = 'ocm_received'
+
+    __registry_instance = None
+
+    def __init__(self, max_size):
+        self.kinds = TTLCache(float('inf'), max_size)
+
+    @classmethod
+    def get_registry(cls):
+        if cls.__registry_instance is None:
+            config = Cs3ConfigManager.get_config()
+            cls.__registry_instance = ShareRegistry(config.share_registry_size)
+        return cls.__registry_instance
+
+    @classmethod
+    def clean(cls):
+        cls.__registry_instance = None
+
+    def get(self, user, share_id):
+        """
+        Returns the kind of the share, None if the share id isn't known
+        """
+        return self.kinds.get((user, share_id))
+
+    def set(self, user, share_id, kind):
+        if share_id:
+            self.kinds.set((user, share_id), kind)
+
+    def set_all(self, user, share_ids, kind):
+        for share_id in share_ids:
+            self.set(user, share_id, kind)
+
+    def forget(self, user, share_id):
+        self.kinds.pop((user, share_id))
@@ -0,0 +1,102 @@
+import posixpath
+
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.ttl_cache import TTLCache
+
+
+class StatCache:
+    """
+    Short-lived cache of successful Stat responses, keyed by user, by the path or resource id
+    of the reference and by the projection of the stat. Changes made through Cs3FileApi invalidate the affected entries explicitly,
+    changes made by other users become visible after stat_cache_ttl seconds. The cache keeps its own copies of the
+    responses and returns copies, so that callers can't change the cached stats.
+    """
+    __cache_instance = None
+
+    def __init__(self, ttl, max_size):
+        self.enabled = ttl > 0 and max_size > 0
+        self.cache = TTLCache(ttl, max_size)
+
+    @classmethod
+    def get_cache(cls):
+        if cls.__cache_instance is None:
+            config = Cs3ConfigManager.get_config()
+            cls.__cache_instance = StatCache(config.stat_cache_ttl, config.stat_cache_size)
+        return cls.__cache_instance
+
+    @classmethod
+    def clean(cls):
+        cls.__cache_instance = None
+
+    def get(self, user, ref, projection=StatProjection.FULL, metadata_keys=None):
+        """
+        Returns a cached stat of the projection or of a projection containing it, None if there is none
+        """
+        if not self.enabled:
+            return None
+        for projection_key in StatProjection.covering_keys(projection, metadata_keys):
+            stat = self.cache.get(self._key(user, ref, projection_key))
+            if stat is not None:
+                return self._copy(stat)
+        return None
+
+    def set(self, user, ref, stat, projection=StatProjection.FULL, metadata_keys=None):
+        if self.enabled:
+            self.cache.set(self._key(user, ref, StatProjection.key(projection, metadata_keys)), self._copy(stat))
+
+    def invalidate(self, user, path=None, resource_id=None):
+        """
+        Removes the entries of the path (and everything below it) and of the resource id,
+        entries of the same resource cached under another path or id are removed as well.
+        The entries of the parent directories are removed too, their etag and mtime change with their content.
+        """
+        if not self.enabled:
+            return
+
+        def matches(key, stat):
+            if key[0] != user:
+                return False
+            if resource_id is not None and self._is_same_resource(stat.info.id, resource_id):
+                return True
+            if path is not None:
+                for cached_path in (key[2] if key[1] == 'path' else None, stat.info.path):
+                    if cached_path and (cached_path == path or cached_path.startswith(path.rstrip('/') + '/')):
+                        return True
+            return False
+
+        removed = self.cache.remove_if(matches)
+        resource_ids = [stat.info.id for stat in removed]
+        if resource_ids:
+            self.cache.remove_if(lambda key, stat: key[0] == user and any(
+                self._is_same_resource(stat.info.id, removed_id) for removed_id in resource_ids))
+
+        parents = {self._parent(changed_path) for changed_path in [path] + [stat.info.path for stat in removed]
+                   if changed_path}
+        parents.discard(None)
+        if parents:
+            self.cache.remove_if(lambda key, stat: key[0] == user and (
+                stat.info.path in parents or (key[1] == 'path' and key[2] in parents)))
+
+    @staticmethod
+    def _copy(stat):
+        copy = type(stat)()
+        copy.CopyFrom(stat)
+        return copy
+
+    @staticmethod
+    def _parent(path):
+        path = path.rstrip('/')
+        if not path.startswith('/'):
+            return None
+        return posixpath.dirname(path) or '/'
+
+    @staticmethod
+    def _is_same_resource(resource_id, other_id):
+        return resource_id.storage_id == other_id.storage_id and resource_id.opaque_id == other_id.opaque_id
+
+    @staticmethod
+    def _key(user, ref, projection_key):
+        if ref.path:
+            return user, 'path', ref.path, projection_key
+        return user, 'id', ref.resource_id.storage_id, ref.resource_id.opaque_id, projection_key
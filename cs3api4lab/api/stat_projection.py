@@ -0,0 +1,47 @@
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+from google.protobuf import field_mask_pb2
+
+
+class StatProjection:
+    """
+    The part of the resource info a stat asks for. Arbitrary metadata (the xattrs on EOS) is the expensive part:
+    only FULL fetches all of it, the other projections fetch just the metadata keys given by the caller.
+    EXISTS and TYPE additionally send a field mask, storage providers ignoring it return the whole info.
+    """
+    EXISTS = 0
+    TYPE = 1
+    BASIC = 2
+    FULL = 3
+
+    # id and path are needed to invalidate cached stats
+    field_masks = {
+        EXISTS: ['id', 'path'],
+        TYPE: ['id', 'path', 'type'],
+    }
+
+    @classmethod
+    def build_request(cls, ref, projection=FULL, metadata_keys=None):
+        if projection == cls.FULL:
+            return cs3sp.StatRequest(ref=ref, arbitrary_metadata_keys=['*'])
+
+        request = cs3sp.StatRequest(ref=ref, arbitrary_metadata_keys=sorted(metadata_keys or []))
+        if projection in cls.field_masks:
+            request.field_mask.CopyFrom(field_mask_pb2.FieldMask(paths=cls.field_masks[projection]))
+        return request
+
+    @classmethod
+    def key(cls, projection=FULL, metadata_keys=None):
+        if projection == cls.FULL:
+            return cls.FULL, ()
+        return projection, tuple(sorted(set(metadata_keys or [])))
+
+    @classmethod
+    def covering_keys(cls, projection=FULL, metadata_keys=None):
+        """
+        Returns the keys of the projections whose stats contain everything the given projection asks for,
+        starting with the projection itself
+        """
+        projection, metadata_keys = cls.key(projection, metadata_keys)
+        keys = [(covering, metadata_keys) for covering in range(projection, cls.FULL)]
+        keys.append((cls.FULL, ()))
+        return keys
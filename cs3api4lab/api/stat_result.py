@@ -0,0 +1,121 @@
+from collections.abc import Mapping
+from types import MappingProxyType
+
+
+class _Inode(Mapping):
+    """
+    Read-only view of the resource id of a stat, as {'storage_id': ..., 'opaque_id': ...}
+    """
+    __slots__ = ('_id',)
+
+    id_fields = ('storage_id', 'opaque_id')
+
+    def __init__(self, resource_id):
+        object.__setattr__(self, '_id', resource_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'_Inode' object is immutable")
+
+    def __getitem__(self, key):
+        if key not in self.id_fields:
+            raise KeyError(key)
+        return getattr(self._id, key)
+
+    def __iter__(self):
+        return iter(self.id_fields)
+
+    def __len__(self):
+        return len(self.id_fields)
+
+
+class StatResult(Mapping):
+    """
+    Immutable record of a stat returned by Cs3FileApi.stat_info. The fields are read from the ResourceInfo
+    message when accessed and the arbitrary metadata is decoded on first use, instead of building nested dicts
+    and running MessageToDict for every stat. Callers index it like the dict it replaces, e.g. stat['filepath'].
+    The message isn't copied, StatCache hands out copies of the cached responses so it isn't shared with the cache.
+    It isn't exposed either, the permissions are returned as a copy.
+    """
+    __slots__ = ('_info', '_inode', '_arbitrary_metadata')
+
+    fields = ('inode', 'filepath', 'userid', 'size', 'mtime', 'type', 'mime_type', 'idp', 'permissions',
+              'arbitrary_metadata', 'etag')
+    _field_set = frozenset(fields)
+
+    def __init__(self, info):
+        object.__setattr__(self, '_info', info)
+        object.__setattr__(self, '_inode', None)
+        object.__setattr__(self, '_arbitrary_metadata', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("'StatResult' object is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("'StatResult' object is immutable")
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __repr__(self):
+        return 'StatResult(filepath=%r, type=%r, size=%r)' % (self.filepath, self.type, self.size)
+
+    @property
+    def inode(self):
+        if self._inode is None:
+            object.__setattr__(self, '_inode', _Inode(self._info.id))
+        return self._inode
+
+    @property
+    def filepath(self):
+        return self._info.path
+
+    @property
+    def userid(self):
+        return self._info.owner.opaque_id
+
+    @property
+    def size(self):
+        return self._info.size
+
+    @property
+    def mtime(self):
+        return self._info.mtime.seconds
+
+    @property
+    def type(self):
+        return self._info.type
+
+    @property
+    def mime_type(self):
+        return self._info.mime_type
+
+    @property
+    def idp(self):
+        return self._info.owner.idp
+
+    @property
+    def permissions(self):
+        permissions = type(self._info.permission_set)()
+        permissions.CopyFrom(self._info.permission_set)
+        return permissions
+
+    @property
+    def etag(self):
+        return self._info.etag
+
+    @property
+    def arbitrary_metadata(self):
+        # same shape as MessageToDict(info.arbitrary_metadata)
+        if self._arbitrary_metadata is None:
+            metadata = self._info.arbitrary_metadata.metadata
+            object.__setattr__(self, '_arbitrary_metadata',
+                               MappingProxyType({'metadata': dict(metadata)} if metadata else {}))
+        return self._arbitrary_metadata
@@ -1,20 +1,22 @@
 import urllib.parse
 
-import grpc
-import requests
 
 import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
 import cs3.types.v1beta1.types_pb2 as types
 import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
-import webdav3.client as webdav
 
 from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.channel_connector import ChannelConnector
+from cs3api4lab.api.session_connector import SessionConnector
+from cs3api4lab.api.stat_cache import StatCache
+from cs3api4lab.api.stat_projection import StatProjection
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 
 from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.upload_stream import UploadStream
+from cs3api4lab.api.tus_upload import TusUpload
 from cs3api4lab.auth.authenticator import Auth
 
 
@@ -30,27 +32,60 @@ class StorageApi:
         self.auth = Auth.get_authenticator(config=self.config, log=self.log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
+        self.session = SessionConnector.get_session()
+        self.stat_cache = StatCache.get_cache()
         return
 
-    def get_unified_file_ref(self, file_path, endpoint):
-        stat = self.stat(file_path, endpoint)
+    def get_unified_file_ref(self, file_path, endpoint, cached=True):
+        stat = self.stat(file_path, endpoint, cached, StatProjection.EXISTS)
         if stat.status.code != cs3code.CODE_OK:
             return None
         else:
             stat_unified = self._stat_internal(ref=storage_provider.Reference(
                 resource_id=storage_provider.ResourceId(storage_id=stat.info.id.storage_id,
-                                                        opaque_id=stat.info.id.opaque_id)))
+                                                        opaque_id=stat.info.id.opaque_id)),
+                cached=cached, projection=StatProjection.EXISTS)
             return storage_provider.Reference(path=stat_unified.info.path)
 
-    def stat(self, file_path, endpoint='/'):
+    def stat(self, file_path, endpoint='/', cached=True, projection=StatProjection.FULL, metadata_keys=None):
+        """
+        Stat a resource, the projection and metadata_keys tell which parts of the resource info are needed
+        (see StatProjection), by default the info with all the arbitrary metadata is returned
+        """
         ref = FileUtils.get_reference(file_path, endpoint)
-        return self._stat_internal(ref)
+        return self._stat_internal(ref, cached, projection, metadata_keys)
 
-    def _stat_internal(self, ref):
-        return self.cs3_api.Stat(request=cs3sp.StatRequest(ref=ref, arbitrary_metadata_keys='*'),
+    def _stat_internal(self, ref, cached=True, projection=StatProjection.FULL, metadata_keys=None):
+        if cached:
+            stat = self.stat_cache.get(self._cache_user(), ref, projection, metadata_keys)
+            if stat is not None:
+                return stat
+
+        stat = self.cs3_api.Stat(request=StatProjection.build_request(ref, projection, metadata_keys),
                                  metadata=[('x-access-token', self.auth.authenticate())])
+        if stat.status.code == cs3code.CODE_OK:
+            self.stat_cache.set(self._cache_user(), ref, stat, projection, metadata_keys)
+        return stat
+
+    def invalidate_stat(self, file_path=None, endpoint='/', resource_id=None):
+        """
+        Drops cached stats of a path (and everything below it) and/or of a resource id,
+        must be called after every change made to the resource
+        """
+        path = None
+        if file_path is not None:
+            ref = FileUtils.get_reference(file_path, endpoint)
+            if ref.path:
+                path = ref.path
+            else:
+                resource_id = ref.resource_id
+        self.stat_cache.invalidate(self._cache_user(), path, resource_id)
+
+    def _cache_user(self):
+        # the authenticator is the one thing that identifies the user of this api instance
+        return self.auth.config.reva_host, self.auth.config.client_id
 
     def set_metadata(self, key, data, stat):
         opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
@@ -65,13 +100,40 @@ class StorageApi:
                 arbitrary_metadata=arbitrary_metadata),
             metadata=self._get_token())
 
+        self.invalidate_stat(stat['filepath'], resource_id=storage_provider.ResourceId(
+            storage_id=stat['inode']['storage_id'], opaque_id=stat['inode']['opaque_id']))
+
         if set_metadata_response.status.code != cs3code.CODE_OK:
             raise Exception('Unable to set metadata for: ' + stat['filepath'] + ' ' + str(set_metadata_response.status))
 
-    def get_metadata(self, file_path, endpoint):
-        ref = self.get_unified_file_ref(file_path, endpoint)
+    def unset_metadata(self, key, stat):
+        opaque_id = urllib.parse.unquote(stat['inode']['opaque_id'])
+        storage_id = urllib.parse.unquote(stat['inode']['storage_id'])
+        reference = FileUtils.get_reference(opaque_id, storage_id)
+
+        unset_metadata_response = self.cs3_api.UnsetArbitraryMetadata(
+            request=cs3sp.UnsetArbitraryMetadataRequest(
+                ref=reference,
+                arbitrary_metadata_keys=[key]),
+            metadata=self._get_token())
+
+        self.invalidate_stat(stat['filepath'], resource_id=storage_provider.ResourceId(
+            storage_id=stat['inode']['storage_id'], opaque_id=stat['inode']['opaque_id']))
+
+        if unset_metadata_response.status.code != cs3code.CODE_OK:
+            raise Exception('Unable to unset metadata for: ' + stat['filepath'] + ' ' + str(unset_metadata_response.status))
+
+    def get_metadata(self, file_path, endpoint, keys=None):
+        """
+        Returns the arbitrary metadata of a resource, only the given keys if any
+        """
+        # metadata holds the locks, it's always read from the storage
+        ref = self.get_unified_file_ref(file_path, endpoint, cached=False)
         if ref:
-            stat = self._stat_internal(ref)
+            if keys:
+                stat = self._stat_internal(ref, cached=False, projection=StatProjection.BASIC, metadata_keys=keys)
+            else:
+                stat = self._stat_internal(ref, cached=False)
             if stat.status.code == cs3code.CODE_OK:
                 return stat.info.arbitrary_metadata.metadata
         return None
@@ -96,6 +158,13 @@ class StorageApi:
         return init_file_upload_res
 
     def upload_content(self, file_path, content, content_size, init_file_upload_response):
+        if not isinstance(content, UploadStream):
+            content = UploadStream(content, content_size, chunk_size=self.config.chunk_size)
+
+        tus_protocols = [p for p in init_file_upload_response.protocols if p.protocol == "tus"]
+        if self.config.tus_enabled and tus_protocols:
+            return self._upload_content_tus(file_path, content, content_size, tus_protocols[0])
+
         protocol = [p for p in init_file_upload_response.protocols if p.protocol == "simple"][0]
         if self.config.tus_enabled:
             headers = {
@@ -111,10 +180,23 @@ class StorageApi:
                 'Upload-Length': content_size,
                 'X-Reva-Transfer': protocol.token
             }
-        put_res = requests.put(url=protocol.upload_endpoint, data=content, headers=headers)
+        # an empty stream would be sent with chunked transfer encoding
+        data = content if len(content) > 0 else b''
+        put_res = self.session.put(url=protocol.upload_endpoint, data=data, headers=headers)
 
         return put_res
 
+    def _upload_content_tus(self, file_path, content, content_size, protocol):
+        headers = {
+            'File-Path': file_path,
+            'File-Size': content_size,
+            'x-access-token': self.auth.authenticate(),
+            'X-Reva-Transfer': protocol.token
+        }
+        tus_upload = TusUpload(self.log, self.config, protocol.upload_endpoint, headers, content_size,
+                               self.session)
+        return tus_upload.upload(content)
+
     def init_file_download(self, file_path, endpoint):
         reference = FileUtils.get_reference(file_path, endpoint)
         req = cs3sp.InitiateFileDownloadRequest(ref=reference)
@@ -136,23 +218,32 @@ class StorageApi:
 
         return init_file_download_response
 
-    def download_content(self, init_file_download):
+    def download_content(self, init_file_download, offset=None, length=None):
+        # the body is streamed, callers have to consume it with iter_content() and close the response
+        range_headers = {}
+        if offset is not None:
+            last_byte = str(offset + length - 1) if length else ''
+            range_headers['Range'] = 'bytes=%d-%s' % (offset, last_byte)
+
         protocol = [p for p in init_file_download.protocols if p.protocol == "simple"][0]
         # if file is shared via OCM the request needs to go through webdav
         if protocol.opaque and init_file_download.protocols[0].opaque.map['webdav-file-path'].value:
             download_url = protocol.download_endpoint + str(protocol.opaque.map['webdav-file-path'].value, 'utf-8')[1:]
-            file_get = webdav.Client({}).session.request(
+            file_get = self.session.request(
                 method='GET',
                 url=download_url,
                 headers={
-                    'X-Access-Token': str(protocol.opaque.map['webdav-token'].value, 'utf-8')}
+                    'X-Access-Token': str(protocol.opaque.map['webdav-token'].value, 'utf-8'),
+                    **range_headers},
+                stream=True
             )
         else:
             headers = {
                 'x-access-token': self.auth.authenticate(),
-                'X-Reva-Transfer': protocol.token  # needed if the downloads pass through the data gateway in reva
+                'X-Reva-Transfer': protocol.token,  # needed if the downloads pass through the data gateway in reva
+                **range_headers
             }
-            file_get = requests.get(url=protocol.download_endpoint, headers=headers)
+            file_get = self.session.get(url=protocol.download_endpoint, headers=headers, stream=True)
         return file_get
 
     def _get_token(self):
@@ -0,0 +1,131 @@
+"""
+tus_upload.py
+
+Resumable TUS uploads to the Reva data gateway
+
+Authors:
+"""
+import http
+import time
+
+import requests
+
+
+class TusUpload:
+    """
+    Uploads a file to a TUS endpoint returned by InitiateFileUpload. The content is sent in PATCH
+    requests of tus_chunk_size bytes, after a failure the offset is queried with HEAD and the upload
+    resumes from the last byte the server has received.
+    """
+    tus_version = '1.0.0'
+
+    def __init__(self, log, config, upload_endpoint, headers, content_size, session=requests):
+        self.log = log
+        self.config = config
+        self.upload_endpoint = upload_endpoint
+        self.headers = dict(headers)
+        self.headers['Tus-Resumable'] = self.tus_version
+        self.content_size = int(content_size)
+        self.chunk_size = int(config.tus_chunk_size)
+        self.max_retries = int(config.tus_max_retries)
+        self.retry_delay = float(config.tus_retry_delay)
+        self.session = session
+        self.offset = 0
+
+    def get_offset(self):
+        """
+        Returns the number of bytes the server has already received
+        """
+        response = self.session.head(url=self.upload_endpoint, headers=self.headers)
+        if response.status_code != http.HTTPStatus.OK or 'Upload-Offset' not in response.headers:
+            raise IOError('Unable to get TUS upload offset: %s %s' % (response.status_code, response.reason))
+        return int(response.headers['Upload-Offset'])
+
+    def upload(self, stream, offset=0):
+        """
+        Uploads the content of the stream (an iterable of bytes) starting at the given offset,
+        the stream has to start at the same offset. Returns the response of the last PATCH request.
+        """
+        self.offset = offset
+        response = None
+        chunk_start = offset
+        for chunk in self._read_chunks(stream):
+            response = self._upload_chunk(chunk, chunk_start)
+            chunk_start += len(chunk)
+
+        if response is None:
+            # empty file, a single PATCH completes the upload
+            response = self._upload_chunk(b'', offset)
+
+        if self.offset != self.content_size:
+            raise IOError('TUS upload incomplete: %d of %d bytes sent' % (self.offset, self.content_size))
+
+        return response
+
+    def resume(self, stream):
+        """
+        Resumes an interrupted upload; the stream must start at the beginning of the content
+        and the bytes already received by the server are skipped
+        """
+        offset = self.get_offset()
+        self.log.info('msg="Resuming TUS upload" endpoint="%s" offset="%d"' % (self.upload_endpoint, offset))
+        return self.upload(self._skip(stream, offset), offset)
+
+    def _upload_chunk(self, chunk, chunk_start):
+        attempt = 0
+        while True:
+            # part of the chunk might have reached the server before the failure
+            data = chunk[self.offset - chunk_start:]
+            try:
+                response = self._patch(data)
+                if response.status_code == http.HTTPStatus.NO_CONTENT:
+                    previous_offset = self.offset
+                    self.offset = int(response.headers.get('Upload-Offset', self.offset + len(data)))
+                    if self.offset >= chunk_start + len(chunk):
+                        return response
+                    if self.offset > previous_offset:
+                        continue
+                    error = IOError('TUS PATCH made no progress at offset %d' % self.offset)
+                else:
+                    error = IOError('TUS PATCH failed: %s %s' % (response.status_code, response.reason))
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            attempt += 1
+            if attempt > self.max_retries:
+                self.log.error('msg="TUS upload failed" endpoint="%s" offset="%d" reason="%s"' %
+                               (self.upload_endpoint, self.offset, error))
+                raise IOError(error)
+
+            self.log.info('msg="Retrying TUS upload" endpoint="%s" offset="%d" attempt="%d" reason="%s"' %
+                          (self.upload_endpoint, self.offset, attempt, error))
+            time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            try:
+                self.offset = min(max(self.get_offset(), chunk_start), chunk_start + len(chunk))
+            except (IOError, requests.exceptions.RequestException) as e:
+                self.log.info('msg="Unable to get TUS upload offset" reason="%s"' % e)
+
+    def _patch(self, data):
+        headers = dict(self.headers)
+        headers['Upload-Offset'] = str(self.offset)
+        headers['Content-Type'] = 'application/offset+octet-stream'
+        return self.session.patch(url=self.upload_endpoint, data=data, headers=headers)
+
+    def _read_chunks(self, stream):
+        buffer = bytearray()
+        for data in stream:
+            buffer += data
+            while len(buffer) >= self.chunk_size:
+                yield bytes(buffer[:self.chunk_size])
+                del buffer[:self.chunk_size]
+        if buffer:
+            yield bytes(buffer)
+
+    @staticmethod
+    def _skip(stream, size):
+        for data in stream:
+            if size >= len(data):
+                size -= len(data)
+                continue
+            yield data[size:]
+            size = 0
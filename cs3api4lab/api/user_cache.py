@@ -0,0 +1,69 @@
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.ttl_cache import TTLCache
+
+
+class UserCache:
+    """
+    Process-wide cache of user infos keyed by (idp, opaque_id). Users that aren't known to the
+    local provider (e.g. OCM users) are cached as well, for user_cache_negative_ttl seconds.
+    Results of user queries are kept for user_query_cache_ttl seconds. With user_query_refinement
+    a query extending a cached one (as typed in the share dialog) is answered by filtering the cached users,
+    which is only correct if the user provider returned all the users matching the cached query.
+    """
+    __cache_instance = None
+
+    def __init__(self, ttl, negative_ttl, max_size, query_ttl=0, query_refinement=False):
+        self.negative_ttl = negative_ttl
+        self.query_refinement = query_refinement
+        self.cache = TTLCache(ttl, max_size if ttl > 0 else 0)
+        self.query_cache = TTLCache(query_ttl, max_size if query_ttl > 0 else 0)
+
+    @classmethod
+    def get_cache(cls):
+        if cls.__cache_instance is None:
+            config = Cs3ConfigManager.get_config()
+            cls.__cache_instance = UserCache(config.user_cache_ttl, config.user_cache_negative_ttl,
+                                             config.user_cache_size, config.user_query_cache_ttl,
+                                             config.user_query_refinement)
+        return cls.__cache_instance
+
+    @classmethod
+    def clean(cls):
+        cls.__cache_instance = None
+
+    def get(self, idp, opaque_id):
+        """
+        Returns the cached user info, {} for a user known not to exist and None if the user isn't cached
+        """
+        return self.cache.get((idp, opaque_id))
+
+    def set(self, idp, opaque_id, user_info):
+        if user_info:
+            self.cache.set((idp, opaque_id), user_info)
+        elif self.negative_ttl > 0:
+            self.cache.set((idp, opaque_id), {}, self.negative_ttl)
+
+    def get_query(self, user, query, min_length=3):
+        """
+        Returns the users found for the query, or with query_refinement for its longest cached prefix filtered
+        by the query. Returns None if neither the query nor any prefix of at least min_length characters is cached.
+        """
+        users = self.query_cache.get((user, query))
+        if users is not None or not self.query_refinement:
+            return users
+
+        for end in range(len(query) - 1, min_length - 1, -1):
+            users = self.query_cache.get((user, query[:end]))
+            if users is not None:
+                return [user_info for user_info in users if self._matches(user_info, query)]
+
+        return None
+
+    def set_query(self, user, query, users):
+        self.query_cache.set((user, query), users)
+
+    @staticmethod
+    def _matches(user_info, query):
+        query = query.lower()
+        return any(query in (user_info.get(field) or '').lower()
+                   for field in ('username', 'display_name', 'mail', 'opaque_id'))
@@ -1,4 +1,6 @@
 import importlib
+import threading
+import time
 from datetime import datetime
 
 import jwt
@@ -12,14 +14,17 @@ from cs3api4lab.auth.channel_connector import ChannelConnector
 
 
 class Authenticator:
-    token = None
     cs3_stub = None
+    _token = None
+    _token_expiry = None
+    _refresh_timer = None
 
     def __init__(self, config=None, log=None):
         self.config = config
         self.log = log
         self.channel = ChannelConnector().get_channel()
         self.cs3_stub = cs3gw_grpc.GatewayAPIStub(self.channel)
+        self._refresh_lock = threading.Lock()
 
     """
     Parent class for different authentication types. Authentication class must implement the authenticate method.
@@ -27,14 +32,68 @@ class Authenticator:
     Using auth type is declared in the config file.
     """
 
+    @property
+    def token(self):
+        return self._token
+
+    @token.setter
+    def token(self, token):
+        """
+        The expiry of the token is decoded once, when the token is set, and a refresh is scheduled
+        auth_refresh_margin seconds before it
+        """
+        self._token_expiry = self._get_token_expiry(token) if token is not None else None
+        self._token = token
+        self._schedule_refresh()
+
     def authenticate(self):
         """
         The basic authenticate method, return IOP token or refresh if is not present or invalid.
+        Only one thread refreshes the token, the others wait for it and use the new token.
         """
-        if self.token is None or self._check_token(self.token) is False:
-            self.refresh_token()
+        if not self._is_token_valid():
+            with self._refresh_lock:
+                if not self._is_token_valid():
+                    self.refresh_token()
 
-        return self.token
+        return self._token
+
+    def invalidate_token(self, token):
+        """
+        Drops the token if it's still the current one, e.g. after the gateway rejected it,
+        so that the next authenticate() refreshes it
+        """
+        with self._refresh_lock:
+            if token is not None and token == self._token:
+                self.token = None
+
+    def _is_token_valid(self):
+        return self._token is not None and (self._token_expiry is None or time.time() <= self._token_expiry)
+
+    def cancel_refresh(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
+
+    def _schedule_refresh(self):
+        self.cancel_refresh()
+        if self._token_expiry is None or self.config.auth_refresh_margin <= 0:
+            return
+
+        delay = self._token_expiry - self.config.auth_refresh_margin - time.time()
+        if delay > 0:
+            self._refresh_timer = threading.Timer(delay, self._background_refresh)
+            self._refresh_timer.daemon = True
+            self._refresh_timer.start()
+
+    def _background_refresh(self):
+        try:
+            with self._refresh_lock:
+                self.refresh_token()
+        except Exception as e:
+            # the token is refreshed on the next request after it expires
+            if self.log is not None:
+                self.log.warning('msg="Background token refresh failed" user="%s" reason="%s"' % (self.config.client_id, e))
 
     def refresh_token(self):
         self.raise_401_error()
@@ -57,41 +116,53 @@ class Authenticator:
         return auth_res.token
 
     def _check_token(self, token):
-        decode = jwt.decode(jwt=token, algorithms=["HS256"], options={"verify_signature": False})
+        expiry = self._get_token_expiry(token)
         now = datetime.timestamp(datetime.now())
-        if decode['exp'] is not None and now > decode['exp']:
+        if expiry is not None and now > expiry:
             return False
 
         return True
 
+    @staticmethod
+    def _get_token_expiry(token):
+        decode = jwt.decode(jwt=token, algorithms=["HS256"], options={"verify_signature": False})
+        return decode.get('exp')
+
 
 class Auth: 
     __auth_instance = None
+    __auth_lock = threading.Lock()
 
     @classmethod
     def get_authenticator(cls, config=None, log=None): #singletons should be replaced by dependency injection
-
         if cls.__auth_instance is None:
+            with cls.__auth_lock:
+                if cls.__auth_instance is None:
+                    cls.__auth_instance = cls._create_authenticator(config, log)
 
-            if config is None:
-                config = Cs3ConfigManager().get_config()
+        return cls.__auth_instance
 
-            if log is not None:
-                log.info(f"Authenticate with method {config.authenticator_class}")
+    @staticmethod
+    def _create_authenticator(config, log):
+        if config is None:
+            config = Cs3ConfigManager().get_config()
 
-            class_name = config.authenticator_class.split('.')[-1]
-            module_name = config.authenticator_class.split(class_name)[0]
-            module_name = module_name.rstrip('.')
+        if log is not None:
+            log.info(f"Authenticate with method {config.authenticator_class}")
 
-            if class_name == "Authenticator":
-                raise AttributeError("Can't instantiate Authenticator class")
+        class_name = config.authenticator_class.split('.')[-1]
+        module_name = config.authenticator_class.split(class_name)[0]
+        module_name = module_name.rstrip('.')
 
-            module = importlib.import_module(module_name)
-            clazz = getattr(module, class_name)
-            cls.__auth_instance = clazz(config=config, log=log)
+        if class_name == "Authenticator":
+            raise AttributeError("Can't instantiate Authenticator class")
 
-        return cls.__auth_instance
+        module = importlib.import_module(module_name)
+        clazz = getattr(module, class_name)
+        return clazz(config=config, log=log)
 
     @classmethod
     def clean(cls):
+        if cls.__auth_instance is not None:
+            cls.__auth_instance.cancel_refresh()
         cls.__auth_instance = None
@@ -1,3 +1,4 @@
+import itertools
 import sys
 import grpc
 from traitlets.config import LoggingConfigurable
@@ -5,12 +6,97 @@ from traitlets.config import LoggingConfigurable
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 
 
+class _RoundRobinMultiCallable:
+    """
+    Multi-callable of a ChannelPool, each invocation goes to the next channel of the pool
+    """
+
+    def __init__(self, multi_callables, counter):
+        self._multi_callables = multi_callables
+        self._counter = counter
+
+    def _next(self):
+        return self._multi_callables[next(self._counter) % len(self._multi_callables)]
+
+    def __call__(self, *args, **kwargs):
+        return self._next()(*args, **kwargs)
+
+    def with_call(self, *args, **kwargs):
+        return self._next().with_call(*args, **kwargs)
+
+    def future(self, *args, **kwargs):
+        return self._next().future(*args, **kwargs)
+
+
+class ChannelPool(grpc.Channel):
+    """
+    Channel distributing the calls round-robin among several channels, each with its own connection,
+    so that concurrent calls and large responses aren't all multiplexed over a single HTTP/2 connection
+    """
+
+    def __init__(self, channels):
+        self.channels = channels
+        self._counter = itertools.count()
+
+    def _multi_callable(self, kind, method, *args, **kwargs):
+        return _RoundRobinMultiCallable([getattr(channel, kind)(method, *args, **kwargs) for channel in self.channels],
+                                        self._counter)
+
+    def unary_unary(self, method, *args, **kwargs):
+        return self._multi_callable('unary_unary', method, *args, **kwargs)
+
+    def unary_stream(self, method, *args, **kwargs):
+        return self._multi_callable('unary_stream', method, *args, **kwargs)
+
+    def stream_unary(self, method, *args, **kwargs):
+        return self._multi_callable('stream_unary', method, *args, **kwargs)
+
+    def stream_stream(self, method, *args, **kwargs):
+        return self._multi_callable('stream_stream', method, *args, **kwargs)
+
+    def subscribe(self, callback, try_to_connect=False):
+        for channel in self.channels:
+            channel.subscribe(callback, try_to_connect)
+
+    def unsubscribe(self, callback):
+        for channel in self.channels:
+            channel.unsubscribe(callback)
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
 class Channel(LoggingConfigurable):
     channel = None
 
-    def __init__(self, **kwargs):
+    compressions = {
+        'none': grpc.Compression.NoCompression,
+        'gzip': grpc.Compression.Gzip,
+        'deflate': grpc.Compression.Deflate,
+    }
+
+    def __init__(self, config=None, **kwargs):
         super().__init__(**kwargs)
-        config = Cs3ConfigManager.get_config()
+        if config is None:
+            config = Cs3ConfigManager.get_config()
+        pool_size = max(config.grpc_channel_pool_size, 1)
+        if pool_size > 1:
+            self.log.info('msg="Creating gRPC channel pool" size="%s"' % pool_size)
+            self.channel = ChannelPool([self._create_channel(config, pool_size) for _ in range(pool_size)])
+        else:
+            self.channel = self._create_channel(config, pool_size)
+
+    def _create_channel(self, config, pool_size):
+        options = self.get_options(config, pool_size)
+        compression = self.get_compression(config)
         if config.secure_channel:
             try:
 
@@ -31,15 +117,34 @@ class Channel(LoggingConfigurable):
                         ca_cert = ca_cert_content.read()
 
                 credentials = grpc.ssl_channel_credentials(root_certificates=ca_cert, private_key=key, certificate_chain=cert)
-                channel = grpc.secure_channel(config.reva_host, credentials)
+                channel = grpc.secure_channel(config.reva_host, credentials, options=options, compression=compression)
 
             except:
                 ex = sys.exc_info()[0]
                 self.log.error('msg="Error create secure channel" reason="%s"' % ex)
                 raise IOError(ex)
         else:
-            channel = grpc.insecure_channel(config.reva_host)
-        self.channel = channel
+            channel = grpc.insecure_channel(config.reva_host, options=options, compression=compression)
+        return channel
+
+    @staticmethod
+    def get_options(config, pool_size=1):
+        options = [('grpc.max_send_message_length', config.grpc_max_send_message_length),
+                   ('grpc.max_receive_message_length', config.grpc_max_receive_message_length)]
+        if config.grpc_keepalive_time_ms > 0:
+            options += [('grpc.keepalive_time_ms', config.grpc_keepalive_time_ms),
+                        ('grpc.keepalive_timeout_ms', config.grpc_keepalive_timeout_ms)]
+        if pool_size > 1:
+            # channels with the same target and options share their connection unless the subchannel pool is local
+            options.append(('grpc.use_local_subchannel_pool', 1))
+        return options
+
+    def get_compression(self, config):
+        compression = (config.grpc_compression or 'none').lower()
+        if compression not in self.compressions:
+            self.log.error('msg="Unknown gRPC compression, compression disabled" compression="%s"' % config.grpc_compression)
+            compression = 'none'
+        return self.compressions[compression]
 
 
 class ChannelConnector:
@@ -1,34 +1,263 @@
+import asyncio
+import collections
+import threading
+
 import cs3.rpc.v1beta1.code_pb2 as cs3code
 import grpc
 
 
-class CheckAuthInterceptor(grpc.UnaryUnaryClientInterceptor,
-                           grpc.UnaryStreamClientInterceptor,
-                           grpc.StreamUnaryClientInterceptor,
-                           grpc.StreamStreamClientInterceptor):
+class _ClientCallDetails(collections.namedtuple('_ClientCallDetails',
+                                                ('method', 'timeout', 'metadata', 'credentials',
+                                                 'wait_for_ready', 'compression')),
+                         grpc.ClientCallDetails):
+    pass
+
+
+class _AuthRetry:
+    """
+    Shared logic of the interceptors: detecting responses of unauthenticated calls
+    and building the details of the retried call with a fresh token
+    """
     unauth_codes = {cs3code.CODE_UNAUTHENTICATED}
+    token_header = 'x-access-token'
 
     def __init__(self, log, authenticator):
         self.log = log
         self.authenticator = authenticator
 
+    def _is_unauthenticated(self, result):
+        return result is not None and result.status is not None and result.status.code in self.unauth_codes
+
+    def _get_token(self, client_call_details):
+        for key, value in client_call_details.metadata or []:
+            if key == self.token_header:
+                return value
+        return None
+
+    def _refresh_token(self, rejected_token):
+        """
+        Drops the token rejected by the gateway and returns a new one
+        """
+        self.authenticator.invalidate_token(rejected_token)
+        return self.authenticator.authenticate()
+
+    def _with_token(self, client_call_details, token):
+        metadata = [(key, token if key == self.token_header else value)
+                    for key, value in client_call_details.metadata]
+        return _ClientCallDetails(client_call_details.method, client_call_details.timeout, metadata,
+                                  client_call_details.credentials,
+                                  getattr(client_call_details, 'wait_for_ready', None),
+                                  getattr(client_call_details, 'compression', None))
+
+
+class CheckAuthInterceptor(_AuthRetry,
+                           grpc.UnaryUnaryClientInterceptor,
+                           grpc.UnaryStreamClientInterceptor,
+                           grpc.StreamUnaryClientInterceptor,
+                           grpc.StreamStreamClientInterceptor):
+    """
+    Checks the status of the responses. A blocking call rejected with CODE_UNAUTHENTICATED is retried
+    once with a refreshed token; responses of calls made with .future() are checked in a done callback,
+    so the caller isn't blocked. The messages of streams are checked as they're read and the rejected
+    token is dropped, so the next call authenticates again.
+    Stubs are created on intercept_channel(channel), which tells the interceptor which calls are futures.
+    """
+
+    def __init__(self, log, authenticator):
+        super().__init__(log, authenticator)
+        self._future_calls = threading.local()
+
+    def intercept_channel(self, channel):
+        return _FutureCallChannel(grpc.intercept_channel(channel, self), self._future_calls)
+
     def intercept_unary_unary(self, continuation, client_call_details, request):
-        return self._intercept_call(continuation, client_call_details, request)
+        is_future = self._is_future()
+        response = continuation(client_call_details, request)
+        if is_future:
+            # runs right away if the call has completed already
+            response.add_done_callback(lambda future: self._check_future(future, client_call_details))
+            return response
+
+        if not self._is_unauthenticated(self._get_result(response)):
+            return response
+
+        token = self._get_token(client_call_details)
+        if token is None:
+            self.authenticator.raise_401_error()
+
+        self.log.info('msg="Token rejected, retrying with a refreshed token" method="%s"' % client_call_details.method)
+        response = continuation(self._with_token(client_call_details, self._refresh_token(token)), request)
+        if self._is_unauthenticated(self._get_result(response)):
+            self.authenticator.raise_401_error()
+        return response
 
     def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
-        return self._intercept_call(continuation, client_call_details, request_iterator)
+        # the request iterator is consumed by the call, so it can't be retried
+        is_future = self._is_future()
+        response = continuation(client_call_details, request_iterator)
+        if is_future:
+            response.add_done_callback(lambda future: self._check_future(future, client_call_details))
+        elif self._is_unauthenticated(self._get_result(response)):
+            self.authenticator.invalidate_token(self._get_token(client_call_details))
+            self.authenticator.raise_401_error()
+        return response
 
     def intercept_unary_stream(self, continuation, client_call_details, request):
-        return self._intercept_call(continuation, client_call_details, request)
+        return self._check_stream(continuation(client_call_details, request), client_call_details)
 
     def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
-        return self._intercept_call(continuation, client_call_details, request_iterator)
+        return self._check_stream(continuation(client_call_details, request_iterator), client_call_details)
+
+    def _check_stream(self, call, client_call_details):
+        call.add_done_callback(lambda call: self._check_stream_code(call, client_call_details))
+        return _CheckedStream(call, lambda: self._token_rejected(client_call_details), self._is_unauthenticated)
+
+    def _check_stream_code(self, call, client_call_details):
+        if call.code() == grpc.StatusCode.UNAUTHENTICATED:
+            self._token_rejected(client_call_details)
+
+    def _check_future(self, future, client_call_details):
+        if self._is_unauthenticated(self._get_result(future)):
+            self._token_rejected(client_call_details)
+
+    def _token_rejected(self, client_call_details):
+        # the next call authenticates again
+        self.log.info('msg="Token rejected" method="%s"' % client_call_details.method)
+        self.authenticator.invalidate_token(self._get_token(client_call_details))
+
+    def _is_future(self):
+        return getattr(self._future_calls, 'active', False)
+
+    @staticmethod
+    def _get_result(response):
+        # failed calls raise their RpcError to the caller as before
+        if response.exception() is not None:
+            return None
+        return response.result()
 
-    def _intercept_call(self, continuation, client_call_details, request_or_iterator):
-        response = continuation(client_call_details, request_or_iterator)
-        self._check_result(response.result())
+
+class _CheckedStream:
+    """
+    Response stream of an intercepted call, a message with CODE_UNAUTHENTICATED calls rejected() once.
+    The other methods of the call (cancel(), code(), ...) are the ones of the wrapped call.
+    """
+
+    def __init__(self, call, rejected, is_unauthenticated):
+        self._call = call
+        self._rejected = rejected
+        self._is_unauthenticated = is_unauthenticated
+        self._checked = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        response = next(self._call)
+        if not self._checked and getattr(response, 'status', None) is not None and self._is_unauthenticated(response):
+            self._checked = True
+            self._rejected()
         return response
 
-    def _check_result(self, result):
-        if result is not None and result.status is not None and result.status.code in self.unauth_codes:
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+
+class _FutureCallChannel(grpc.Channel):
+    """
+    Intercepted channel marking the calls made with .future() while the interceptor runs,
+    the interceptor is called in the thread of the caller
+    """
+
+    def __init__(self, channel, future_calls):
+        self._channel = channel
+        self._future_calls = future_calls
+
+    def unary_unary(self, *args, **kwargs):
+        return _FutureCallMarker(self._channel.unary_unary(*args, **kwargs), self._future_calls)
+
+    def stream_unary(self, *args, **kwargs):
+        return _FutureCallMarker(self._channel.stream_unary(*args, **kwargs), self._future_calls)
+
+    def unary_stream(self, *args, **kwargs):
+        return self._channel.unary_stream(*args, **kwargs)
+
+    def stream_stream(self, *args, **kwargs):
+        return self._channel.stream_stream(*args, **kwargs)
+
+    def subscribe(self, callback, try_to_connect=False):
+        self._channel.subscribe(callback, try_to_connect=try_to_connect)
+
+    def unsubscribe(self, callback):
+        self._channel.unsubscribe(callback)
+
+    def close(self):
+        self._channel.close()
+
+
+class _FutureCallMarker(grpc.UnaryUnaryMultiCallable, grpc.StreamUnaryMultiCallable):
+
+    def __init__(self, multi_callable, future_calls):
+        self._multi_callable = multi_callable
+        self._future_calls = future_calls
+
+    def __call__(self, *args, **kwargs):
+        return self._multi_callable(*args, **kwargs)
+
+    def with_call(self, *args, **kwargs):
+        return self._multi_callable.with_call(*args, **kwargs)
+
+    def future(self, *args, **kwargs):
+        self._future_calls.active = True
+        try:
+            return self._multi_callable.future(*args, **kwargs)
+        finally:
+            self._future_calls.active = False
+
+
+class AioCheckAuthInterceptor(_AuthRetry,
+                              grpc.aio.UnaryUnaryClientInterceptor,
+                              grpc.aio.UnaryStreamClientInterceptor,
+                              grpc.aio.StreamUnaryClientInterceptor,
+                              grpc.aio.StreamStreamClientInterceptor):
+    """
+    CheckAuthInterceptor for grpc.aio channels: unary calls rejected with CODE_UNAUTHENTICATED
+    are retried once with a refreshed token, the refresh runs in the default executor.
+    The token of streams ending with UNAUTHENTICATED is dropped.
+    """
+
+    async def intercept_unary_unary(self, continuation, client_call_details, request):
+        call = await continuation(client_call_details, request)
+        if not self._is_unauthenticated(await call):
+            return call
+
+        token = self._get_token(client_call_details)
+        if token is None:
             self.authenticator.raise_401_error()
+
+        self.log.info('msg="Token rejected, retrying with a refreshed token" method="%s"' % client_call_details.method)
+        token = await asyncio.get_running_loop().run_in_executor(None, self._refresh_token, token)
+        call = await continuation(self._with_token(client_call_details, token), request)
+        if self._is_unauthenticated(await call):
+            self.authenticator.raise_401_error()
+        return call
+
+    async def intercept_stream_unary(self, continuation, client_call_details, request_iterator):
+        call = await continuation(client_call_details, request_iterator)
+        if self._is_unauthenticated(await call):
+            self.authenticator.invalidate_token(self._get_token(client_call_details))
+            self.authenticator.raise_401_error()
+        return call
+
+    async def intercept_unary_stream(self, continuation, client_call_details, request):
+        return self._check_stream(await continuation(client_call_details, request), client_call_details)
+
+    async def intercept_stream_stream(self, continuation, client_call_details, request_iterator):
+        return self._check_stream(await continuation(client_call_details, request_iterator), client_call_details)
+
+    def _check_stream(self, call, client_call_details):
+        call.add_done_callback(lambda call: asyncio.ensure_future(self._check_stream_code(call, client_call_details)))
+        return call
+
+    async def _check_stream_code(self, call, client_call_details):
+        if await call.code() == grpc.StatusCode.UNAUTHENTICATED:
+            self.authenticator.invalidate_token(self._get_token(client_call_details))
@@ -2,7 +2,7 @@ import os
 from jupyter_core.paths import jupyter_config_path
 from jupyter_server.services.config import ConfigManager
 from traitlets.config import LoggingConfigurable
-from traitlets import Unicode, Bool, CInt, Tuple, default
+from traitlets import Unicode, Bool, CInt, CFloat, Tuple, default
 
 
 class Config(LoggingConfigurable):
@@ -35,6 +35,9 @@ class Config(LoggingConfigurable):
     chunk_size = CInt(
         config=True, help="""Size of the downloaded fragment from Reva"""
     )
+    file_range_max_chunks = CInt(
+        config=True, help="""Maximum length of a file range read at once, in multiples of chunk_size"""
+    )
     secure_channel = Bool(
         config=True, help="""Secure channel flag"""
     )
@@ -62,6 +65,108 @@ class Config(LoggingConfigurable):
     tus_enabled = Bool(
         config=True, help="""Flag to enable TUS"""
     )
+    tus_chunk_size = CInt(
+        config=True, help="""Size of a single TUS PATCH request"""
+    )
+    tus_max_retries = CInt(
+        config=True, help="""Number of retries of a failed TUS PATCH request before the upload fails"""
+    )
+    tus_retry_delay = CFloat(
+        config=True, help="""Delay in seconds before the first TUS retry, doubled for every next one"""
+    )
+    chunked_upload_timeout = CInt(
+        config=True, help="""Time in seconds after which an unfinished chunked upload is discarded"""
+    )
+    http_pool_connections = CInt(
+        config=True, help="""Number of data gateway hosts to keep HTTP connection pools for"""
+    )
+    http_pool_maxsize = CInt(
+        config=True, help="""Maximum number of keep-alive HTTP connections per data gateway host"""
+    )
+    http_max_retries = CInt(
+        config=True, help="""Number of retries of failed idempotent HTTP requests to the data gateway"""
+    )
+    http_backoff_factor = CFloat(
+        config=True, help="""Backoff factor in seconds between retries of HTTP requests to the data gateway"""
+    )
+    http_connect_timeout = CFloat(
+        config=True, help="""Timeout in seconds for connecting to the data gateway"""
+    )
+    http_read_timeout = CFloat(
+        config=True, help="""Timeout in seconds for waiting on data from the data gateway"""
+    )
+    stat_cache_ttl = CFloat(
+        config=True, help="""Time in seconds for which Stat responses are cached, 0 disables the cache"""
+    )
+    stat_cache_size = CInt(
+        config=True, help="""Maximum number of cached Stat responses"""
+    )
+    async_max_workers = CInt(
+        config=True, help="""Number of threads AsyncCS3APIsManager runs file operations in"""
+    )
+    share_lookup_workers = CInt(
+        config=True, help="""Number of concurrent requests for the owners and files of listed shares"""
+    )
+    user_cache_ttl = CFloat(
+        config=True, help="""Time in seconds for which user infos are cached, 0 disables the cache"""
+    )
+    user_cache_negative_ttl = CFloat(
+        config=True, help="""Time in seconds for which users not found in the local provider are cached"""
+    )
+    user_cache_size = CInt(
+        config=True, help="""Maximum number of cached user infos"""
+    )
+    user_query_cache_ttl = CFloat(
+        config=True, help="""Time in seconds for which results of user queries are cached, 0 disables the cache"""
+    )
+    user_query_refinement = Bool(
+        config=True, help="""Answer a query extending a cached one by filtering the cached users by username, display name, mail and id. Only correct if the user provider returns all the users containing the query in one of these fields"""
+    )
+    auth_refresh_margin = CFloat(
+        config=True, help="""Time in seconds before the token expires when it's refreshed in the background, 0 disables the background refresh"""
+    )
+    grpc_keepalive_time_ms = CInt(
+        config=True, help="""Interval in milliseconds of the keepalive pings sent on gRPC connections with active calls, 0 disables keepalive. Reva (grpc-go) rejects pings more frequent than every 5 minutes by default"""
+    )
+    grpc_keepalive_timeout_ms = CInt(
+        config=True, help="""Time in milliseconds to wait for a keepalive ping to be acknowledged before the connection is closed"""
+    )
+    grpc_max_send_message_length = CInt(
+        config=True, help="""Maximum size in bytes of a gRPC message sent to Reva, -1 for no limit"""
+    )
+    grpc_max_receive_message_length = CInt(
+        config=True, help="""Maximum size in bytes of a gRPC message received from Reva, -1 for no limit"""
+    )
+    grpc_compression = Unicode(
+        config=True, help="""Compression of the gRPC calls: none, gzip or deflate"""
+    )
+    grpc_channel_pool_size = CInt(
+        config=True, help="""Number of gRPC channels (connections) to Reva, calls are distributed among them round-robin"""
+    )
+    lock_cache_ttl = CFloat(
+        config=True, help="""Time in seconds for which lock states and the locks held by the user are cached, 0 disables the cache"""
+    )
+    lock_heartbeat_interval = CFloat(
+        config=True, help="""Interval in seconds of the background refresh of the locks of open files, 0 disables the heartbeat"""
+    )
+    lock_heartbeat_max_idle = CFloat(
+        config=True, help="""Time in seconds after the last read or save of a file when its lock is no longer refreshed"""
+    )
+    received_share_index_interval = CFloat(
+        config=True, help="""Interval in seconds at which the index of the received shares is refreshed in the background, 0 disables the index"""
+    )
+    received_share_index_max_idle = CFloat(
+        config=True, help="""Time in seconds after which the index of the received shares of a user that doesn't open files is dropped"""
+    )
+    share_registry_size = CInt(
+        config=True, help="""Maximum number of share ids whose kind (regular or OCM, given or received) is remembered"""
+    )
+    directory_cursor_ttl = CFloat(
+        config=True, help="""Time in seconds for which the listing of a directory is kept open for its next page, 0 disables it"""
+    )
+    directory_cursor_max_open = CInt(
+        config=True, help="""Maximum number of directory listings kept open for their next page"""
+    )
     eos_file = Unicode(
         config=True, allow_none=True, help="""EOS file location"""
     )
@@ -124,6 +229,10 @@ class Config(LoggingConfigurable):
     def _chunk_size_default(self):
         return self._get_config_value("chunk_size")
 
+    @default("file_range_max_chunks")
+    def _file_range_max_chunks_default(self):
+        return self._get_config_value("file_range_max_chunks")
+
     @default("secure_channel")
     def _secure_channel_default(self):
         return self._get_config_value("secure_channel") in ["true", True]
@@ -156,6 +265,142 @@ class Config(LoggingConfigurable):
     def _tus_enabled_default(self):
         return self._get_config_value("tus_enabled") in ["true", True]
 
+    @default("tus_chunk_size")
+    def _tus_chunk_size_default(self):
+        return self._get_config_value("tus_chunk_size")
+
+    @default("tus_max_retries")
+    def _tus_max_retries_default(self):
+        return self._get_config_value("tus_max_retries")
+
+    @default("tus_retry_delay")
+    def _tus_retry_delay_default(self):
+        return self._get_config_value("tus_retry_delay")
+
+    @default("chunked_upload_timeout")
+    def _chunked_upload_timeout_default(self):
+        return self._get_config_value("chunked_upload_timeout")
+
+    @default("http_pool_connections")
+    def _http_pool_connections_default(self):
+        return self._get_config_value("http_pool_connections")
+
+    @default("http_pool_maxsize")
+    def _http_pool_maxsize_default(self):
+        return self._get_config_value("http_pool_maxsize")
+
+    @default("http_max_retries")
+    def _http_max_retries_default(self):
+        return self._get_config_value("http_max_retries")
+
+    @default("http_backoff_factor")
+    def _http_backoff_factor_default(self):
+        return self._get_config_value("http_backoff_factor")
+
+    @default("http_connect_timeout")
+    def _http_connect_timeout_default(self):
+        return self._get_config_value("http_connect_timeout")
+
+    @default("http_read_timeout")
+    def _http_read_timeout_default(self):
+        return self._get_config_value("http_read_timeout")
+
+    @default("stat_cache_ttl")
+    def _stat_cache_ttl_default(self):
+        return self._get_config_value("stat_cache_ttl")
+
+    @default("stat_cache_size")
+    def _stat_cache_size_default(self):
+        return self._get_config_value("stat_cache_size")
+
+    @default("async_max_workers")
+    def _async_max_workers_default(self):
+        return self._get_config_value("async_max_workers")
+
+    @default("share_lookup_workers")
+    def _share_lookup_workers_default(self):
+        return self._get_config_value("share_lookup_workers")
+
+    @default("user_cache_ttl")
+    def _user_cache_ttl_default(self):
+        return self._get_config_value("user_cache_ttl")
+
+    @default("user_cache_negative_ttl")
+    def _user_cache_negative_ttl_default(self):
+        return self._get_config_value("user_cache_negative_ttl")
+
+    @default("user_cache_size")
+    def _user_cache_size_default(self):
+        return self._get_config_value("user_cache_size")
+
+    @default("user_query_cache_ttl")
+    def _user_query_cache_ttl_default(self):
+        return self._get_config_value("user_query_cache_ttl")
+
+    @default("user_query_refinement")
+    def _user_query_refinement_default(self):
+        return self._get_config_value("user_query_refinement")
+
+    @default("auth_refresh_margin")
+    def _auth_refresh_margin_default(self):
+        return self._get_config_value("auth_refresh_margin")
+
+    @default("grpc_keepalive_time_ms")
+    def _grpc_keepalive_time_ms_default(self):
+        return self._get_config_value("grpc_keepalive_time_ms")
+
+    @default("grpc_keepalive_timeout_ms")
+    def _grpc_keepalive_timeout_ms_default(self):
+        return self._get_config_value("grpc_keepalive_timeout_ms")
+
+    @default("grpc_max_send_message_length")
+    def _grpc_max_send_message_length_default(self):
+        return self._get_config_value("grpc_max_send_message_length")
+
+    @default("grpc_max_receive_message_length")
+    def _grpc_max_receive_message_length_default(self):
+        return self._get_config_value("grpc_max_receive_message_length")
+
+    @default("grpc_compression")
+    def _grpc_compression_default(self):
+        return self._get_config_value("grpc_compression")
+
+    @default("grpc_channel_pool_size")
+    def _grpc_channel_pool_size_default(self):
+        return self._get_config_value("grpc_channel_pool_size")
+
+    @default("lock_cache_ttl")
+    def _lock_cache_ttl_default(self):
+        return self._get_config_value("lock_cache_ttl")
+
+    @default("lock_heartbeat_interval")
+    def _lock_heartbeat_interval_default(self):
+        return self._get_config_value("lock_heartbeat_interval")
+
+    @default("lock_heartbeat_max_idle")
+    def _lock_heartbeat_max_idle_default(self):
+        return self._get_config_value("lock_heartbeat_max_idle")
+
+    @default("received_share_index_interval")
+    def _received_share_index_interval_default(self):
+        return self._get_config_value("received_share_index_interval")
+
+    @default("received_share_index_max_idle")
+    def _received_share_index_max_idle_default(self):
+        return self._get_config_value("received_share_index_max_idle")
+
+    @default("share_registry_size")
+    def _share_registry_size_default(self):
+        return self._get_config_value("share_registry_size")
+
+    @default("directory_cursor_ttl")
+    def _directory_cursor_ttl_default(self):
+        return self._get_config_value("directory_cursor_ttl")
+
+    @default("directory_cursor_max_open")
+    def _directory_cursor_max_open_default(self):
+        return self._get_config_value("directory_cursor_max_open")
+
     @default("enable_ocm")
     def _enable_ocm_default(self):
         return self._get_config_value("enable_ocm") in ["true", True]
@@ -229,6 +474,7 @@ class Config(LoggingConfigurable):
         "home_dir": "/",
         "root_dir_list": ['/home', '/reva'],
         "chunk_size": "4194304",
+        "file_range_max_chunks": 16,
         "secure_channel": True,
         "authenticator_class": "cs3api4lab.auth.RevaPassword",
         "login_type": "basic",
@@ -237,6 +483,40 @@ class Config(LoggingConfigurable):
         "client_cert": None,
         "ca_cert": None,
         "tus_enabled": False,
+        "tus_chunk_size": 10485760,
+        "tus_max_retries": 5,
+        "tus_retry_delay": 1.0,
+        "chunked_upload_timeout": 3600,
+        "http_pool_connections": 10,
+        "http_pool_maxsize": 10,
+        "http_max_retries": 3,
+        "http_backoff_factor": 0.5,
+        "http_connect_timeout": 10.0,
+        "http_read_timeout": 300.0,
+        "stat_cache_ttl": 2.0,
+        "stat_cache_size": 1024,
+        "async_max_workers": 16,
+        "share_lookup_workers": 8,
+        "user_cache_ttl": 300.0,
+        "user_cache_negative_ttl": 60.0,
+        "user_cache_size": 4096,
+        "user_query_cache_ttl": 30.0,
+        "user_query_refinement": False,
+        "auth_refresh_margin": 60.0,
+        "grpc_keepalive_time_ms": 300000,
+        "grpc_keepalive_timeout_ms": 10000,
+        "grpc_max_send_message_length": 104857600,
+        "grpc_max_receive_message_length": 104857600,
+        "grpc_compression": "none",
+        "grpc_channel_pool_size": 1,
+        "lock_cache_ttl": 5.0,
+        "lock_heartbeat_interval": 60.0,
+        "lock_heartbeat_max_idle": 3600.0,
+        "received_share_index_interval": 30.0,
+        "received_share_index_max_idle": 600.0,
+        "share_registry_size": 4096,
+        "directory_cursor_ttl": 60.0,
+        "directory_cursor_max_open": 64,
         "enable_ocm": False,
         "kernel_path": "/",
         "eos_file": None,
@@ -1,6 +1,8 @@
 import json
+import re
 
-from jupyter_server.base.handlers import APIHandler
+from jupyter_server.base.handlers import APIHandler, path_regex
+from jupyter_server.services.contents.handlers import ContentsHandler
 from tornado import gen, web
 from grpc._channel import _InactiveRpcError
 from cs3api4lab.exception.exceptions import *
@@ -8,13 +10,24 @@ from cs3api4lab.api.share_api_facade import ShareAPIFacade
 from cs3api4lab.api.cs3_public_share_api import Cs3PublicShareApi
 from cs3api4lab.api.cs3_user_api import Cs3UserApi
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
-from jupyter_server.utils import url_path_join
+from cs3api4lab.api.service_registry import ServiceRegistry
+from jupyter_server.utils import url_path_join, ensure_async
 from cs3api4lab.utils.asyncify import get_or_create_eventloop
 
+try:
+    from jupyter_server.auth import authorized
+except ImportError:
+    # jupyter_server releases without authorizers only check the user with web.authenticated
+    def authorized(method):
+        return method
+
+# the contents path, except the checkpoints and trust routes that jupyter_server matches before the contents route
+contents_regex = r"/api/contents(?!(?:/[^/]+)*/(?:trust|checkpoints(?:/[\w-]+)?)$)%s" % path_regex
+
 class ShareHandler(APIHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return ServiceRegistry.get_service(ShareAPIFacade, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -55,7 +68,7 @@ class ShareHandler(APIHandler):
 class ListSharesHandler(APIHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return ServiceRegistry.get_service(ShareAPIFacade, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -67,7 +80,7 @@ class ListSharesHandler(APIHandler):
 class ListReceivedSharesHandler(APIHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return ServiceRegistry.get_service(ShareAPIFacade, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -86,7 +99,7 @@ class ListReceivedSharesHandler(APIHandler):
 class ListSharesForFile(APIHandler):
     @property
     def share_api(self):
-        return ShareAPIFacade(self.log)
+        return ServiceRegistry.get_service(ShareAPIFacade, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -97,17 +110,94 @@ class ListSharesForFile(APIHandler):
 class HomeDirHandler(APIHandler):
     @property
     def file_api(self):
-        return Cs3FileApi(self.log)
+        return ServiceRegistry.get_service(Cs3FileApi, self.log)
 
     @web.authenticated
     @gen.coroutine
     def get(self):
         yield RequestHandler.async_handle_request(self, self.file_api.get_home_dir, 200)
 
+class FileRangeHandler(APIHandler):
+    @property
+    def file_api(self):
+        return ServiceRegistry.get_service(Cs3FileApi, self.log)
+
+    @web.authenticated
+    @gen.coroutine
+    def get(self):
+        yield RequestHandler.async_handle_request(self, self.file_api.get_file_range, 200,
+                                                  self.get_query_argument('file_path'),
+                                                  self.get_query_argument('offset', default='0'),
+                                                  self.get_query_argument('length'),
+                                                  self.get_query_argument('format', default='base64'))
+
+class FileLockHandler(APIHandler):
+    @property
+    def file_api(self):
+        return ServiceRegistry.get_service(Cs3FileApi, self.log)
+
+    @web.authenticated
+    @gen.coroutine
+    def delete(self):
+        yield RequestHandler.async_handle_request(self, self.file_api.release_lock, 204,
+                                                  self.get_query_argument('file_path'))
+
+class DirectoryPageHandler(APIHandler):
+    @property
+    def file_api(self):
+        return ServiceRegistry.get_service(Cs3FileApi, self.log)
+
+    @web.authenticated
+    @gen.coroutine
+    def get(self):
+        yield RequestHandler.async_handle_request(self, self.file_api.read_directory_page, 200,
+                                                  self.get_query_argument('path'),
+                                                  self.get_query_argument('limit', default='100'),
+                                                  self.get_query_argument('cursor', default=None))
+
+class ContentsEtagHandler(ContentsHandler):
+    """
+    Contents handler sending the ETag of the model, GET requests whose If-None-Match header matches it
+    are answered with 304 without downloading the file or listing the directory
+    """
+
+    @web.authenticated
+    @authorized
+    async def get(self, path=""):
+        get_etag = getattr(self.contents_manager, 'get_etag', None)
+        type = self.get_query_argument("type", default=None)
+        format = self.get_query_argument("format", default=None)
+        content = self.get_query_argument("content", default="1")
+        etag = None
+        # requests with invalid arguments are rejected by ContentsHandler
+        if get_etag is not None and type in {None, "directory", "file", "notebook"} \
+                and format in {None, "text", "base64"} and content in {"0", "1"}:
+            etag = await ensure_async(get_etag(path or "", content=int(content), type=type, format=format))
+        if etag:
+            self.set_header('Etag', etag)
+            if self._etag_matches(etag, self.request.headers.get("If-None-Match", "")):
+                self.set_status(304)
+                self.finish()
+                return
+        await super().get(path)
+
+    @staticmethod
+    def _etag_matches(etag, if_none_match):
+        """
+        Weak comparison of the ETag with the tags of an If-None-Match header, like RequestHandler.check_etag_header
+        """
+        tags = re.findall(r'\*|(?:W/)?"[^"]*"', if_none_match)
+        if not tags:
+            return False
+        if tags[0] == '*':
+            return True
+        strip = lambda tag: tag[2:] if tag.startswith('W/') else tag
+        return any(strip(tag) == strip(etag) for tag in tags)
+
 class PublicSharesHandler(APIHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return ServiceRegistry.get_service(Cs3PublicShareApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -150,7 +240,7 @@ class PublicSharesHandler(APIHandler):
 class GetPublicShareByTokenHandler(APIHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return ServiceRegistry.get_service(Cs3PublicShareApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -163,7 +253,7 @@ class GetPublicShareByTokenHandler(APIHandler):
 class ListPublicSharesHandler(APIHandler):
     @property
     def public_share_api(self):
-        return Cs3PublicShareApi(self.log)
+        return ServiceRegistry.get_service(Cs3PublicShareApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -174,7 +264,7 @@ class ListPublicSharesHandler(APIHandler):
 class UserInfoHandler(APIHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return ServiceRegistry.get_service(Cs3UserApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -186,7 +276,7 @@ class UserInfoHandler(APIHandler):
 class UserInfoClaimHandler(APIHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return ServiceRegistry.get_service(Cs3UserApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -198,7 +288,7 @@ class UserInfoClaimHandler(APIHandler):
 class UserQueryHandler(APIHandler):
     @property
     def user_api(self):
-        return Cs3UserApi(self.log)
+        return ServiceRegistry.get_service(Cs3UserApi, self.log)
 
     @web.authenticated
     @gen.coroutine
@@ -218,7 +308,11 @@ def setup_handlers(web_app, url_path):
         (r"/api/cs3/user", UserInfoHandler),
         (r"/api/cs3/user/claim", UserInfoClaimHandler),
         (r"/api/cs3/user/query", UserQueryHandler),
-        (r"/api/cs3/user/home_dir", HomeDirHandler)
+        (r"/api/cs3/user/home_dir", HomeDirHandler),
+        (r"/api/cs3/files/range", FileRangeHandler),
+        (r"/api/cs3/files/list", DirectoryPageHandler),
+        (r"/api/cs3/files/lock", FileLockHandler),
+        (contents_regex, ContentsEtagHandler)
     ]
 
     for handler in handlers:
@@ -272,7 +366,7 @@ class RequestHandler(APIHandler):
     def get_response_code(err):
         if isinstance(err, ShareAlreadyExistsError):
             return 409
-        if isinstance(err, (ShareNotFoundError, LockNotFoundError)):
+        if isinstance(err, (ShareNotFoundError, LockNotFoundError, ResourceNotFoundError)):
             return 404
         if isinstance(err, (InvalidTypeError, KeyError, FileNotFoundError, ParamError)):
             return 400
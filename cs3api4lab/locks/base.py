@@ -1,5 +1,4 @@
 from abc import ABC, abstractmethod
-import grpc
 import datetime
 import cs3.gateway.v1beta1.gateway_api_pb2 as cs3gw
 import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
@@ -9,23 +8,78 @@ from cs3api4lab.auth import check_auth_interceptor
 from cs3api4lab.auth.authenticator import Auth
 from cs3api4lab.auth.channel_connector import ChannelConnector
 from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.exception.exceptions import FileLockedError
+from cs3api4lab.locks.lock_cache import LockCache
 
 
 class LockBase(ABC):
 
     def __init__(self, log, config):
-        self.user = None
         self.config = config
         self.auth = Auth.get_authenticator(config=config, log=log)
         channel = ChannelConnector().get_channel()
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
         self.storage_api = StorageApi(log)
+        self.lock_cache = LockCache.get_cache()
         self.lock_name = 'cs3apis4lab_lock'
 
-    @abstractmethod
+    @property
+    def stat_metadata_keys(self):
+        """
+        The arbitrary metadata keys the lock API reads from the stats it gets
+        """
+        return []
+
     def set_lock(self, stat):
+        if not self.acquire_or_inspect(stat):
+            raise FileLockedError("File %s is locked" % stat['filepath'])
+
+    def acquire_or_inspect(self, stat):
+        """
+        Sets or refreshes the lock of the current user on the file. Returns True if the user holds the lock
+        and False if the file is locked by someone else. A lock acquired less than lock_cache_ttl seconds ago
+        is known to be held without asking Reva.
+        """
+        key = self._lock_key(stat)
+        if self.lock_cache.is_held(self._cache_user(), key):
+            return True
+        if not self._acquire(stat):
+            return False
+        self.lock_cache.set_held(self._cache_user(), key)
+        return True
+
+    def refresh_lock(self, stat):
+        """
+        Refreshes the lock of the current user on the file, asking Reva for its current state.
+        Returns False if the file is locked by someone else.
+        """
+        if not self._refresh(stat):
+            return False
+        self.lock_cache.set_held(self._cache_user(), self._lock_key(stat))
+        return True
+
+    def release_lock(self, stat):
+        """
+        Removes the lock of the current user from the file, locks of other users are left untouched
+        """
+        try:
+            self._release(stat)
+        finally:
+            self.lock_cache.invalidate(self._cache_user(), self._lock_key(stat))
+
+    @abstractmethod
+    def _acquire(self, stat):
+        pass
+
+    @abstractmethod
+    def _refresh(self, stat):
+        pass
+
+    @abstractmethod
+    def _release(self, stat):
         pass
 
     @abstractmethod
@@ -33,10 +87,17 @@ class LockBase(ABC):
         pass
 
     def get_current_user(self):
-        if self.user is None:
-            self.user = self.cs3_api.WhoAmI(request=cs3gw.WhoAmIRequest(token=self.auth.authenticate()),
-                                   metadata=[('x-access-token', self.auth.authenticate())])
-        return self.user.user
+        response = self.lock_cache.get_user(self._cache_user(), lambda: self.cs3_api.WhoAmI(
+            request=cs3gw.WhoAmIRequest(token=self.auth.authenticate()),
+            metadata=[('x-access-token', self.auth.authenticate())]))
+        return response.user
+
+    def _cache_user(self):
+        return self.config.reva_host, self.config.client_id
+
+    @staticmethod
+    def _lock_key(stat):
+        return stat['inode']['storage_id'], stat['inode']['opaque_id']
 
     def resolve_file_path(self, stat):
         if self.is_valid_external_lock(stat):
@@ -51,7 +112,7 @@ class LockBase(ABC):
 
     def _resolve_directory(self, dir_path,
                            endpoint):  # right now it's possible to write in somone else's directory without it being shared
-        stat = self.storage_api.stat(dir_path, endpoint)
+        stat = self.storage_api.stat(dir_path, endpoint, projection=StatProjection.EXISTS)
         if stat.status.code == cs3code.CODE_OK:
             return dir_path
         else:
@@ -2,7 +2,6 @@ import time
 
 from cs3api4lab.locks.base import LockBase
 from cs3api4lab.utils.file_utils import FileUtils
-from cs3api4lab.exception.exceptions import FileLockedError
 
 import cs3.storage.provider.v1beta1.provider_api_pb2 as storage_api
 import cs3.types.v1beta1.types_pb2 as cs3_types
@@ -18,21 +17,41 @@ class Cs3(LockBase):
     def __init__(self, log, config):
         super().__init__(log, config)
 
-    def set_lock(self, stat):
+    def _acquire(self, stat):
         ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
         lock = self._get_lock(ref)
         '''
         this if statement should be replaced with self.is_file_locked()  and set_lock
         function after the bug with setting/refreshing locks is resolved 
         '''
-        if not lock:
-            self._set_lock(ref)
-        elif self._is_lock_mine(lock):
-            self._refresh_lock(ref)
-        else:
-            raise FileLockedError("File %s is locked" % stat['filepath'])
+        if lock and not self._is_lock_mine(lock):
+            return False
+
+        try:
+            if not lock:
+                self._set_lock(ref)
+            else:
+                self._refresh_lock(ref)
+        finally:
+            # the lock was changed or the cached state was stale
+            self.lock_cache.invalidate(self._cache_user(), self._lock_key(stat))
+        return True
+
+    def _refresh(self, stat):
+        self.lock_cache.invalidate(self._cache_user(), self._lock_key(stat))
+        return self._acquire(stat)
+
+    def _release(self, stat):
+        ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
+        self.lock_cache.invalidate(self._cache_user(), self._lock_key(stat))
+        lock = self._get_lock(ref)
+        if lock and self._is_lock_mine(lock):
+            self._unlock(ref, json_format.ParseDict(lock, storage_resources.Lock()))
 
     def is_file_locked(self, stat):
+        if self.lock_cache.is_held(self._cache_user(), self._lock_key(stat)):
+            return False
+
         file_is_locked = True
 
         ref = FileUtils.get_reference(stat['inode']['opaque_id'], stat['inode']['storage_id'])
@@ -54,18 +73,27 @@ class Cs3(LockBase):
         return lock['user']['idp'] == user.id.idp and lock['user']['opaqueId'] == user.id.opaque_id
 
     def _get_lock(self, ref):
+        key = (ref.resource_id.storage_id, ref.resource_id.opaque_id)
+        lock = self.lock_cache.get_state(self._cache_user(), key)
+        if lock is not None:
+            return lock or None
+
         request = storage_api.GetLockRequest(ref=ref)
         lock_response = self.cs3_api.GetLock(request=request, metadata=[('x-access-token', self.auth.authenticate())])
         if lock_response.status.code == cs3code.CODE_OK:
-            return json_format.MessageToDict(lock_response.lock)
+            lock = json_format.MessageToDict(lock_response.lock)
         elif lock_response.status.code == cs3code.CODE_NOT_FOUND:
-            return None
+            lock = None
         else:
             raise IOError("Unable to get lock: %s" % str(lock_response))
 
+        self.lock_cache.set_state(self._cache_user(), key, lock)
+        return lock
+
     def _unlock(self, ref, lock):
         request = storage_api.UnlockRequest(ref=ref, lock=lock)
         unlock_response = self.cs3_api.Unlock(request=request, metadata=[('x-access-token', self.auth.authenticate())])
+        self.lock_cache.invalidate(self._cache_user(), (ref.resource_id.storage_id, ref.resource_id.opaque_id))
         if unlock_response.status.code != cs3code.CODE_OK:
             raise IOError("Unable to unlock: %s" % str(unlock_response))
 
@@ -87,7 +115,7 @@ class Cs3(LockBase):
         lock = storage_resources.Lock(
             lock_id=self.lock_name,
             type=storage_resources.LOCK_TYPE_WRITE,
-            user=id_res.UserId(idp=user.id.idp, opaque_id=user.id.opaque_id, type=user.type),
+            user=id_res.UserId(idp=user.id.idp, opaque_id=user.id.opaque_id, type=user.id.type),
             expiration=cs3_types.Timestamp(seconds=int(time.time() + self.config.locks_expiration_time))
         )
         request = storage_api.RefreshLockRequest(ref=ref, lock=lock)
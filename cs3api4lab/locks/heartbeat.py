@@ -0,0 +1,147 @@
+import threading
+import time
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+
+class _TrackedLock:
+
+    def __init__(self, lock_api, stat, now):
+        self.lock_api = lock_api
+        self.stat = stat
+        self.last_used = now
+        self.refreshed = now
+
+
+class LockHeartbeat:
+    """
+    Keeps the locks of the files open in JupyterLab alive. The locks of all the tracked files are refreshed
+    together by a single timer every lock_heartbeat_interval seconds, until the document is closed or the file
+    hasn't been read or saved for lock_heartbeat_max_idle seconds. While the last refresh of a lock succeeded,
+    reading and saving the file doesn't need any lock calls.
+    """
+    __heartbeat_instance = None
+    __heartbeat_lock = threading.Lock()
+
+    def __init__(self, log, interval, max_idle, expiration_time):
+        self.log = log
+        self.interval = interval
+        self.max_idle = max_idle
+        # a lock whose refresh failed is still valid until it expires, but the next beat may come too late
+        self.max_age = min(2 * interval, expiration_time)
+        self.files = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @classmethod
+    def get_heartbeat(cls, log=None):
+        if cls.__heartbeat_instance is None:
+            with cls.__heartbeat_lock:
+                if cls.__heartbeat_instance is None:
+                    config = Cs3ConfigManager.get_config()
+                    cls.__heartbeat_instance = LockHeartbeat(log, config.lock_heartbeat_interval,
+                                                             config.lock_heartbeat_max_idle,
+                                                             config.locks_expiration_time)
+        return cls.__heartbeat_instance
+
+    @classmethod
+    def clean(cls):
+        if cls.__heartbeat_instance is not None:
+            cls.__heartbeat_instance.stop()
+        cls.__heartbeat_instance = None
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def acquire(self, lock_api, stat):
+        """
+        Sets the lock of the current user on the file unless the heartbeat keeps it alive already,
+        and tracks the file. Raises FileLockedError if the file is locked by someone else.
+        """
+        if self.holds(lock_api, stat):
+            return
+        lock_api.set_lock(stat)
+        self.track(lock_api, stat)
+
+    def holds(self, lock_api, stat):
+        """
+        Returns True if the lock on the file is held by the current user and was refreshed recently
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self.files.get(self._key(lock_api, stat))
+            if entry is None or now - entry.refreshed >= self.max_age:
+                return False
+            entry.last_used = now
+            return True
+
+    def track(self, lock_api, stat):
+        """
+        Starts refreshing the lock on the file, the lock must be held by the current user
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self.files[self._key(lock_api, stat)] = _TrackedLock(lock_api, stat, now)
+            self._start()
+
+    def release(self, lock_api, stat):
+        """
+        Stops refreshing the lock on the file and releases it
+        """
+        with self._lock:
+            self.files.pop(self._key(lock_api, stat), None)
+        lock_api.release_lock(stat)
+
+    def stop(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self.files.clear()
+
+    def beat(self):
+        """
+        Refreshes the locks of all the tracked files and forgets the idle ones
+        """
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, entry in self.files.items() if now - entry.last_used >= self.max_idle]:
+                # the lock expires by itself
+                self.log.info('msg="Lock heartbeat stopped for idle file" filepath="%s"' % self.files[key].stat['filepath'])
+                del self.files[key]
+            entries = list(self.files.items())
+
+        for key, entry in entries:
+            try:
+                if entry.lock_api.refresh_lock(entry.stat):
+                    entry.refreshed = time.monotonic()
+                else:
+                    self.log.info('msg="Lock taken over by another user" filepath="%s"' % entry.stat['filepath'])
+                    with self._lock:
+                        if self.files.get(key) is entry:
+                            del self.files[key]
+            except Exception as e:
+                # the file is locked again on the next read or save
+                self.log.error('msg="Error refreshing lock" filepath="%s" reason="%s"' % (entry.stat['filepath'], e))
+
+    def _run(self):
+        try:
+            self.beat()
+        finally:
+            with self._lock:
+                self._timer = None
+                if self.files:
+                    self._start()
+
+    def _start(self):
+        if self._timer is None:
+            self._timer = threading.Timer(self.interval, self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @staticmethod
+    def _key(lock_api, stat):
+        return lock_api._cache_user(), stat['inode']['storage_id'], stat['inode']['opaque_id']
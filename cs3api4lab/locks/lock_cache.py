@@ -0,0 +1,65 @@
+import threading
+
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.ttl_cache import TTLCache
+
+
+class LockCache:
+    """
+    Process-wide cache shared by all lock API instances: the identity of the users (WhoAmI) and,
+    for lock_cache_ttl seconds, the lock state of the files and the locks held by the users.
+    A lock set or refreshed by the user isn't refreshed again until its cache entry expires.
+    """
+    __cache_instance = None
+
+    def __init__(self, ttl, max_size=4096):
+        self.enabled = ttl > 0
+        self.states = TTLCache(ttl, max_size if self.enabled else 0)
+        self.held = TTLCache(ttl, max_size if self.enabled else 0)
+        self.users = {}
+        self.users_lock = threading.Lock()
+
+    @classmethod
+    def get_cache(cls):
+        if cls.__cache_instance is None:
+            config = Cs3ConfigManager.get_config()
+            # a held lock must be refreshed well before it expires
+            cls.__cache_instance = LockCache(min(config.lock_cache_ttl, config.locks_expiration_time / 2))
+        return cls.__cache_instance
+
+    @classmethod
+    def clean(cls):
+        cls.__cache_instance = None
+
+    def get_user(self, user, fetch):
+        """
+        Returns the WhoAmI response of the user, fetch() is called once per user
+        """
+        with self.users_lock:
+            response = self.users.get(user)
+            if response is None:
+                response = fetch()
+                if response.status.code == cs3code.CODE_OK:
+                    self.users[user] = response
+            return response
+
+    def get_state(self, user, key):
+        """
+        Returns the cached lock of the file, {} if the file isn't locked and None if the state isn't cached
+        """
+        return self.states.get((user, key))
+
+    def set_state(self, user, key, lock):
+        self.states.set((user, key), lock or {})
+
+    def is_held(self, user, key):
+        return self.held.get((user, key)) is not None
+
+    def set_held(self, user, key):
+        self.held.set((user, key), True)
+
+    def invalidate(self, user, key):
+        self.states.pop((user, key))
+        self.held.pop((user, key))
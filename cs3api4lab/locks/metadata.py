@@ -4,7 +4,6 @@ import datetime
 import urllib.parse
 
 from cs3api4lab.locks.base import LockBase
-from cs3api4lab.exception.exceptions import FileLockedError
 
 
 class Metadata(LockBase):
@@ -14,11 +13,27 @@ class Metadata(LockBase):
         self.log = log
         self.locks_expiration_time = self.config.locks_expiration_time
 
-    def set_lock(self, stat):
-        if not self.is_file_locked(stat):
-            self.storage_api.set_metadata(self.lock_name, self._generate_lock_entry(), stat)
-        else:
-            raise FileLockedError("File %s is locked" % stat['filepath'])
+    @property
+    def stat_metadata_keys(self):
+        return [self.lock_name]
+
+    def _acquire(self, stat):
+        if self.is_file_locked(stat):
+            return False
+        self.storage_api.set_metadata(self.lock_name, self._generate_lock_entry(), stat)
+        return True
+
+    def _refresh(self, stat):
+        lock = self._get_stored_lock(stat)
+        if lock and not self._is_lock_mine(lock) and not self._is_lock_expired(lock):
+            return False
+        self.storage_api.set_metadata(self.lock_name, self._generate_lock_entry(), stat)
+        return True
+
+    def _release(self, stat):
+        lock = self._get_stored_lock(stat)
+        if lock and self._is_lock_mine(lock):
+            self.storage_api.unset_metadata(self.lock_name, stat)
 
     def is_file_locked(self, stat):
         file_is_locked = True
@@ -66,4 +81,12 @@ class Metadata(LockBase):
             return None
 
         lock = stat['arbitrary_metadata']['metadata'].get(self.lock_name)
-        return json.loads(urllib.parse.unquote(lock))
\ No newline at end of file
+        return json.loads(urllib.parse.unquote(lock))
+
+    def _get_stored_lock(self, stat):
+        # the lock in the stat may be outdated
+        metadata = self.storage_api.get_metadata(urllib.parse.unquote(stat['inode']['opaque_id']),
+                                                 urllib.parse.unquote(stat['inode']['storage_id']), [self.lock_name])
+        if not metadata or not metadata.get(self.lock_name):
+            return None
+        return json.loads(urllib.parse.unquote(metadata.get(self.lock_name)))
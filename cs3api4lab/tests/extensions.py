@@ -27,7 +27,7 @@ class ExtStorageApi(StorageApi):
         self.auth = ExtAuthenticator(config, log)
         channel = grpc.insecure_channel(config.reva_host)
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
 
 class ExtMetadataLock(Metadata):
@@ -37,7 +37,7 @@ class ExtMetadataLock(Metadata):
         self.auth = ExtAuthenticator(config, log)
         channel = grpc.insecure_channel(config.reva_host)
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
         self.user_api = ExtUserApi(log, config)
         self.storage_api = ExtStorageApi(log, config)
@@ -63,7 +63,7 @@ class ExtLock(Metadata):
         self.storage_api = ExtStorageApi(log, config)
         channel = grpc.insecure_channel(config.reva_host)
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = cs3gw_grpc.GatewayAPIStub(intercept_channel)
 
 
@@ -103,7 +103,7 @@ class ExtCs3OcmShareApi(Cs3OcmShareApi):
         self.auth.cs3_stub = cs3gw_grpc.GatewayAPIStub(channel)
         self.file_api = Cs3FileApi(log)
         auth_interceptor = check_auth_interceptor.CheckAuthInterceptor(log, self.auth)
-        intercept_channel = grpc.intercept_channel(channel, auth_interceptor)
+        intercept_channel = auth_interceptor.intercept_channel(channel)
         self.cs3_api = grpc_gateway.GatewayAPIStub(intercept_channel)
         self.ocm_share_api = ocm_api_grpc.OcmAPIStub(channel)
         self.provider_api = ocm_provider_api_grpc.ProviderAPIStub(channel)
@@ -0,0 +1,130 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.async_cs3apismanager import AsyncCS3APIsManager
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.service_registry import ServiceRegistry
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.tests.test_contents_etag import DataGateway
+
+
+class TestAsyncCS3APIsManager(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = Cs3ConfigManager.get_config()
+        self.endpoint = self.config.endpoint
+        self.file_api = Cs3FileApi(self.log)
+        self.contents_manager = AsyncCS3APIsManager(None, self.log)
+
+    def test_get_text_file(self):
+        file_id = "/home/test_async_get_text_file.txt"
+        message = "Lorem ipsum dolor sit amet..."
+        try:
+            self.file_api.write_file(file_id, message, self.endpoint)
+            model = asyncio.run(self.contents_manager.get(file_id, True, 'file'))
+            self.assertEqual(model["path"], file_id)
+            self.assertEqual(model["content"], message)
+            self.assertEqual(model["format"], "text")
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+    def test_concurrent_get(self):
+        file_ids = ["/home/test_async_concurrent_get_%d.txt" % i for i in range(8)]
+        try:
+            for file_id in file_ids:
+                self.file_api.write_file(file_id, file_id, self.endpoint)
+
+            async def get_all():
+                return await asyncio.gather(*[self.contents_manager.get(file_id, True, 'file')
+                                              for file_id in file_ids])
+
+            models = asyncio.run(get_all())
+            self.assertEqual([model["content"] for model in models], file_ids)
+        finally:
+            for file_id in file_ids:
+                self.file_api.remove(file_id, self.endpoint)
+
+    def test_save_and_get_notebook(self):
+        file_id = "/home/test_async_notebook.ipynb"
+        try:
+            model = asyncio.run(self.contents_manager.new(path=file_id))
+            self.assertEqual(model["type"], "notebook")
+            model = asyncio.run(self.contents_manager.get(file_id, True, 'notebook'))
+            self.assertEqual(model["format"], "json")
+            self.assertEqual(model["content"]["nbformat"], 4)
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+
+class BlockingGateway(DataGateway):
+    """
+    Downloads waiting until the test releases them, counting the downloads waiting at the same time
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.waiting = 0
+        self.released = []
+        self.lock = threading.Lock()
+
+    def read_file(self, stat, endpoint=None):
+        with self.lock:
+            self.waiting += 1
+        self.released.append(self.release.wait(5))
+        return super().read_file(stat, endpoint)
+
+
+class TestAsyncCS3APIsManagerLoops(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = BlockingGateway()
+        self.gateway.add('/home/file.txt', '"file-1"', b'content')
+        ServiceRegistry.clean()
+        registry = ServiceRegistry.get_registry(self.log)
+        for service_class in (Cs3FileApi, StorageApi, ShareAPIFacade, LockApiFactory):
+            registry.get(service_class, lambda: self.gateway)
+        self.contents_manager = AsyncCS3APIsManager(None, self.log)
+
+    def tearDown(self):
+        ServiceRegistry.clean()
+
+    def test_consecutive_event_loops(self):
+        # every asyncio.run() closes its loop, the next call must not use it
+        for _ in range(2):
+            self.assertTrue(asyncio.run(self.contents_manager.file_exists('/home/file.txt')))
+
+    def test_call_on_loop_of_the_call(self):
+        async def call_on_loop():
+            worker = self.contents_manager._manager
+            return await self.contents_manager._run(worker._call_on_loop, threading.get_ident)
+
+        for _ in range(2):
+            self.assertEqual(asyncio.run(call_on_loop()), threading.get_ident())
+
+    def test_concurrent_get_not_blocking_loop(self):
+        file_ids = ['/home/file%d.txt' % i for i in range(4)]
+        for file_id in file_ids:
+            self.gateway.add(file_id, '"%s"' % file_id, file_id.encode())
+
+        async def get_all():
+            gets = asyncio.gather(*[self.contents_manager.get(file_id, True, 'file') for file_id in file_ids])
+            # the loop keeps running while all the downloads wait
+            for _ in range(500):
+                if self.gateway.waiting == len(file_ids):
+                    break
+                await asyncio.sleep(0.01)
+            self.gateway.release.set()
+            return await gets
+
+        models = asyncio.run(get_all())
+        self.assertEqual([model['content'] for model in models], file_ids)
+        self.assertEqual(self.gateway.released, [True] * len(file_ids))
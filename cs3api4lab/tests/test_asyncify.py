@@ -0,0 +1,31 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+import nest_asyncio
+
+from cs3api4lab.utils.asyncify import asyncify
+
+
+class TestAsyncify(TestCase):
+
+    @asyncify
+    def _thread(self, value):
+        return threading.get_ident(), value
+
+    def test_called_directly_without_event_loop(self):
+        self.assertEqual(self._thread('value'), (threading.get_ident(), 'value'))
+
+    def test_run_in_executor_with_event_loop(self):
+        # a blocking call made on the event loop of the server is run in the executor of the loop
+        async def call():
+            return self._thread('value')
+
+        loop = asyncio.new_event_loop()
+        try:
+            nest_asyncio.apply(loop)
+            thread, value = loop.run_until_complete(call())
+        finally:
+            loop.close()
+        self.assertNotEqual(thread, threading.get_ident())
+        self.assertEqual(value, 'value')
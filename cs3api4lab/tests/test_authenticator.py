@@ -1,18 +1,58 @@
 from datetime import datetime
 import os
+import threading
+import time
+from concurrent import futures
 from pathlib import Path
 from unittest import TestCase, skip
 from collections import namedtuple
 
+import grpc
 import jwt
+import cs3.gateway.v1beta1.gateway_api_pb2 as cs3gw
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
 from tornado import web
 from traitlets.config import LoggingConfigurable
 
-from cs3api4lab.auth.authenticator import Auth
+from cs3api4lab.auth.authenticator import Auth, Authenticator
 from cs3api4lab.auth.reva_password import RevaPassword
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 
 
+class CountingAuthenticator(Authenticator):
+
+    def __init__(self, config, log, validity):
+        super().__init__(config, log)
+        self.validity = validity
+        self.refresh_count = 0
+
+    def refresh_token(self):
+        self.refresh_count += 1
+        now = datetime.timestamp(datetime.now())
+        self.token = jwt.encode(payload={'exp': now + self.validity, 'iat': now, 'n': self.refresh_count},
+                                key="Pive-Fumkiu4")
+
+
+class StubGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway answering Authenticate requests slowly, so that concurrent callers overlap
+    """
+
+    def __init__(self):
+        self.authenticate_count = 0
+        self.lock = threading.Lock()
+
+    def Authenticate(self, request, context):
+        with self.lock:
+            self.authenticate_count += 1
+        time.sleep(0.2)
+        now = datetime.timestamp(datetime.now())
+        token = jwt.encode(payload={'exp': now + 3600, 'iat': now, 'client_id': request.client_id}, key="Pive-Fumkiu4")
+        return cs3gw.AuthenticateResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), token=token)
+
+
 class TestAuthenticator(TestCase):
 
     def setUp(self) -> None:
@@ -126,6 +166,62 @@ class TestAuthenticator(TestCase):
             token_authenticator = Auth.get_authenticator(token_config, log=self.log)
             token_authenticator.authenticate()
 
+    def test_token_expiry_is_decoded_once(self):
+        authenticator = CountingAuthenticator(Cs3ConfigManager.get_config(), self.log, validity=3600)
+        token = authenticator.authenticate()
+        for _ in range(100):
+            self.assertEqual(authenticator.authenticate(), token)
+        self.assertEqual(authenticator.refresh_count, 1)
+        authenticator.cancel_refresh()
+
+    def test_expired_token_is_refreshed(self):
+        authenticator = CountingAuthenticator(Cs3ConfigManager.get_config(), self.log, validity=-10)
+        authenticator.authenticate()
+        authenticator.authenticate()
+        self.assertEqual(authenticator.refresh_count, 2)
+
+    def test_background_refresh(self):
+        config = Cs3ConfigManager.get_config()
+        config.auth_refresh_margin = 1
+        try:
+            authenticator = CountingAuthenticator(config, self.log, validity=1.5)
+            authenticator.authenticate()
+            time.sleep(0.8)
+            self.assertEqual(authenticator.refresh_count, 2)
+            authenticator.cancel_refresh()
+        finally:
+            Cs3ConfigManager.clean()
+
+    def test_single_flight_refresh(self):
+        gateway = StubGateway()
+        server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(gateway, server)
+        port = server.add_insecure_port('localhost:0')
+        server.start()
+        try:
+            authenticator = RevaPassword(Cs3ConfigManager.get_config(), self.log)
+            authenticator.cs3_stub = cs3gw_grpc.GatewayAPIStub(grpc.insecure_channel('localhost:%d' % port))
+
+            tokens = []
+            barrier = threading.Barrier(32)
+
+            def authenticate():
+                barrier.wait()
+                tokens.append(authenticator.authenticate())
+
+            threads = [threading.Thread(target=authenticate) for _ in range(32)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(gateway.authenticate_count, 1)
+            self.assertEqual(len(tokens), 32)
+            self.assertEqual(len(set(tokens)), 1)
+            authenticator.cancel_refresh()
+        finally:
+            server.stop(None)
+
     @staticmethod
     def _create_oauth_token():
         now = datetime.timestamp(datetime.now())
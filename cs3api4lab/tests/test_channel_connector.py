@@ -0,0 +1,89 @@
+import threading
+from collections import namedtuple
+from concurrent import futures
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.channel_connector import Channel, ChannelPool
+
+
+class PeerGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway recording the connections the calls come from
+    """
+
+    def __init__(self):
+        self.peers = set()
+        self.lock = threading.Lock()
+
+    def GetHome(self, request, context):
+        with self.lock:
+            self.peers.add(context.peer())
+        return cs3sp.GetHomeResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), path='/home' * 1000)
+
+
+ChannelConfig = namedtuple('ChannelConfig', ['reva_host', 'secure_channel', 'grpc_keepalive_time_ms',
+                                             'grpc_keepalive_timeout_ms', 'grpc_max_send_message_length',
+                                             'grpc_max_receive_message_length', 'grpc_compression',
+                                             'grpc_channel_pool_size'])
+
+
+class TestChannelConnector(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = PeerGateway()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        self.port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop(None)
+
+    def _config(self, pool_size=1, compression='gzip', max_receive_message_length=104857600):
+        return ChannelConfig('localhost:%d' % self.port, False, 300000, 10000, 104857600,
+                             max_receive_message_length, compression, pool_size)
+
+    def test_pool_uses_separate_connections(self):
+        channel = Channel(self._config(pool_size=3)).channel
+        stub = cs3gw_grpc.GatewayAPIStub(channel)
+
+        for _ in range(6):
+            self.assertEqual(stub.GetHome(cs3sp.GetHomeRequest()).status.code, cs3code.CODE_OK)
+        self.assertEqual(stub.GetHome.future(cs3sp.GetHomeRequest()).result().status.code, cs3code.CODE_OK)
+
+        self.assertEqual(len(self.gateway.peers), 3)
+        channel.close()
+
+    def test_single_channel(self):
+        channel = Channel(self._config()).channel
+        stub = cs3gw_grpc.GatewayAPIStub(channel)
+
+        for _ in range(3):
+            stub.GetHome(cs3sp.GetHomeRequest())
+
+        self.assertNotIsInstance(channel, ChannelPool)
+        self.assertEqual(len(self.gateway.peers), 1)
+        channel.close()
+
+    def test_max_receive_message_length(self):
+        channel = Channel(self._config(max_receive_message_length=1024)).channel
+        stub = cs3gw_grpc.GatewayAPIStub(channel)
+
+        with self.assertRaises(grpc.RpcError) as context:
+            stub.GetHome(cs3sp.GetHomeRequest())
+        self.assertEqual(context.exception.code(), grpc.StatusCode.RESOURCE_EXHAUSTED)
+        channel.close()
+
+    def test_unknown_compression(self):
+        channel = Channel(self._config())
+        self.assertEqual(channel.get_compression(self._config(compression='brotli')),
+                         grpc.Compression.NoCompression)
+        self.assertEqual(channel.get_compression(self._config(compression='GZIP')), grpc.Compression.Gzip)
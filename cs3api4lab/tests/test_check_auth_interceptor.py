@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from concurrent import futures
+from datetime import datetime
+from unittest import TestCase
+
+import grpc
+import jwt
+import cs3.gateway.v1beta1.gateway_api_pb2 as cs3gw
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.auth.check_auth_interceptor import AioCheckAuthInterceptor, CheckAuthInterceptor, _ClientCallDetails
+from cs3api4lab.auth.reva_password import RevaPassword
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+
+
+class RevokingGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway rejecting the tokens listed in revoked_tokens
+    """
+
+    def __init__(self):
+        self.authenticate_count = 0
+        self.revoked_tokens = set()
+        self.lock = threading.Lock()
+
+    def Authenticate(self, request, context):
+        with self.lock:
+            self.authenticate_count += 1
+            count = self.authenticate_count
+        now = datetime.timestamp(datetime.now())
+        token = jwt.encode(payload={'exp': now + 3600, 'iat': now, 'n': count}, key="Pive-Fumkiu4")
+        return cs3gw.AuthenticateResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), token=token)
+
+    def ListContainerStream(self, request, context):
+        token = dict(context.invocation_metadata()).get('x-access-token')
+        if token in self.revoked_tokens:
+            yield cs3sp.ListContainerStreamResponse(status=cs3rpc.Status(code=cs3code.CODE_UNAUTHENTICATED))
+            return
+        for name in ('a', 'b'):
+            yield cs3sp.ListContainerStreamResponse(status=cs3rpc.Status(code=cs3code.CODE_OK),
+                                                    info={'path': '/home/' + name})
+
+    def GetHome(self, request, context):
+        token = dict(context.invocation_metadata()).get('x-access-token')
+        if token in self.revoked_tokens:
+            return cs3sp.GetHomeResponse(status=cs3rpc.Status(code=cs3code.CODE_UNAUTHENTICATED))
+        time.sleep(0.1)
+        return cs3sp.GetHomeResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), path='/home')
+
+
+class TestCheckAuthInterceptor(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = RevokingGateway()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        port = self.server.add_insecure_port('localhost:0')
+        self.server.start()
+
+        channel = grpc.insecure_channel('localhost:%d' % port)
+        self.authenticator = RevaPassword(Cs3ConfigManager.get_config(), self.log)
+        self.authenticator.cs3_stub = cs3gw_grpc.GatewayAPIStub(channel)
+        self.interceptor = CheckAuthInterceptor(self.log, self.authenticator)
+        self.stub = cs3gw_grpc.GatewayAPIStub(self.interceptor.intercept_channel(channel))
+        self.address = 'localhost:%d' % port
+
+    def tearDown(self):
+        self.authenticator.cancel_refresh()
+        self.server.stop(None)
+
+    def _get_home(self):
+        return self.stub.GetHome(cs3sp.GetHomeRequest(),
+                                 metadata=[('x-access-token', self.authenticator.authenticate())])
+
+    def test_retry_with_refreshed_token(self):
+        self.gateway.revoked_tokens.add(self.authenticator.authenticate())
+
+        response = self._get_home()
+
+        self.assertEqual(response.status.code, cs3code.CODE_OK)
+        self.assertEqual(self.gateway.authenticate_count, 2)
+
+    def test_future_does_not_block(self):
+        token = self.authenticator.authenticate()
+
+        start = time.time()
+        calls = [self.stub.GetHome.future(cs3sp.GetHomeRequest(), metadata=[('x-access-token', token)])
+                 for _ in range(5)]
+        self.assertLess(time.time() - start, 0.1)
+
+        self.assertTrue(all(call.result().path == '/home' for call in calls))
+
+    def test_rejected_future_invalidates_token(self):
+        token = self.authenticator.authenticate()
+        self.gateway.revoked_tokens.add(token)
+
+        call = self.stub.GetHome.future(cs3sp.GetHomeRequest(), metadata=[('x-access-token', token)])
+        self.assertEqual(call.result().status.code, cs3code.CODE_UNAUTHENTICATED)
+        time.sleep(0.1)
+
+        self.assertNotEqual(self.authenticator.authenticate(), token)
+        self.assertEqual(self.gateway.authenticate_count, 2)
+
+    def test_completed_future_not_retried(self):
+        token = self.authenticator.authenticate()
+        self.gateway.revoked_tokens.add(token)
+
+        def continuation(client_call_details, request):
+            # the future has completed by the time the interceptor gets it
+            call = self.authenticator.cs3_stub.GetHome.future(request, metadata=client_call_details.metadata)
+            call.result()
+            return call
+
+        details = _ClientCallDetails('/cs3.gateway.v1beta1.GatewayAPI/GetHome', None,
+                                     [('x-access-token', token)], None, None, None)
+        # marked like the channel of the interceptor marks calls made with .future()
+        self.interceptor._future_calls.active = True
+        try:
+            call = self.interceptor.intercept_unary_unary(continuation, details, cs3sp.GetHomeRequest())
+        finally:
+            self.interceptor._future_calls.active = False
+
+        self.assertEqual(call.result().status.code, cs3code.CODE_UNAUTHENTICATED)
+        self.assertEqual(self.gateway.authenticate_count, 1)
+        self.assertNotEqual(self.authenticator.authenticate(), token)
+
+    def test_blocking_call_after_future_retried(self):
+        token = self.authenticator.authenticate()
+        self.stub.GetHome.future(cs3sp.GetHomeRequest(), metadata=[('x-access-token', token)]).result()
+        self.gateway.revoked_tokens.add(token)
+
+        self.assertEqual(self._get_home().status.code, cs3code.CODE_OK)
+
+    def test_rejected_stream_invalidates_token(self):
+        token = self.authenticator.authenticate()
+        stream = self.stub.ListContainerStream(cs3sp.ListContainerStreamRequest(),
+                                               metadata=[('x-access-token', token)])
+        self.assertEqual([response.info.path for response in stream], ['/home/a', '/home/b'])
+        self.assertEqual(self.authenticator.authenticate(), token)
+
+        self.gateway.revoked_tokens.add(token)
+        stream = self.stub.ListContainerStream(cs3sp.ListContainerStreamRequest(),
+                                               metadata=[('x-access-token', token)])
+        self.assertEqual(next(stream).status.code, cs3code.CODE_UNAUTHENTICATED)
+        stream.cancel()
+        self.assertNotEqual(self.authenticator.authenticate(), token)
+
+    def test_aio_retry_with_refreshed_token(self):
+        self.gateway.revoked_tokens.add(self.authenticator.authenticate())
+
+        async def get_home():
+            interceptor = AioCheckAuthInterceptor(self.log, self.authenticator)
+            async with grpc.aio.insecure_channel(self.address, interceptors=[interceptor]) as channel:
+                return await cs3gw_grpc.GatewayAPIStub(channel).GetHome(
+                    cs3sp.GetHomeRequest(), metadata=[('x-access-token', self.authenticator.authenticate())])
+
+        response = asyncio.run(get_home())
+
+        self.assertEqual(response.status.code, cs3code.CODE_OK)
+        self.assertEqual(self.gateway.authenticate_count, 2)
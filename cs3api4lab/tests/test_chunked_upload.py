@@ -0,0 +1,120 @@
+import threading
+from base64 import b64encode
+from unittest import TestCase
+
+from tornado import web
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.cs3apismanager import CS3APIsManager
+from cs3api4lab.api.service_registry import ServiceRegistry
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.locks.factory import LockApiFactory
+from cs3api4lab.tests.test_contents_etag import DataGateway
+
+
+class UploadGateway(DataGateway):
+    """
+    Records the uploaded files, an upload of a path in blocked_paths waits until the test releases it
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.uploads = {}
+        self.blocked_paths = {}
+
+    def write_file(self, file_path, content, endpoint=None, format=None, content_size=None):
+        data = content.read()
+        blocked = self.blocked_paths.get(file_path)
+        if blocked is not None:
+            blocked['writing'].set()
+            blocked['release'].wait(5)
+            raise IOError('upload failed')
+        self.uploads[file_path] = data
+
+
+class TestChunkedUpload(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = UploadGateway()
+        ServiceRegistry.clean()
+        registry = ServiceRegistry.get_registry(self.log)
+        for service_class in (Cs3FileApi, StorageApi, ShareAPIFacade, LockApiFactory):
+            registry.get(service_class, lambda: self.gateway)
+        self.contents_manager = CS3APIsManager(None, self.log)
+
+    def tearDown(self):
+        ServiceRegistry.clean()
+
+    def _save_chunk(self, path, data, chunk):
+        self.contents_manager._save_chunk(path, b64encode(data).decode('ascii'), 'base64', chunk)
+
+    def test_chunks_uploaded_once(self):
+        self._save_chunk('/home/file.bin', b'first ', 1)
+        self._save_chunk('/home/file.bin', b'second ', 2)
+        self._save_chunk('/home/file.bin', b'last', -1)
+
+        self.assertEqual(self.gateway.uploads, {'/home/file.bin': b'first second last'})
+        self.assertEqual(self.contents_manager._chunked_uploads, {})
+
+    def test_failed_upload_keeps_newer_upload(self):
+        blocked = {'writing': threading.Event(), 'release': threading.Event()}
+        self.gateway.blocked_paths['/home/file.bin'] = blocked
+        self._save_chunk('/home/file.bin', b'old ', 1)
+
+        errors = []
+
+        def finish_old_upload():
+            try:
+                self._save_chunk('/home/file.bin', b'upload', -1)
+            except web.HTTPError as e:
+                errors.append(e.status_code)
+
+        thread = threading.Thread(target=finish_old_upload)
+        thread.start()
+        self.assertTrue(blocked['writing'].wait(5))
+
+        # the file is uploaded again while the upload of the previous one fails
+        self._save_chunk('/home/file.bin', b'new ', 1)
+        blocked['release'].set()
+        thread.join(5)
+        self.assertEqual(errors, [400])
+
+        del self.gateway.blocked_paths['/home/file.bin']
+        self._save_chunk('/home/file.bin', b'upload', -1)
+        self.assertEqual(self.gateway.uploads, {'/home/file.bin': b'new upload'})
+
+    def test_unexpected_chunk_rejected(self):
+        self._save_chunk('/home/file.bin', b'first ', 1)
+        self._save_chunk('/home/file.bin', b'second ', 2)
+
+        # a late chunk of a previous upload doesn't end up in the file
+        with self.assertRaises(web.HTTPError) as context:
+            self._save_chunk('/home/file.bin', b'stale ', 2)
+        self.assertEqual(context.exception.status_code, 400)
+
+        self._save_chunk('/home/file.bin', b'last', -1)
+        self.assertEqual(self.gateway.uploads, {'/home/file.bin': b'first second last'})
+
+    def test_stale_upload_discarded(self):
+        self._save_chunk('/home/stale.bin', b'first ', 1)
+        staged_file = self.contents_manager._chunked_uploads['/home/stale.bin']['file']
+        self.contents_manager._chunked_uploads['/home/stale.bin']['updated'] = 0
+
+        self._save_chunk('/home/file.bin', b'first ', 1)
+
+        self.assertNotIn('/home/stale.bin', self.contents_manager._chunked_uploads)
+        self.assertTrue(staged_file.closed)
+
+    def test_upload_being_written_not_swept(self):
+        self._save_chunk('/home/file.bin', b'first ', 1)
+        upload = self.contents_manager._chunked_uploads['/home/file.bin']
+        upload['updated'] = 0
+
+        with upload['lock']:
+            # a chunk is being appended while another upload sweeps the stale ones
+            self._save_chunk('/home/other.bin', b'first ', 1)
+            self.assertIs(self.contents_manager._chunked_uploads['/home/file.bin'], upload)
+            self.assertFalse(upload['file'].closed)
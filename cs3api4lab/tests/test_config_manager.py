@@ -31,6 +31,9 @@ class TestCS3ConfigManager(TestCase):
 
     @classmethod
     def tearDownClass(cls):
+        # the environment variables would be picked up by the config of the tests run after these
+        for env in [env for env in os.environ if env.startswith('CS3_')]:
+            del os.environ[env]
         Cs3ConfigManager.clean()
 
     def setUp(self):
@@ -0,0 +1,369 @@
+import http.server
+import posixpath
+import re
+import threading
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+
+import grpc
+import requests
+import cs3.gateway.v1beta1.gateway_api_pb2 as gateway_pb2
+import cs3.gateway.v1beta1.resources_pb2 as gateway_resources
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+from jupyter_server.auth import AllowAllAuthorizer
+from tornado import web
+from tornado.testing import AsyncHTTPTestCase
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.cs3apismanager import CS3APIsManager
+from cs3api4lab.api.service_registry import ServiceRegistry
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+from cs3api4lab.api.stat_cache import StatCache
+from cs3api4lab.api.stat_result import StatResult
+from cs3api4lab.api.storage_api import StorageApi
+from cs3api4lab.handlers import ContentsEtagHandler, contents_regex
+from cs3api4lab.locks.factory import LockApiFactory
+
+
+class DataGateway:
+    """
+    Files and directories in memory, counting the downloads and the directory listings
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.infos = {}
+        self.contents = {}
+        self.locked = False
+
+    def add(self, path, etag, content=None):
+        info = storage_provider.ResourceInfo(path=path, etag=etag, size=len(content or b''),
+                                             type=storage_provider.RESOURCE_TYPE_FILE if content is not None
+                                             else storage_provider.RESOURCE_TYPE_CONTAINER)
+        info.id.storage_id = 'storage-id'
+        info.id.opaque_id = path
+        info.mtime.seconds = 1660000000
+        info.permission_set.CopyFrom(storage_provider.ResourcePermissions(
+            get_path=True, initiate_file_download=True, list_container=True, stat=True, create_container=True,
+            delete=True, initiate_file_upload=True, restore_file_version=True, move=True))
+        self.infos[path] = info
+        self.contents[path] = content
+
+    # Cs3FileApi
+    def stat_file_info(self, file_path, endpoint='/', cached=True):
+        if file_path not in self.infos:
+            raise FileNotFoundError(file_path)
+        return StatResult(self.infos[file_path])
+
+    def lock_for_read(self, stat):
+        self.calls['lock'] += 1
+        return stat
+
+    def read_file(self, stat, endpoint=None):
+        self.lock_for_read(stat)
+        self.calls['download'] += 1
+        yield self.contents[stat['filepath']]
+
+    def read_directory(self, path, endpoint=None):
+        self.calls['list'] += 1
+        return [info for info_path, info in self.infos.items() if info_path.startswith(path)]
+
+    # StorageApi
+    def stat(self, file_path, endpoint='/', cached=True, projection=None, metadata_keys=None):
+        if file_path not in self.infos:
+            return cs3sp.StatResponse(status={'code': cs3code.CODE_NOT_FOUND})
+        return cs3sp.StatResponse(status={'code': cs3code.CODE_OK}, info=self.infos[file_path])
+
+    # ShareAPIFacade
+    def get_share_received_role(self, path, resource_id=None):
+        return None
+
+    # lock API
+    def is_file_locked(self, stat):
+        self.calls['is_file_locked'] += 1
+        return self.locked
+
+
+class TestContentsEtag(AsyncHTTPTestCase):
+
+    def get_app(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = DataGateway()
+        self.gateway.add('/home/dir', '"dir-1"')
+        self.gateway.add('/home/dir/file.txt', '"file-1"', b'Lorem ipsum dolor sit amet...')
+
+        ServiceRegistry.clean()
+        registry = ServiceRegistry.get_registry(self.log)
+        for service_class in (Cs3FileApi, StorageApi, ShareAPIFacade, LockApiFactory):
+            registry.get(service_class, lambda: self.gateway)
+
+        contents_manager = CS3APIsManager(None, self.log)
+        return web.Application([(contents_regex, ContentsEtagHandler)],
+                               contents_manager=contents_manager, authorizer=AllowAllAuthorizer(), base_url='/')
+
+    def tearDown(self):
+        ServiceRegistry.clean()
+        super().tearDown()
+
+    def _get(self, path, etag=None):
+        return self.fetch('/api/contents' + path, headers={'If-None-Match': etag} if etag else {})
+
+    def test_unchanged_file_not_downloaded(self):
+        response = self._get('/home/dir/file.txt?type=file&format=text')
+        self.assertEqual(response.code, 200)
+        self.assertIn(b'Lorem ipsum', response.body)
+
+        etag = response.headers['Etag']
+        response = self._get('/home/dir/file.txt?type=file&format=text', etag)
+        self.assertEqual(response.code, 304)
+        self.assertEqual(response.headers['Etag'], etag)
+        self.assertEqual(response.body, b'')
+        self.assertEqual(self.gateway.calls['download'], 1)
+
+    def test_not_modified_file_locked(self):
+        etag = self._get('/home/dir/file.txt?type=file').headers['Etag']
+        self.gateway.calls.clear()
+
+        # reopening a file after its lock was released locks it again, the 304 keeps the model writable
+        self.assertEqual(self._get('/home/dir/file.txt?type=file', etag).code, 304)
+        self.assertEqual(self.gateway.calls, Counter({'lock': 1, 'is_file_locked': 1}))
+
+        # the model without content doesn't lock the file
+        self.gateway.calls.clear()
+        self._get('/home/dir/file.txt?type=file&content=0')
+        self.assertNotIn('lock', self.gateway.calls)
+
+    def test_changed_file_downloaded(self):
+        etag = self._get('/home/dir/file.txt?type=file').headers['Etag']
+
+        self.gateway.add('/home/dir/file.txt', '"file-2"', b'Changed content')
+        response = self._get('/home/dir/file.txt?type=file', etag)
+        self.assertEqual(response.code, 200)
+        self.assertIn(b'Changed content', response.body)
+        self.assertNotEqual(response.headers['Etag'], etag)
+        self.assertEqual(self.gateway.calls['download'], 2)
+
+    def test_etag_of_representation(self):
+        etag = self._get('/home/dir/file.txt?type=file').headers['Etag']
+
+        # the model without content and the read-only model of a locked file are different models
+        self.assertEqual(self._get('/home/dir/file.txt?type=file&content=0', etag).code, 200)
+        self.gateway.locked = True
+        self.assertEqual(self._get('/home/dir/file.txt?type=file', etag).code, 200)
+
+    def test_unchanged_directory_not_listed(self):
+        etag = self._get('/home/dir?type=directory').headers['Etag']
+
+        self.assertEqual(self._get('/home/dir?type=directory', etag).code, 304)
+        self.assertEqual(self.gateway.calls, Counter({'list': 1}))
+
+    def test_directory_without_content_not_listed(self):
+        response = self._get('/home/dir?type=directory&content=0')
+        self.assertEqual(response.code, 200)
+        self.assertIn(b'"type": "directory"', response.body)
+        self.assertEqual(self.gateway.calls, Counter())
+
+    def test_invalid_arguments_rejected(self):
+        self.assertEqual(self._get('/home/dir/file.txt?type=folder').code, 400)
+        self.assertEqual(self._get('/home/dir/file.txt?content=2').code, 400)
+        self.assertEqual(self.gateway.calls, Counter())
+
+    def test_checkpoints_and_trust_routes_not_matched(self):
+        self.assertTrue(re.fullmatch(contents_regex, '/api/contents/home/dir/file.txt'))
+        self.assertTrue(re.fullmatch(contents_regex, '/api/contents/home/checkpoints.txt'))
+        for route in ('/api/contents/home/nb.ipynb/checkpoints', '/api/contents/home/nb.ipynb/checkpoints/checkpoint',
+                      '/api/contents/home/nb.ipynb/trust'):
+            self.assertIsNone(re.fullmatch(contents_regex, route), route)
+
+
+class DataServer(http.server.BaseHTTPRequestHandler):
+    """
+    Data gateway of TreeGateway, serving the file named by the transfer token and counting the downloads
+    """
+
+    def do_GET(self):
+        gateway = self.server.gateway
+        with gateway.lock:
+            gateway.calls['GET'] += 1
+        data = gateway.contents[self.headers['X-Reva-Transfer']]
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TreeGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway keeping a tree in memory, like Reva the etag of a directory changes with its content
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.infos = {}
+        self.contents = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self.data_server = http.server.ThreadingHTTPServer(('localhost', 0), DataServer)
+        self.data_server.gateway = self
+        self.data_url = 'http://localhost:%d/data' % self.data_server.server_address[1]
+
+    def add(self, path, resource_type=storage_provider.RESOURCE_TYPE_FILE, content=b''):
+        info = storage_provider.ResourceInfo(path=path, type=resource_type, size=len(content))
+        info.id.storage_id = 'storage-id'
+        info.id.opaque_id = path
+        self.infos[path] = info
+        self.contents[path] = content
+        self._changed(path)
+
+    def _changed(self, path):
+        while True:
+            self.version += 1
+            if path in self.infos:
+                self.infos[path].etag = '"%d"' % self.version
+            if path == '/':
+                return
+            path = posixpath.dirname(path)
+
+    def Stat(self, request, context):
+        with self.lock:
+            self.calls['Stat'] += 1
+        info = self.infos.get(request.ref.path)
+        if info is None:
+            return cs3sp.StatResponse(status=cs3rpc.Status(code=cs3code.CODE_NOT_FOUND))
+        return cs3sp.StatResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), info=info)
+
+    def ListContainer(self, request, context):
+        with self.lock:
+            self.calls['ListContainer'] += 1
+        path = request.ref.path
+        return cs3sp.ListContainerResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), infos=[
+            info for info_path, info in self.infos.items() if info_path == path or posixpath.dirname(info_path) == path])
+
+    def InitiateFileDownload(self, request, context):
+        protocol = gateway_resources.FileDownloadProtocol(protocol='simple', download_endpoint=self.data_url,
+                                                          token=request.ref.path)
+        return gateway_pb2.InitiateFileDownloadResponse(status=cs3rpc.Status(code=cs3code.CODE_OK),
+                                                        protocols=[protocol])
+
+    def Move(self, request, context):
+        info = self.infos.pop(request.source.path)
+        info.path = request.destination.path
+        self.infos[info.path] = info
+        self._changed(request.source.path)
+        self._changed(request.destination.path)
+        return cs3sp.MoveResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+    def CreateContainer(self, request, context):
+        self.add(request.ref.path, storage_provider.RESOURCE_TYPE_CONTAINER)
+        return cs3sp.CreateContainerResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+
+class TestContentsEtagInvalidation(AsyncHTTPTestCase):
+    """
+    Polls after changes made through this server or by others, with the stat cache of StorageApi
+    and downloads from a data gateway
+    """
+
+    def get_app(self):
+        self.log = LoggingConfigurable().log
+        self.gateway = TreeGateway()
+        for path in ('/home', '/home/dir', '/home/other'):
+            self.gateway.add(path, storage_provider.RESOURCE_TYPE_CONTAINER)
+        self.gateway.add('/home/dir/file.txt', content=b'Lorem ipsum dolor sit amet...')
+        threading.Thread(target=self.gateway.data_server.serve_forever, daemon=True).start()
+
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+
+        config = SimpleNamespace(reva_host='localhost:19000', client_id='einstein', mount_dir='/', dev_env=False,
+                                 endpoint='/', chunk_size=1024)
+        auth = SimpleNamespace(config=config, authenticate=lambda: 'token')
+        others = DataGateway()
+
+        storage_api = StorageApi.__new__(StorageApi)
+        storage_api.log, storage_api.config, storage_api.auth = self.log, config, auth
+        storage_api.cs3_api = cs3gw_grpc.GatewayAPIStub(channel)
+        storage_api.stat_cache = StatCache(10, 100)
+        storage_api.session = requests.Session()
+
+        self.file_api = Cs3FileApi.__new__(Cs3FileApi)
+        self.file_api.log, self.file_api.config, self.file_api.auth = self.log, config, auth
+        self.file_api.cs3_api = cs3gw_grpc.GatewayAPIStub(channel)
+        self.file_api.storage_api = storage_api
+        self.file_api.lock_api = SimpleNamespace(stat_metadata_keys=[])
+        self.file_api.lock_heartbeat = SimpleNamespace(acquire=lambda lock_api, stat: None)
+
+        ServiceRegistry.clean()
+        registry = ServiceRegistry.get_registry(self.log)
+        registry.get(Cs3FileApi, lambda: self.file_api)
+        registry.get(StorageApi, lambda: storage_api)
+        registry.get(ShareAPIFacade, lambda: others)
+        registry.get(LockApiFactory, lambda: others)
+
+        contents_manager = CS3APIsManager(None, self.log)
+        return web.Application([(contents_regex, ContentsEtagHandler)],
+                               contents_manager=contents_manager, authorizer=AllowAllAuthorizer(), base_url='/')
+
+    def tearDown(self):
+        ServiceRegistry.clean()
+        self.server.stop(None)
+        self.gateway.data_server.shutdown()
+        self.gateway.data_server.server_close()
+        super().tearDown()
+
+    def _poll(self, path, etag=None):
+        response = self.fetch('/api/contents%s?type=directory' % path, headers={'If-None-Match': etag} if etag else {})
+        return response.code, response.headers.get('Etag')
+
+    def test_unchanged_directory(self):
+        code, etag = self._poll('/home/dir')
+        self.assertEqual(self._poll('/home/dir', etag), (304, etag))
+        self.assertEqual(self.gateway.calls['ListContainer'], 1)
+
+    def test_move_changes_both_parents(self):
+        _, dir_etag = self._poll('/home/dir')
+        _, other_etag = self._poll('/home/other')
+
+        self.file_api.move('/home/dir/file.txt', '/home/other/file.txt', '/')
+
+        self.assertEqual(self._poll('/home/dir', dir_etag)[0], 200)
+        self.assertEqual(self._poll('/home/other', other_etag)[0], 200)
+
+    def test_new_directory_changes_parent(self):
+        _, etag = self._poll('/home')
+
+        self.file_api.create_directory('/home/new', '/')
+
+        self.assertEqual(self._poll('/home', etag)[0], 200)
+
+    def _open(self, path, etag=None):
+        response = self.fetch('/api/contents%s?type=file&format=text' % path,
+                              headers={'If-None-Match': etag} if etag else {})
+        return response.code, response.headers.get('Etag')
+
+    def test_unchanged_file_not_downloaded(self):
+        code, etag = self._open('/home/dir/file.txt')
+        self.assertEqual(code, 200)
+        self.assertEqual(self._open('/home/dir/file.txt', etag), (304, etag))
+        self.assertEqual(self.gateway.calls['GET'], 1)
+
+    def test_file_changed_by_others_downloaded(self):
+        _, etag = self._open('/home/dir/file.txt')
+
+        # the change isn't made through this server, the cached stat of the file is outdated
+        self.gateway.add('/home/dir/file.txt', content=b'Changed content')
+        code, new_etag = self._open('/home/dir/file.txt', etag)
+        self.assertEqual(code, 200)
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(self.gateway.calls['GET'], 2)
@@ -1,4 +1,5 @@
 import unittest
+from collections.abc import Mapping
 from unittest import TestCase
 from cs3api4lab.config.config_manager import Cs3ConfigManager
 from cs3api4lab.api.cs3_file_api import Cs3FileApi
@@ -23,7 +24,7 @@ class TestCs3FileApi(TestCase):
         try:
             self.storage.write_file(file_id, message, self.endpoint)
             stat_info = self.storage.stat_info(file_id, self.endpoint)
-            self.assertIsInstance(stat_info, dict)
+            self.assertIsInstance(stat_info, Mapping)
             self.assertTrue('mtime' in stat_info, 'Missing mtime from stat output')
             self.assertTrue('size' in stat_info, 'Missing size from stat output')
         finally:
@@ -88,13 +89,44 @@ class TestCs3FileApi(TestCase):
         finally:
             self.storage.remove(file_path, self.endpoint)
 
+    def test_read_file_in_chunks(self):
+        content_to_write = b'0123456789' * 10
+        file_path = "/test_read_in_chunks.txt"
+        chunk_size = self.storage.config.chunk_size
+        try:
+            self.storage.config.chunk_size = 16
+            self.storage.write_file(file_path, content_to_write, self.endpoint)
+            stat = self.storage.stat_info(file_path, self.endpoint)
+            chunks = list(self.storage.read_file(stat, self.endpoint))
+            self.assertEqual(len(chunks), 7)
+            self.assertTrue(all(len(chunk) <= 16 for chunk in chunks))
+            self.assertEqual(b''.join(chunks), content_to_write)
+        finally:
+            self.storage.config.chunk_size = chunk_size
+            self.storage.remove(file_path, self.endpoint)
+
+    def test_read_range(self):
+        content_to_write = b'0123456789' * 10
+        file_path = "/test_read_range.txt"
+        try:
+            self.storage.write_file(file_path, content_to_write, self.endpoint)
+            stat = self.storage.stat_info(file_path, self.endpoint)
+            self.assertEqual(self.storage.read_range(stat, 0, 5, self.endpoint), b'01234')
+            self.assertEqual(self.storage.read_range(stat, 95, 10, self.endpoint), b'56789')
+            self.assertEqual(self.storage.read_range(stat, 100, 10, self.endpoint), b'')
+            file_range = self.storage.get_file_range(file_path, 12, 4, 'text')
+            self.assertEqual(file_range['content'], '2345')
+            self.assertEqual(file_range['size'], 100)
+        finally:
+            self.storage.remove(file_path, self.endpoint)
+
     def test_write_file(self):
         buffer = b"Testu form cs3 Api"
         file_id = "/testfile.txt"
         try:
             self.storage.write_file(file_id, buffer, self.endpoint)
             stat_info = self.storage.stat_info(file_id, self.endpoint)
-            self.assertIsInstance(stat_info, dict)
+            self.assertIsInstance(stat_info, Mapping)
         finally:
             self.storage.remove(file_id, self.endpoint)
 
@@ -104,7 +136,7 @@ class TestCs3FileApi(TestCase):
         try:
             self.storage.write_file(file_id, buffer, self.endpoint)
             stat_info = self.storage.stat_info(file_id, self.endpoint)
-            self.assertIsInstance(stat_info, dict)
+            self.assertIsInstance(stat_info, Mapping)
         finally:
             self.storage.remove(file_id, self.endpoint)
 
@@ -130,6 +162,24 @@ class TestCs3FileApi(TestCase):
             self.storage.read_directory('/no_such_dir', self.endpoint)
         self.assertEqual(cm.exception.args[0], 'directory /no_such_dir not found')
 
+    def test_read_directory_page(self):
+        dir_path = "/test_read_directory_page"
+        try:
+            self.storage.create_directory(dir_path, self.endpoint)
+            for i in range(5):
+                self.storage.write_file(dir_path + "/file%d.txt" % i, b"content", self.endpoint)
+
+            names = [info.path.rsplit('/', 1)[-1] for info in self.storage.list_directory(dir_path, self.endpoint)]
+            self.assertEqual(len(names), 5)
+
+            pages = [self.storage.read_directory_page(dir_path, 2)]
+            while pages[-1]['next_cursor']:
+                pages.append(self.storage.read_directory_page(dir_path, 2, pages[-1]['next_cursor']))
+            self.assertEqual([len(page['content']) for page in pages], [2, 2, 1])
+            self.assertEqual(sorted(model['name'] for page in pages for model in page['content']), sorted(names))
+        finally:
+            self.storage.remove(dir_path, self.endpoint)
+
     def test_move_file(self):
         src_id = "/file_to_rename.txt"
         buffer = b"ebe5tresbsrdthbrdhvdtr"
@@ -1,3 +1,4 @@
+from base64 import b64encode
 from unittest import TestCase
 
 from tornado import web
@@ -146,6 +147,37 @@ class TestCS3APIsManager(ShareTestBase,TestCase):
         finally:
             self.file_api.remove(file_id, self.endpoint)
 
+    def test_save_chunked_file_model(self):
+        file_id = "/home/test_save_chunked_file_model.txt"
+        chunks = [b"first chunk, ", b"second chunk, ", b"last chunk"]
+        try:
+            for number, chunk in zip([1, 2, -1], chunks):
+                model = {
+                    "type": "file",
+                    "format": "base64",
+                    "chunk": number,
+                    "content": b64encode(chunk).decode('ascii'),
+                }
+                save_model = self.contents_manager.save(model, file_id)
+                self.assertEqual(save_model["path"], file_id)
+
+            self.assertEqual(save_model["size"], len(b"".join(chunks)))
+            model = self.contents_manager.get(file_id, True, 'file')
+            self.assertEqual(model["content"], b"".join(chunks).decode('utf-8'))
+        finally:
+            self.file_api.remove(file_id, self.endpoint)
+
+    def test_save_chunk_without_first_chunk(self):
+        model = {
+            "type": "file",
+            "format": "base64",
+            "chunk": 2,
+            "content": b64encode(b"orphan chunk").decode('ascii'),
+        }
+        with self.assertRaises(web.HTTPError) as context:
+            self.contents_manager.save(model, "/home/test_save_orphan_chunk.txt")
+        self.assertEqual(context.exception.status_code, 400)
+
     def test_save_notebook_model(self):
         file_id = "/home/test_save_notebook_model.ipynb"
         model = self._create_notebook_model()
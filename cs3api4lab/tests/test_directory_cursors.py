@@ -0,0 +1,164 @@
+import threading
+import time
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.directory_cursors import DirectoryCursors
+
+
+class StreamingGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway streaming the entries of a directory and counting the entries it sent.
+    With paginate set it sends page_size entries and a page token, like a gateway paginating itself,
+    with hold set the call stays open after the last entry until the client cancels it.
+    """
+
+    def __init__(self, size):
+        self.sent = Counter()
+        self.lock = threading.Lock()
+        self.paginate = False
+        self.hold = False
+        self.infos = []
+        for i in range(size):
+            info = storage_provider.ResourceInfo(path='/home/dir/file%03d.txt' % i,
+                                                 type=storage_provider.RESOURCE_TYPE_FILE)
+            info.id.opaque_id = 'file%03d' % i
+            self.infos.append(info)
+
+    def _cancelled(self):
+        with self.lock:
+            self.sent['cancelled'] += 1
+
+    def ListContainerStream(self, request, context):
+        with self.lock:
+            self.sent['calls'] += 1
+        if self.hold:
+            # a held call only ends when the client cancels it
+            context.add_callback(self._cancelled)
+        start = int(request.page_token or 0)
+        end = start + request.page_size if self.paginate and request.page_size else len(self.infos)
+        for i in range(start, min(end, len(self.infos))):
+            with self.lock:
+                self.sent['entries'] += 1
+            next_page_token = str(end) if i == end - 1 and end < len(self.infos) else ''
+            yield cs3sp.ListContainerStreamResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), info=self.infos[i],
+                                                    next_page_token=next_page_token)
+        while self.hold and context.is_active():
+            time.sleep(0.01)
+
+
+class TestDirectoryCursors(TestCase):
+
+    def setUp(self):
+        self.gateway = StreamingGateway(10)
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+
+        self.file_api = Cs3FileApi.__new__(Cs3FileApi)
+        self.file_api.log = LoggingConfigurable().log
+        self.file_api.config = SimpleNamespace(reva_host='localhost:19000', client_id='einstein', endpoint='/',
+                                               mount_dir='/', dev_env=False)
+        self.file_api.auth = SimpleNamespace(authenticate=lambda: 'token')
+        self.file_api.cs3_api = cs3gw_grpc.GatewayAPIStub(channel)
+        self.file_api.directory_cursors = DirectoryCursors(60, 8)
+
+    def tearDown(self):
+        self.file_api.directory_cursors.close()
+        self.server.stop(None)
+
+    def _read_all(self, limit):
+        pages = [self.file_api.read_directory_page('/home/dir', limit)]
+        while pages[-1]['next_cursor']:
+            pages.append(self.file_api.read_directory_page('/home/dir', limit, pages[-1]['next_cursor']))
+        return pages
+
+    def _names(self, pages):
+        return [model['name'] for page in pages for model in page['content']]
+
+    def _wait_for_gateway(self):
+        # the gateway may send a few entries ahead of the cancelled or paused call
+        time.sleep(0.1)
+
+    def _wait_for_cancelled(self, count):
+        deadline = time.monotonic() + 5
+        while self.gateway.sent['cancelled'] < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return self.gateway.sent['cancelled']
+
+    def test_pages_continue_the_listing(self):
+        pages = self._read_all(3)
+
+        self.assertEqual([len(page['content']) for page in pages], [3, 3, 3, 1])
+        self.assertEqual(self._names(pages), ['file%03d.txt' % i for i in range(10)])
+        self._wait_for_gateway()
+        self.assertEqual(self.gateway.sent, Counter({'calls': 1, 'entries': 10}))
+        self.assertEqual(len(self.file_api.directory_cursors), 0)
+
+    def test_page_token_of_gateway(self):
+        self.gateway.paginate = True
+        pages = self._read_all(4)
+
+        self.assertEqual(self._names(pages), ['file%03d.txt' % i for i in range(10)])
+        self.assertEqual(self.gateway.sent, Counter({'calls': 3, 'entries': 10}))
+        self.assertEqual(len(self.file_api.directory_cursors), 0)
+
+    def test_closed_listing_skips_previous_pages(self):
+        first_page = self.file_api.read_directory_page('/home/dir', 4)
+        self.file_api.directory_cursors.close()
+
+        page = self.file_api.read_directory_page('/home/dir', 4, first_page['next_cursor'])
+        self.assertEqual(self._names([page]), ['file%03d.txt' % i for i in range(4, 8)])
+        self.assertEqual(self.gateway.sent['calls'], 2)
+
+    def test_cursor_bound_to_path(self):
+        cursor = self.file_api.read_directory_page('/home/dir', 4)['next_cursor']
+        self.assertIsNone(self.file_api.directory_cursors.take(
+            self.file_api._decode_cursor(cursor)['id'], ('localhost:19000', 'einstein', '/home/other')))
+        self.assertEqual(len(self.file_api.directory_cursors), 1)
+
+    def test_idle_listings_closed(self):
+        cursors = DirectoryCursors(0.05, 2)
+        streams = [SimpleNamespace(closed=False) for _ in range(3)]
+        for stream in streams:
+            stream.close = lambda stream=stream: setattr(stream, 'closed', True)
+
+        cursors.put('key', streams[0])
+        cursors.put('key', streams[1])
+        cursors.put('key', streams[2])
+        self.assertEqual([stream.closed for stream in streams], [True, False, False])
+
+        time.sleep(0.06)
+        self.assertIsNone(cursors.take('missing', 'key'))
+        self.assertTrue(all(stream.closed for stream in streams))
+
+    def test_abandoned_listing_cancelled(self):
+        self.gateway.hold = True
+        self.file_api.directory_cursors = DirectoryCursors(0.1, 8)
+        self.file_api.read_directory_page('/home/dir', 4)
+        self.assertEqual(len(self.file_api.directory_cursors), 1)
+
+        # the next page is never requested, the call is cancelled without further requests
+        self.assertEqual(self._wait_for_cancelled(1), 1)
+        self.assertEqual(len(self.file_api.directory_cursors), 0)
+
+    def test_evicted_listing_cancelled(self):
+        self.gateway.hold = True
+        self.file_api.directory_cursors = DirectoryCursors(60, 1)
+        self.file_api.read_directory_page('/home/dir', 4)
+        self.file_api.read_directory_page('/home/dir', 4)
+
+        self.assertEqual(self._wait_for_cancelled(1), 1)
+        self.assertEqual(len(self.file_api.directory_cursors), 1)
@@ -0,0 +1,87 @@
+import http
+from collections import Counter
+from types import SimpleNamespace
+from unittest import TestCase
+
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_file_api import Cs3FileApi
+from cs3api4lab.api.stat_result import StatResult
+from cs3api4lab.exception.exceptions import InvalidTypeError
+
+
+class DownloadResponse:
+    """
+    Streamed download of the data gateway, answering 200 with the whole file when it ignores the Range header
+    """
+
+    def __init__(self, data, offset, length, ranges):
+        self.closed = False
+        self.reason = 'OK'
+        if ranges:
+            self.status_code = http.HTTPStatus.PARTIAL_CONTENT
+            self.data = data[offset:offset + length]
+        else:
+            self.status_code = http.HTTPStatus.OK
+            self.data = data
+        self.sent = 0
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.data), chunk_size):
+            self.sent += len(self.data[start:start + chunk_size])
+            yield self.data[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class TestFileRange(TestCase):
+
+    def setUp(self):
+        self.data = bytes(range(256)) * 4
+        self.ranges = True
+        self.responses = []
+        self.calls = Counter()
+
+        info = storage_provider.ResourceInfo(path='/home/file.bin', size=len(self.data),
+                                             type=storage_provider.RESOURCE_TYPE_FILE)
+        self.stat = StatResult(info)
+
+        self.file_api = Cs3FileApi.__new__(Cs3FileApi)
+        self.file_api.log = LoggingConfigurable().log
+        self.file_api.config = SimpleNamespace(endpoint='/', dev_env=False, chunk_size=100, file_range_max_chunks=3)
+        self.file_api.storage_api = SimpleNamespace(init_file_download=lambda path, endpoint: None,
+                                                    download_content=self._download_content)
+        self.file_api.stat_info = lambda path, endpoint, projection=None: self.stat
+        self.file_api.lock_api = None
+        self.file_api.lock_heartbeat = SimpleNamespace(acquire=lambda lock_api, stat: self.calls.update(['lock']))
+
+    def _download_content(self, init_file_download, offset, length):
+        response = DownloadResponse(self.data, offset, length, self.ranges)
+        self.responses.append(response)
+        return response
+
+    def test_partial_content(self):
+        self.assertEqual(self.file_api.read_range(self.stat, 250, 10), self.data[250:260])
+        self.assertEqual(self.responses[0].sent, 10)
+        self.assertTrue(self.responses[0].closed)
+
+    def test_range_header_ignored(self):
+        self.ranges = False
+
+        self.assertEqual(self.file_api.read_range(self.stat, 250, 10), self.data[250:260])
+        self.assertEqual(self.file_api.read_range(self.stat, 1020, 10), self.data[1020:])
+
+        # the download is streamed only until the range is read
+        self.assertLess(self.responses[0].sent, len(self.data))
+        self.assertTrue(all(response.closed for response in self.responses))
+
+    def test_length_limit(self):
+        file_range = self.file_api.get_file_range('/home/file.bin', 0, 300)
+        self.assertEqual(file_range['size'], len(self.data))
+        self.assertEqual(self.calls['lock'], 1)
+
+        with self.assertRaises(InvalidTypeError):
+            self.file_api.get_file_range('/home/file.bin', 0, 301)
+        self.assertEqual(len(self.responses), 1)
@@ -0,0 +1,123 @@
+import threading
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2 as cs3gw
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.exception.exceptions import FileLockedError
+from cs3api4lab.locks.cs3 import Cs3
+from cs3api4lab.locks.lock_cache import LockCache
+
+
+class LockGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway keeping the locks in memory and counting the calls
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _count(self, method):
+        with self.lock:
+            self.calls[method] += 1
+
+    def WhoAmI(self, request, context):
+        self._count('WhoAmI')
+        response = cs3gw.WhoAmIResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+        response.user.id.idp = 'cernbox.cern.ch'
+        response.user.id.opaque_id = 'einstein-id'
+        response.user.username = 'einstein'
+        return response
+
+    def GetLock(self, request, context):
+        self._count('GetLock')
+        lock = self.locks.get(request.ref.resource_id.opaque_id)
+        if lock is None:
+            return cs3sp.GetLockResponse(status=cs3rpc.Status(code=cs3code.CODE_NOT_FOUND))
+        return cs3sp.GetLockResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), lock=lock)
+
+    def SetLock(self, request, context):
+        self._count('SetLock')
+        self.locks[request.ref.resource_id.opaque_id] = request.lock
+        return cs3sp.SetLockResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+    def RefreshLock(self, request, context):
+        self._count('RefreshLock')
+        self.locks[request.ref.resource_id.opaque_id] = request.lock
+        return cs3sp.RefreshLockResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+    def Unlock(self, request, context):
+        self._count('Unlock')
+        self.locks.pop(request.ref.resource_id.opaque_id, None)
+        return cs3sp.UnlockResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+
+class TestLockCache(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = Cs3ConfigManager.get_config()
+        LockCache.clean()
+        self.gateway = LockGateway()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        self.channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+
+    def tearDown(self):
+        LockCache.clean()
+        self.server.stop(None)
+
+    def _lock_api(self):
+        lock_api = Cs3(self.log, self.config)
+        lock_api.auth = SimpleNamespace(authenticate=lambda: 'token')
+        lock_api.cs3_api = cs3gw_grpc.GatewayAPIStub(self.channel)
+        return lock_api
+
+    @staticmethod
+    def _stat(opaque_id='file-id'):
+        return {'inode': {'storage_id': 'storage-id', 'opaque_id': opaque_id}, 'filepath': '/home/file.txt'}
+
+    def test_open_file(self):
+        lock_api = self._lock_api()
+
+        # the contents manager checks the lock before the file is read and locked
+        self.assertFalse(lock_api.is_file_locked(self._stat()))
+        lock_api.set_lock(self._stat())
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 1, 'SetLock': 1, 'WhoAmI': 1}))
+
+        # the lock held by the user is neither inspected nor refreshed again
+        self._lock_api().is_file_locked(self._stat())
+        self._lock_api().set_lock(self._stat())
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 1, 'SetLock': 1, 'WhoAmI': 1}))
+
+    def test_refresh_own_lock(self):
+        self._lock_api().set_lock(self._stat())
+        LockCache.get_cache().held.clear()
+
+        self.assertTrue(self._lock_api().acquire_or_inspect(self._stat()))
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 2, 'SetLock': 1, 'RefreshLock': 1, 'WhoAmI': 1}))
+
+    def test_locked_by_other_user(self):
+        self._lock_api().set_lock(self._stat())
+        self.gateway.locks['file-id'].user.opaque_id = 'marie-id'
+        self.gateway.calls.clear()
+        LockCache.clean()
+
+        lock_api = self._lock_api()
+        self.assertFalse(lock_api.acquire_or_inspect(self._stat()))
+        self.assertTrue(lock_api.is_file_locked(self._stat()))
+        with self.assertRaises(FileLockedError):
+            lock_api.set_lock(self._stat())
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 1, 'WhoAmI': 1}))
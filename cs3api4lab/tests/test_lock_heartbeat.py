@@ -0,0 +1,96 @@
+import time
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.locks.cs3 import Cs3
+from cs3api4lab.locks.heartbeat import LockHeartbeat
+from cs3api4lab.locks.lock_cache import LockCache
+from cs3api4lab.tests.test_lock_cache import LockGateway
+
+
+class TestLockHeartbeat(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        LockCache.clean()
+        self.gateway = LockGateway()
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        self.channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+
+        self.lock_api = Cs3(self.log, Cs3ConfigManager.get_config())
+        self.lock_api.auth = SimpleNamespace(authenticate=lambda: 'token')
+        self.lock_api.cs3_api = cs3gw_grpc.GatewayAPIStub(self.channel)
+        self.heartbeat = LockHeartbeat(self.log, 60, 3600, 150)
+
+    def tearDown(self):
+        self.heartbeat.stop()
+        LockCache.clean()
+        self.server.stop(None)
+
+    @staticmethod
+    def _stat(opaque_id='file-id'):
+        return {'inode': {'storage_id': 'storage-id', 'opaque_id': opaque_id}, 'filepath': '/home/' + opaque_id}
+
+    def test_saves_skip_lock_calls(self):
+        self.heartbeat.acquire(self.lock_api, self._stat())
+        LockCache.get_cache().held.clear()
+        for _ in range(5):
+            self.heartbeat.acquire(self.lock_api, self._stat())
+
+        self.assertTrue(self.heartbeat.holds(self.lock_api, self._stat()))
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 1, 'SetLock': 1, 'WhoAmI': 1}))
+
+    def test_beat_refreshes_all_files(self):
+        self.heartbeat.acquire(self.lock_api, self._stat('file-1'))
+        self.heartbeat.acquire(self.lock_api, self._stat('file-2'))
+        self.gateway.calls.clear()
+
+        self.heartbeat.beat()
+
+        self.assertEqual(self.gateway.calls, Counter({'GetLock': 2, 'RefreshLock': 2}))
+
+    def test_release(self):
+        self.heartbeat.acquire(self.lock_api, self._stat())
+
+        self.heartbeat.release(self.lock_api, self._stat())
+
+        self.assertFalse(self.heartbeat.holds(self.lock_api, self._stat()))
+        self.assertEqual(self.gateway.calls['Unlock'], 1)
+        self.assertNotIn('file-id', self.gateway.locks)
+        self.assertFalse(self.lock_api.is_file_locked(self._stat()))
+
+    def test_lock_taken_over(self):
+        self.heartbeat.acquire(self.lock_api, self._stat())
+        self.gateway.locks['file-id'].user.opaque_id = 'marie-id'
+
+        self.heartbeat.beat()
+
+        self.assertFalse(self.heartbeat.holds(self.lock_api, self._stat()))
+        self.assertEqual(self.gateway.calls['RefreshLock'], 0)
+
+    def test_idle_file_is_dropped(self):
+        self.heartbeat = LockHeartbeat(self.log, 60, 0, 150)
+        self.heartbeat.acquire(self.lock_api, self._stat())
+
+        self.heartbeat.beat()
+
+        self.assertFalse(self.heartbeat.files)
+        self.assertEqual(self.gateway.calls['RefreshLock'], 0)
+
+    def test_timer(self):
+        self.heartbeat = LockHeartbeat(self.log, 0.2, 3600, 150)
+        self.heartbeat.acquire(self.lock_api, self._stat())
+
+        time.sleep(0.5)
+
+        self.assertGreaterEqual(self.gateway.calls['RefreshLock'], 1)
+        self.assertTrue(self.heartbeat.holds(self.lock_api, self._stat()))
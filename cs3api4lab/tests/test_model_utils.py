@@ -0,0 +1,60 @@
+import mimetypes
+import time
+from unittest import TestCase
+
+import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
+
+from cs3api4lab.utils.model_utils import ModelUtils
+
+
+class TestModelUtils(TestCase):
+
+    def _container(self, path, size):
+        container = []
+        for i in range(size):
+            info = resource_types.ResourceInfo(path='%s/file%d.txt' % (path, i), size=i)
+            info.type = resource_types.RESOURCE_TYPE_CONTAINER if i % 10 == 0 else resource_types.RESOURCE_TYPE_FILE
+            info.mtime.seconds = 1600000000 + i
+            container.append(info)
+        return container
+
+    def _convert_time(self, container):
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            ModelUtils.convert_container_to_directory_model('/home/dir', container)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def test_convert_container_to_directory_model(self):
+        container = self._container('/home/dir', 20)
+        model = ModelUtils.convert_container_to_directory_model('/home/dir', container)
+
+        self.assertEqual(model['type'], 'directory')
+        self.assertEqual(model['path'], '/home/dir')
+        self.assertEqual(len(model['content']), 20)
+        directory, file = model['content'][0], model['content'][1]
+        self.assertEqual(directory['type'], 'directory')
+        self.assertIsNone(directory['size'])
+        self.assertEqual(file['type'], 'file')
+        self.assertEqual(file['name'], 'file1.txt')
+        self.assertEqual(file['size'], 1)
+        self.assertEqual(file['mimetype'], 'text/plain')
+        self.assertEqual(file['last_modified'], ModelUtils.parse_date(1600000001))
+
+    def test_guess_mimetype(self):
+        for path in ['/a/b.txt', '/a/b.ipynb', '/a/b.tar.gz', '/a.dir/b', '/a/.bashrc', '/a/..b', '/a/b.PNG',
+                     '/a/b.c.json', '/a/b.', '/a/b.unknown']:
+            self.assertEqual(ModelUtils.guess_mimetype(path), mimetypes.guess_type(path)[0], path)
+
+    def test_linear_scaling(self):
+        small = self._container('/home/dir', 2000)
+        large = self._container('/home/dir', 16000)
+        self._convert_time(small)
+
+        small_time = self._convert_time(small)
+        large_time = self._convert_time(large)
+
+        # 8 times more entries, a quadratic conversion would be ~64 times slower
+        self.assertLess(large_time / small_time, 20)
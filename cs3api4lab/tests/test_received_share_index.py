@@ -0,0 +1,156 @@
+import threading
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.sharing.collaboration.v1beta1.collaboration_api_pb2 as sharing
+import cs3.sharing.collaboration.v1beta1.resources_pb2 as sharing_res
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_share_api import Cs3ShareApi
+from cs3api4lab.api.received_share_index import ReceivedShareIndex
+from cs3api4lab.api.share_registry import ShareRegistry
+from cs3api4lab.common.strings import Role
+from cs3api4lab.config.config_manager import Cs3ConfigManager
+from cs3api4lab.utils.share_utils import ShareUtils
+
+
+class ReceivedSharesGateway(cs3gw_grpc.GatewayAPIServicer):
+    """
+    Local gateway keeping the received shares in memory and counting the calls,
+    with list_all_fails set only the lists filtered by resource succeed
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.shares = {}
+        self.lock = threading.Lock()
+        self.list_all_fails = False
+
+    def add_share(self, share_id, opaque_id, role=Role.VIEWER):
+        received = sharing_res.ReceivedShare(state=sharing_res.SHARE_STATE_PENDING)
+        received.share.id.opaque_id = share_id
+        received.share.resource_id.storage_id = 'storage-id'
+        received.share.resource_id.opaque_id = opaque_id
+        received.share.permissions.CopyFrom(Cs3ShareApi._get_share_permissions(None, role))
+        self.shares[share_id] = received
+
+    def ListReceivedShares(self, request, context):
+        with self.lock:
+            self.calls['ListReceivedShares'] += 1
+        if not request.filters and self.list_all_fails:
+            return sharing.ListReceivedSharesResponse(status=cs3rpc.Status(code=cs3code.CODE_INTERNAL,
+                                                                           message='internal error'))
+        resource_ids = [share_filter.resource_id.opaque_id for share_filter in request.filters]
+        return sharing.ListReceivedSharesResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), shares=[
+            received for received in self.shares.values()
+            if not resource_ids or received.share.resource_id.opaque_id in resource_ids])
+
+    def GetReceivedShare(self, request, context):
+        with self.lock:
+            self.calls['GetReceivedShare'] += 1
+        received = self.shares.get(request.ref.id.opaque_id)
+        if received is None:
+            return sharing.GetReceivedShareResponse(status=cs3rpc.Status(code=cs3code.CODE_NOT_FOUND))
+        return sharing.GetReceivedShareResponse(status=cs3rpc.Status(code=cs3code.CODE_OK), share=received)
+
+    def UpdateReceivedShare(self, request, context):
+        with self.lock:
+            self.calls['UpdateReceivedShare'] += 1
+        self.shares[request.share.share.id.opaque_id].state = request.share.state
+        return sharing.UpdateReceivedShareResponse(status=cs3rpc.Status(code=cs3code.CODE_OK),
+                                                   share=request.share)
+
+
+class TestReceivedShareIndex(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = Cs3ConfigManager.get_config()
+        ReceivedShareIndex.clean()
+        self.gateway = ReceivedSharesGateway()
+        self.gateway.add_share('share-1', 'file-id', Role.VIEWER)
+        self.gateway.add_share('share-2', 'dir-id', Role.EDITOR)
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        self.channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+
+    def tearDown(self):
+        ReceivedShareIndex.clean()
+        self.server.stop(None)
+
+    def _share_api(self):
+        share_api = Cs3ShareApi.__new__(Cs3ShareApi)
+        share_api.log = self.log
+        share_api.config = self.config
+        share_api.auth = SimpleNamespace(authenticate=lambda: 'token')
+        share_api.cs3_api = cs3gw_grpc.GatewayAPIStub(self.channel)
+        share_api.received_share_index = ReceivedShareIndex.get_index(self.log)
+        share_api.share_registry = ShareRegistry.get_registry()
+        return share_api
+
+    @staticmethod
+    def _inode(opaque_id):
+        return {'storage_id': 'storage-id', 'opaque_id': opaque_id}
+
+    def _role(self, share_api, path, opaque_id):
+        share = share_api.get_share_received(path, self._inode(opaque_id))
+        return ShareUtils.map_permissions_to_role(share.permissions.permissions) if share else None
+
+    def test_role_lookup(self):
+        share_api = self._share_api()
+
+        self.assertEqual(self._role(share_api, '/home/MyShares/file.txt', 'file-id'), Role.VIEWER)
+        self.assertEqual(self._role(self._share_api(), '/home/MyShares/dir', 'dir-id'), Role.EDITOR)
+        self.assertIsNone(self._role(self._share_api(), '/home/own.txt', 'own-id'))
+        self.assertEqual(self.gateway.calls, Counter({'ListReceivedShares': 1}))
+
+    def test_path_prefix(self):
+        share_api = self._share_api()
+        self.assertIsNone(self._role(share_api, '/home/MyShares/dir/notebook.ipynb', 'notebook-id'))
+
+        # the paths of the shared directories are recorded when the received shares are listed
+        share_api.index_received_path(('storage-id', 'dir-id'), '/home/MyShares/dir/')
+        self.assertEqual(self._role(share_api, '/home/MyShares/dir/sub/notebook.ipynb', 'notebook-id'), Role.EDITOR)
+        self.assertIsNone(self._role(share_api, '/home/MyShares/directory.txt', 'other-id'))
+        self.assertEqual(self.gateway.calls, Counter({'ListReceivedShares': 1}))
+
+    def test_failed_load_looks_up_share(self):
+        self.gateway.list_all_fails = True
+        share_api = self._share_api()
+
+        self.assertEqual(self._role(share_api, '/home/MyShares/file.txt', 'file-id'), Role.VIEWER)
+        self.assertIsNone(self._role(share_api, '/home/own.txt', 'own-id'))
+        self.assertEqual(self.gateway.calls, Counter({'ListReceivedShares': 4}))
+
+    def test_refresh(self):
+        share_api = self._share_api()
+        self._role(share_api, '/home/MyShares/file.txt', 'file-id')
+        share_api.index_received_path(('storage-id', 'dir-id'), '/home/MyShares/dir')
+        index = ReceivedShareIndex.get_index()
+        unchanged = index.users[share_api._cache_user()].by_resource[('storage-id', 'dir-id')]
+
+        del self.gateway.shares['share-1']
+        self.gateway.add_share('share-3', 'new-id', Role.EDITOR)
+        index.beat()
+
+        self.assertIsNone(self._role(share_api, '/home/MyShares/file.txt', 'file-id'))
+        self.assertEqual(self._role(share_api, '/home/MyShares/new.txt', 'new-id'), Role.EDITOR)
+        self.assertIs(index.users[share_api._cache_user()].by_resource[('storage-id', 'dir-id')], unchanged)
+        self.assertEqual(self._role(share_api, '/home/MyShares/dir/file.txt', 'other-id'), Role.EDITOR)
+        self.assertEqual(self.gateway.calls, Counter({'ListReceivedShares': 2}))
+
+    def test_invalidated_on_update(self):
+        share_api = self._share_api()
+        self._role(share_api, '/home/MyShares/file.txt', 'file-id')
+
+        share_api.update_received('share-1', 'ACCEPTED')
+        self.assertEqual(self._role(share_api, '/home/MyShares/file.txt', 'file-id'), Role.VIEWER)
+        self.assertEqual(self.gateway.calls, Counter({'ListReceivedShares': 2, 'GetReceivedShare': 1,
+                                                      'UpdateReceivedShare': 1}))
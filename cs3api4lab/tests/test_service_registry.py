@@ -0,0 +1,50 @@
+import threading
+from unittest import TestCase
+
+from cs3api4lab.api.service_registry import ServiceRegistry
+
+
+class CountingService:
+    instances = 0
+
+    def __init__(self, log):
+        self.log = log
+        CountingService.instances += 1
+
+
+class TestServiceRegistry(TestCase):
+
+    def setUp(self):
+        CountingService.instances = 0
+        self.registry = ServiceRegistry('log')
+
+    def test_get_returns_shared_instance(self):
+        service = self.registry.get(CountingService)
+        self.assertIs(self.registry.get(CountingService), service)
+        self.assertEqual(service.log, 'log')
+        self.assertEqual(CountingService.instances, 1)
+
+    def test_get_with_factory(self):
+        service = self.registry.get(CountingService, lambda: CountingService('other log'))
+        self.assertEqual(service.log, 'other log')
+        self.assertIs(self.registry.get(CountingService), service)
+
+    def test_concurrent_get_creates_one_instance(self):
+        services = []
+        threads = [threading.Thread(target=lambda: services.append(self.registry.get(CountingService)))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(CountingService.instances, 1)
+        self.assertTrue(all(service is services[0] for service in services))
+
+    def test_get_registry(self):
+        ServiceRegistry.clean()
+        try:
+            registry = ServiceRegistry.get_registry('log')
+            self.assertIs(ServiceRegistry.get_registry(), registry)
+        finally:
+            ServiceRegistry.clean()
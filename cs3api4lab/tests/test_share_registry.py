@@ -0,0 +1,178 @@
+from collections import Counter
+from concurrent import futures
+from types import SimpleNamespace
+from unittest import TestCase
+
+import grpc
+import cs3.gateway.v1beta1.gateway_api_pb2_grpc as cs3gw_grpc
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.rpc.v1beta1.status_pb2 as cs3rpc
+import cs3.sharing.collaboration.v1beta1.collaboration_api_pb2 as sharing
+import cs3.sharing.ocm.v1beta1.ocm_api_pb2 as ocm_api
+import cs3.sharing.ocm.v1beta1.ocm_api_pb2_grpc as ocm_api_grpc
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.cs3_ocm_share_api import Cs3OcmShareApi
+from cs3api4lab.api.cs3_share_api import Cs3ShareApi
+from cs3api4lab.api.received_share_index import ReceivedShareIndex
+from cs3api4lab.api.share_api_facade import ShareAPIFacade
+from cs3api4lab.api.share_registry import ShareRegistry
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.api.stat_result import StatResult
+from cs3api4lab.exception.exceptions import ShareError
+from cs3api4lab.tests.test_received_share_index import ReceivedSharesGateway
+
+
+class SharesGateway(ReceivedSharesGateway):
+    """
+    Local gateway with a given share besides the received ones
+    """
+
+    failing = False
+
+    def GetShare(self, request, context):
+        self.calls['GetShare'] += 1
+        if self.failing:
+            return sharing.GetShareResponse(status=cs3rpc.Status(code=cs3code.CODE_INTERNAL, message='internal error'))
+        if request.ref.id.opaque_id != 'given-1':
+            return sharing.GetShareResponse(status=cs3rpc.Status(code=cs3code.CODE_NOT_FOUND))
+        response = sharing.GetShareResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+        response.share.id.opaque_id = 'given-1'
+        return response
+
+    def RemoveShare(self, request, context):
+        self.calls['RemoveShare'] += 1
+        return sharing.RemoveShareResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+
+
+class OcmGateway(ocm_api_grpc.OcmAPIServicer):
+
+    def __init__(self, calls):
+        self.calls = calls
+
+    def GetReceivedOCMShare(self, request, context):
+        self.calls['GetReceivedOCMShare'] += 1
+        if request.ref.id.opaque_id != 'ocm-1':
+            return ocm_api.GetReceivedOCMShareResponse(status=cs3rpc.Status(code=cs3code.CODE_NOT_FOUND))
+        response = ocm_api.GetReceivedOCMShareResponse(status=cs3rpc.Status(code=cs3code.CODE_OK))
+        response.share.share.id.opaque_id = 'ocm-1'
+        return response
+
+
+class TestShareRegistry(TestCase):
+
+    def setUp(self):
+        ShareRegistry.clean()
+        self.log = LoggingConfigurable().log
+        self.gateway = SharesGateway()
+        self.gateway.add_share('share-1', 'file-id')
+        self.server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        cs3gw_grpc.add_GatewayAPIServicer_to_server(self.gateway, self.server)
+        ocm_api_grpc.add_OcmAPIServicer_to_server(OcmGateway(self.gateway.calls), self.server)
+        self.channel = grpc.insecure_channel('localhost:%d' % self.server.add_insecure_port('localhost:0'))
+        self.server.start()
+        self.facade = self._facade()
+
+    def tearDown(self):
+        ShareRegistry.clean()
+        ReceivedShareIndex.clean()
+        self.server.stop(None)
+
+    def _facade(self):
+        config = SimpleNamespace(reva_host='localhost:19000', client_id='einstein', enable_ocm=True,
+                                 dev_env=False)
+        auth = SimpleNamespace(authenticate=lambda: 'token')
+
+        share_api = Cs3ShareApi.__new__(Cs3ShareApi)
+        share_api.log = self.log
+        share_api.config = config
+        share_api.auth = auth
+        share_api.cs3_api = cs3gw_grpc.GatewayAPIStub(self.channel)
+        share_api.received_share_index = ReceivedShareIndex.get_index(self.log)
+        share_api.share_registry = ShareRegistry.get_registry()
+
+        ocm_share_api = Cs3OcmShareApi.__new__(Cs3OcmShareApi)
+        ocm_share_api.log = self.log
+        ocm_share_api.config = config
+        ocm_share_api.auth = auth
+        ocm_share_api.ocm_share_api = ocm_api_grpc.OcmAPIStub(self.channel)
+        ocm_share_api.share_registry = ShareRegistry.get_registry()
+
+        facade = ShareAPIFacade.__new__(ShareAPIFacade)
+        facade.log = self.log
+        facade.config = config
+        facade.share_api = share_api
+        facade.ocm_share_api = ocm_share_api
+        facade.share_registry = ShareRegistry.get_registry()
+        return facade
+
+    def test_listed_share_kinds(self):
+        self.facade.share_api.list_received()
+        self.gateway.calls.clear()
+
+        self.assertFalse(self.facade.is_share('share-1'))
+        self.assertFalse(self.facade.is_ocm_received_share('share-1'))
+        self.assertEqual(self.gateway.calls, Counter())
+
+    def test_unknown_share_fetched_once(self):
+        for _ in range(2):
+            self.assertTrue(self.facade.is_share('given-1'))
+            self.assertFalse(self.facade.is_ocm_share('given-1'))
+            self.assertTrue(self.facade.is_ocm_received_share('ocm-1'))
+        self.assertEqual(self.gateway.calls, Counter({'GetShare': 1, 'GetReceivedOCMShare': 1}))
+
+    def test_received_share_not_ocm(self):
+        self.assertFalse(self.facade.is_ocm_share('share-1'))
+        self.assertTrue(self.facade.is_ocm_share('ocm-given-1'))
+        self.assertEqual(self.gateway.calls, Counter({'GetShare': 2, 'GetReceivedShare': 2}))
+
+        self.assertFalse(self.facade.is_ocm_share('share-1'))
+        self.assertEqual(self.gateway.calls['GetShare'], 2)
+
+    def test_share_errors_raised(self):
+        self.gateway.failing = True
+        with self.assertRaises(ShareError):
+            self.facade.is_share('given-1')
+        with self.assertRaises(ShareError):
+            self.facade.is_ocm_share('given-1')
+
+    def test_update_received(self):
+        self.assertFalse(self.facade.is_ocm_received_share('share-1'))
+        self.facade.share_api.update_received('share-1', 'ACCEPTED')
+
+        # the received share is fetched by id instead of listing all received shares
+        self.assertEqual(self.gateway.calls, Counter({'GetReceivedOCMShare': 1, 'GetReceivedShare': 1,
+                                                      'UpdateReceivedShare': 1}))
+        self.assertEqual(ShareRegistry.get_registry().get(('localhost:19000', 'einstein'), 'share-1'),
+                         ShareRegistry.RECEIVED)
+
+    def test_removed_share_forgotten(self):
+        self.assertTrue(self.facade.is_share('given-1'))
+        self.facade.share_api.remove('given-1')
+
+        self.assertIsNone(ShareRegistry.get_registry().get(('localhost:19000', 'einstein'), 'given-1'))
+
+    def test_update_received_stats_basic_projection(self):
+        projections = []
+        info = storage_provider.ResourceInfo(path='/home/MyShares/file.txt', type=storage_provider.RESOURCE_TYPE_FILE)
+        self.facade.file_api = SimpleNamespace(stat_info=lambda path, endpoint, projection=StatProjection.FULL: (
+            projections.append(projection) or StatResult(info)))
+
+        model = self.facade.update_received('share-1', 'ACCEPTED')
+
+        self.assertEqual(model['path'], '/home/MyShares/file.txt')
+        self.assertEqual(projections, [StatProjection.BASIC])
+
+    def test_share_details_stat_basic_projection(self):
+        projections = []
+        info = storage_provider.ResourceInfo(path='/home/file.txt', type=storage_provider.RESOURCE_TYPE_FILE)
+        self.facade.config.share_lookup_workers = 2
+        self.facade.user_api = SimpleNamespace(prefetch_users=lambda owners: {})
+        self.facade.file_api = SimpleNamespace(stat_info=lambda path, endpoint, projection=StatProjection.FULL: (
+            projections.append(projection) or StatResult(info)))
+
+        _, stats = self.facade._lookup_share_details([self.gateway.shares['share-1'].share])
+
+        self.assertEqual([stat.result()['filepath'] for stat in stats.values()], ['/home/file.txt'])
+        self.assertEqual(projections, [StatProjection.BASIC])
@@ -0,0 +1,134 @@
+import time
+from unittest import TestCase
+
+import cs3.rpc.v1beta1.code_pb2 as cs3code
+import cs3.storage.provider.v1beta1.provider_api_pb2 as cs3sp
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+
+from cs3api4lab.api.stat_cache import StatCache
+from cs3api4lab.api.stat_projection import StatProjection
+from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.ttl_cache import TTLCache
+
+
+class TestStatCache(TestCase):
+    user = ('localhost:19000', 'einstein')
+
+    def _stat(self, path, opaque_id):
+        stat = cs3sp.StatResponse()
+        stat.status.code = cs3code.CODE_OK
+        stat.info.path = path
+        stat.info.id.storage_id = 'storage'
+        stat.info.id.opaque_id = opaque_id
+        return stat
+
+    def test_ttl_cache_expiry_and_size(self):
+        cache = TTLCache(0.05, 2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIn('a', cache)
+        self.assertNotIn('b', cache)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('a'))
+
+    def test_get_by_path_and_id(self):
+        cache = StatCache(10, 10)
+        path_ref = FileUtils.get_reference('/home/file.txt', '/')
+        id_ref = FileUtils.get_reference('file-id', 'storage')
+        stat = self._stat('/home/file.txt', 'file-id')
+        cache.set(self.user, path_ref, stat)
+        cache.set(self.user, id_ref, stat)
+
+        self.assertEqual(cache.get(self.user, path_ref), stat)
+        self.assertEqual(cache.get(self.user, id_ref), stat)
+        self.assertIsNone(cache.get(('localhost:19000', 'marie'), path_ref))
+
+    def test_cached_stats_not_shared(self):
+        cache = StatCache(10, 10)
+        ref = FileUtils.get_reference('/home/file.txt', '/')
+        stat = self._stat('/home/file.txt', 'file-id')
+        cache.set(self.user, ref, stat)
+
+        # changes of the stored or of a returned response don't reach the cache
+        stat.info.path = '/home/changed.txt'
+        cache.get(self.user, ref).info.size = 1024
+        self.assertEqual(cache.get(self.user, ref), self._stat('/home/file.txt', 'file-id'))
+
+    def test_invalidate_path_removes_children_and_ids(self):
+        cache = StatCache(10, 10)
+        dir_ref = FileUtils.get_reference('/home/dir', '/')
+        file_ref = FileUtils.get_reference('/home/dir/file.txt', '/')
+        file_id_ref = FileUtils.get_reference('file-id', 'storage')
+        other_ref = FileUtils.get_reference('/home/dir2', '/')
+        cache.set(self.user, dir_ref, self._stat('/home/dir', 'dir-id'))
+        cache.set(self.user, file_ref, self._stat('/home/dir/file.txt', 'file-id'))
+        cache.set(self.user, file_id_ref, self._stat('/home/dir/file.txt', 'file-id'))
+        cache.set(self.user, other_ref, self._stat('/home/dir2', 'dir2-id'))
+
+        cache.invalidate(self.user, '/home/dir')
+
+        self.assertIsNone(cache.get(self.user, dir_ref))
+        self.assertIsNone(cache.get(self.user, file_ref))
+        self.assertIsNone(cache.get(self.user, file_id_ref))
+        self.assertIsNotNone(cache.get(self.user, other_ref))
+
+    def test_invalidate_removes_parent(self):
+        cache = StatCache(10, 10)
+        home_ref = FileUtils.get_reference('/home', '/')
+        home_id_ref = FileUtils.get_reference('home-id', 'storage')
+        sibling_ref = FileUtils.get_reference('/home/other.txt', '/')
+        cache.set(self.user, home_ref, self._stat('/home', 'home-id'))
+        cache.set(self.user, home_id_ref, self._stat('/home', 'home-id'))
+        cache.set(self.user, sibling_ref, self._stat('/home/other.txt', 'other-id'))
+
+        cache.invalidate(self.user, '/home/new.txt')
+
+        self.assertIsNone(cache.get(self.user, home_ref))
+        self.assertIsNone(cache.get(self.user, home_id_ref))
+        self.assertIsNotNone(cache.get(self.user, sibling_ref))
+
+    def test_invalidate_resource_id(self):
+        cache = StatCache(10, 10)
+        path_ref = FileUtils.get_reference('/home/file.txt', '/')
+        cache.set(self.user, path_ref, self._stat('/home/file.txt', 'file-id'))
+
+        cache.invalidate(self.user, resource_id=storage_provider.ResourceId(storage_id='storage',
+                                                                            opaque_id='file-id'))
+
+        self.assertIsNone(cache.get(self.user, path_ref))
+
+    def test_projections(self):
+        cache = StatCache(10, 10)
+        path_ref = FileUtils.get_reference('/home/file.txt', '/')
+        stat = self._stat('/home/file.txt', 'file-id')
+        cache.set(self.user, path_ref, stat, StatProjection.BASIC, ['cs3apis4lab_lock'])
+
+        self.assertEqual(cache.get(self.user, path_ref, StatProjection.BASIC, ['cs3apis4lab_lock']), stat)
+        self.assertIsNone(cache.get(self.user, path_ref, StatProjection.BASIC))
+        self.assertIsNone(cache.get(self.user, path_ref))
+
+        cache.set(self.user, path_ref, stat)
+        self.assertEqual(cache.get(self.user, path_ref, StatProjection.TYPE), stat)
+        self.assertEqual(cache.get(self.user, path_ref, StatProjection.EXISTS, ['other_key']), stat)
+
+        cache.invalidate(self.user, '/home/file.txt')
+        self.assertIsNone(cache.get(self.user, path_ref, StatProjection.BASIC, ['cs3apis4lab_lock']))
+
+    def test_projection_request(self):
+        ref = FileUtils.get_reference('/home/file.txt', '/')
+
+        self.assertEqual(list(StatProjection.build_request(ref).arbitrary_metadata_keys), ['*'])
+        request = StatProjection.build_request(ref, StatProjection.BASIC, ['cs3apis4lab_lock'])
+        self.assertEqual(list(request.arbitrary_metadata_keys), ['cs3apis4lab_lock'])
+        self.assertFalse(request.HasField('field_mask'))
+        request = StatProjection.build_request(ref, StatProjection.TYPE)
+        self.assertEqual(list(request.arbitrary_metadata_keys), [])
+        self.assertEqual(list(request.field_mask.paths), ['id', 'path', 'type'])
+
+    def test_disabled(self):
+        cache = StatCache(0, 10)
+        path_ref = FileUtils.get_reference('/home/file.txt', '/')
+        cache.set(self.user, path_ref, self._stat('/home/file.txt', 'file-id'))
+        self.assertIsNone(cache.get(self.user, path_ref))
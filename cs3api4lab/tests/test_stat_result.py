@@ -0,0 +1,107 @@
+import timeit
+import tracemalloc
+from unittest import TestCase
+
+import cs3.storage.provider.v1beta1.resources_pb2 as storage_provider
+from google.protobuf.json_format import MessageToDict
+
+from cs3api4lab.api.stat_result import StatResult
+
+
+class TestStatResult(TestCase):
+
+    @staticmethod
+    def _info(metadata=None):
+        info = storage_provider.ResourceInfo(path='/home/dir/file.txt', size=1024,
+                                             type=storage_provider.RESOURCE_TYPE_FILE, mime_type='text/plain')
+        info.id.storage_id = 'storage-id'
+        info.id.opaque_id = 'file-id'
+        info.owner.idp = 'cernbox.cern.ch'
+        info.owner.opaque_id = 'einstein-id'
+        info.mtime.seconds = 1660000000
+        info.etag = '"5f2b1c0a"'
+        info.permission_set.initiate_file_download = True
+        for key, value in (metadata or {}).items():
+            info.arbitrary_metadata.metadata[key] = value
+        return info
+
+    @staticmethod
+    def _stat_dict(info):
+        # the dict built by stat_info before StatResult
+        return {
+            'inode': {'storage_id': info.id.storage_id,
+                      'opaque_id': info.id.opaque_id},
+            'filepath': info.path,
+            'userid': info.owner.opaque_id,
+            'size': info.size,
+            'mtime': info.mtime.seconds,
+            'type': info.type,
+            'mime_type': info.mime_type,
+            'idp': info.owner.idp,
+            'permissions': info.permission_set,
+            'arbitrary_metadata': MessageToDict(info.arbitrary_metadata),
+            'etag': info.etag,
+        }
+
+    @staticmethod
+    def _read_share_fields(stat):
+        # the fields read when a share is mapped to a model
+        return stat['filepath'], stat['size'], stat['mtime'], stat['type'], stat['inode']['opaque_id']
+
+    def test_same_content_as_dict(self):
+        for metadata in ({}, {'cs3apis4lab_lock': '%7B%7D', 'other': 'value'}):
+            info = self._info(metadata)
+            self.assertEqual(StatResult(info), self._stat_dict(info))
+            self.assertEqual(dict(StatResult(info)), self._stat_dict(info))
+
+    def test_mapping_access(self):
+        stat = StatResult(self._info({'cs3apis4lab_lock': 'lock'}))
+
+        self.assertEqual(stat['filepath'], '/home/dir/file.txt')
+        self.assertEqual(stat.size, 1024)
+        self.assertEqual(stat['inode']['storage_id'], 'storage-id')
+        self.assertEqual(stat['arbitrary_metadata']['metadata'].get('cs3apis4lab_lock'), 'lock')
+        self.assertIn('permissions', stat)
+        self.assertNotIn('content', stat)
+        self.assertIsNone(stat.get('content'))
+        with self.assertRaises(KeyError):
+            stat['content']
+
+    def test_immutable(self):
+        stat = StatResult(self._info())
+
+        with self.assertRaises(AttributeError):
+            stat.size = 0
+        with self.assertRaises(TypeError):
+            stat['size'] = 0
+        with self.assertRaises(TypeError):
+            stat['inode']['opaque_id'] = 'other-id'
+        with self.assertRaises(AttributeError):
+            stat.extra = 'value'
+        with self.assertRaises(AttributeError):
+            stat.info
+        stat['permissions'].delete = True
+        self.assertFalse(stat['permissions'].delete)
+
+    def test_allocations(self):
+        infos = [self._info({'cs3apis4lab_lock': 'lock', 'other': 'value'}) for _ in range(500)]
+
+        def allocated(build):
+            tracemalloc.start()
+            try:
+                stats = [build(info) for info in infos]
+                for stat in stats:
+                    self._read_share_fields(stat)
+                return tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+
+        self.assertLess(allocated(StatResult) * 2, allocated(self._stat_dict))
+
+    def test_conversion_time(self):
+        info = self._info({'cs3apis4lab_lock': 'lock', 'other': 'value'})
+
+        dict_time = min(timeit.repeat(lambda: self._read_share_fields(self._stat_dict(info)), number=500, repeat=5))
+        result_time = min(timeit.repeat(lambda: self._read_share_fields(StatResult(info)), number=500, repeat=5))
+
+        self.assertLess(result_time, dict_time)
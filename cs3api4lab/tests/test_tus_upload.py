@@ -0,0 +1,82 @@
+import http.server
+import threading
+from collections import namedtuple
+from unittest import TestCase
+
+from traitlets.config import LoggingConfigurable
+
+from cs3api4lab.api.tus_upload import TusUpload
+
+
+class TusHandler(http.server.BaseHTTPRequestHandler):
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Upload-Offset', str(len(self.server.received)))
+        self.end_headers()
+
+    def do_PATCH(self):
+        self.server.patches += 1
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        if int(self.headers['Upload-Offset']) != len(self.server.received):
+            self.send_response(409)
+            self.end_headers()
+            return
+        if self.server.patches in self.server.failing_patches:
+            # simulate a connection that broke after half of the chunk has been stored
+            self.server.received += data[:len(data) // 2]
+            self.send_response(500)
+            self.end_headers()
+            return
+        self.server.received += data
+        self.send_response(204)
+        self.send_header('Upload-Offset', str(len(self.server.received)))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTusUpload(TestCase):
+
+    def setUp(self):
+        self.log = LoggingConfigurable().log
+        self.config = namedtuple('Config', ['tus_chunk_size', 'tus_max_retries', 'tus_retry_delay'])(100, 2, 0)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), TusHandler)
+        self.server.received = b''
+        self.server.patches = 0
+        self.server.failing_patches = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.endpoint = 'http://127.0.0.1:%d/tus/upload' % self.server.server_port
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_upload_in_chunks(self):
+        content = bytes(range(256)) * 2
+        tus_upload = TusUpload(self.log, self.config, self.endpoint, {}, len(content))
+        tus_upload.upload([content[:200], content[200:]])
+        self.assertEqual(self.server.received, content)
+        self.assertEqual(self.server.patches, 6)
+
+    def test_upload_resumes_after_failure(self):
+        content = bytes(range(256)) * 2
+        self.server.failing_patches = {2, 3}
+        tus_upload = TusUpload(self.log, self.config, self.endpoint, {}, len(content))
+        tus_upload.upload([content])
+        self.assertEqual(self.server.received, content)
+
+    def test_upload_fails_after_retries(self):
+        content = bytes(range(256))
+        self.server.failing_patches = {1, 2, 3}
+        tus_upload = TusUpload(self.log, self.config, self.endpoint, {}, len(content))
+        with self.assertRaises(IOError):
+            tus_upload.upload([content])
+
+    def test_resume(self):
+        content = bytes(range(256))
+        self.server.received = content[:150]
+        tus_upload = TusUpload(self.log, self.config, self.endpoint, {}, len(content))
+        tus_upload.resume([content[:120], content[120:]])
+        self.assertEqual(self.server.received, content)
+        self.assertEqual(self.server.patches, 2)
@@ -0,0 +1,40 @@
+import io
+from base64 import encodebytes, b64encode
+from unittest import TestCase
+
+from cs3api4lab.utils.file_utils import FileUtils
+from cs3api4lab.utils.upload_stream import UploadStream
+
+
+class TestUploadStream(TestCase):
+
+    def test_bytes_in_chunks(self):
+        content = b'0123456789' * 10
+        stream = UploadStream(content, FileUtils.calculate_content_size(content), chunk_size=16)
+        chunks = list(stream)
+        self.assertEqual(len(stream), 100)
+        self.assertEqual(len(chunks), 7)
+        self.assertEqual(b''.join(chunks), content)
+
+    def test_text(self):
+        content = 'zażółć gęślą jaźń ' * 100
+        content_size = FileUtils.calculate_content_size(content, 'text')
+        stream = UploadStream(content, content_size, 'text', chunk_size=7)
+        self.assertEqual(int(content_size), len(content.encode('utf-8')))
+        self.assertEqual(b''.join(stream), content.encode('utf-8'))
+
+    def test_base64(self):
+        content = bytes(range(256)) * 40
+        for encoded in [b64encode(content).decode('ascii'), encodebytes(content).decode('ascii'),
+                        b64encode(content[:-1]).decode('ascii'), b64encode(content[:-2]).decode('ascii')]:
+            expected = content[:int(FileUtils.calculate_content_size(encoded, 'base64'))]
+            stream = UploadStream(encoded, FileUtils.calculate_content_size(encoded, 'base64'), 'base64', 100)
+            self.assertEqual(b''.join(stream), expected)
+            self.assertEqual(len(stream), len(expected))
+
+    def test_file_like(self):
+        content = b'x' * 1000
+        source = io.BytesIO(content)
+        stream = UploadStream(source, FileUtils.calculate_content_size(source), chunk_size=300)
+        self.assertEqual(len(stream), 1000)
+        self.assertEqual([len(chunk) for chunk in stream], [300, 300, 300, 100])
@@ -0,0 +1,86 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import TestCase
+
+import cs3.identity.user.v1beta1.user_api_pb2 as user_api
+import cs3.rpc.v1beta1.code_pb2 as cs3_code
+
+from cs3api4lab.api.cs3_user_api import Cs3UserApi
+from cs3api4lab.api.user_cache import UserCache
+
+
+class TestUserCache(TestCase):
+
+    def test_get_and_set(self):
+        cache = UserCache(10, 10, 10)
+        self.assertIsNone(cache.get('idp', 'einstein'))
+        cache.set('idp', 'einstein', {'display_name': 'Albert Einstein'})
+        self.assertEqual(cache.get('idp', 'einstein'), {'display_name': 'Albert Einstein'})
+        self.assertIsNone(cache.get('other-idp', 'einstein'))
+
+    def test_negative_result(self):
+        cache = UserCache(10, 0.05, 10)
+        cache.set('idp', 'ocm-user', {})
+        self.assertEqual(cache.get('idp', 'ocm-user'), {})
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('idp', 'ocm-user'))
+
+    def test_size_limit(self):
+        cache = UserCache(10, 10, 2)
+        for opaque_id in ['einstein', 'marie', 'richard']:
+            cache.set('idp', opaque_id, {'display_name': opaque_id})
+        self.assertIsNone(cache.get('idp', 'einstein'))
+        self.assertIsNotNone(cache.get('idp', 'richard'))
+
+    def test_disabled(self):
+        cache = UserCache(0, 10, 10)
+        cache.set('idp', 'einstein', {'display_name': 'Albert Einstein'})
+        self.assertIsNone(cache.get('idp', 'einstein'))
+
+    def test_query_refinement(self):
+        cache = UserCache(10, 10, 10, 10, True)
+        users = [{'username': 'einstein', 'display_name': 'Albert Einstein', 'mail': 'einstein@example.org',
+                  'idp': 'idp', 'opaque_id': '4c510ada'},
+                 {'username': 'feynman', 'display_name': 'Richard Feynman', 'mail': 'richard@example.org',
+                  'idp': 'idp', 'opaque_id': '932b4540'}]
+        self.assertIsNone(cache.get_query('einstein', 'ein'))
+        cache.set_query('einstein', 'ein', users)
+
+        self.assertEqual(cache.get_query('einstein', 'ein'), users)
+        self.assertEqual(cache.get_query('einstein', 'einst'), users[:1])
+        self.assertEqual(cache.get_query('einstein', 'einsx'), [])
+        self.assertIsNone(cache.get_query('einstein', 'eix'))
+        self.assertIsNone(cache.get_query('marie', 'einst'))
+
+    def test_query_refinement_disabled(self):
+        cache = UserCache(10, 10, 10, 10)
+        users = [{'username': 'einstein', 'display_name': 'Albert Einstein', 'mail': 'einstein@example.org',
+                  'idp': 'idp', 'opaque_id': '4c510ada'}]
+        cache.set_query('einstein', 'ein', users)
+
+        # the provider may have returned only a part of the users matching the shorter query
+        self.assertEqual(cache.get_query('einstein', 'ein'), users)
+        self.assertIsNone(cache.get_query('einstein', 'einst'))
+
+    def test_queries_share_lookup_threads(self):
+        lookup_threads = set()
+
+        def find_users(request, metadata):
+            lookup_threads.add(threading.current_thread().name)
+            return user_api.FindUsersResponse(status={'code': cs3_code.CODE_OK})
+
+        user_api_stub = SimpleNamespace(
+            GetUserByClaim=lambda request: user_api.GetUserByClaimResponse(status={'code': cs3_code.CODE_NOT_FOUND}),
+            FindUsers=find_users)
+        for query in ['query%d' % i for i in range(20)]:
+            user_api_instance = Cs3UserApi.__new__(Cs3UserApi)
+            user_api_instance.api = user_api_stub
+            user_api_instance.config = SimpleNamespace(reva_host='localhost:19000', client_id='einstein',
+                                                       enable_ocm=False)
+            user_api_instance.auth = SimpleNamespace(authenticate=lambda: 'token')
+            user_api_instance.user_cache = UserCache(10, 10, 10)
+            self.assertEqual(user_api_instance.find_users_by_query(query), [])
+
+        # the lookups of all the queries run in the same pool of threads
+        self.assertLessEqual(len(lookup_threads), 4)
@@ -14,6 +14,12 @@ def asyncify(func):
     @wraps(func)
     def run(*args, **kwargs):
 
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # no event loop to keep responsive in this thread (e.g. a worker of AsyncCS3APIsManager)
+            return func(*args, **kwargs)
+
         loop = get_or_create_eventloop()
 
         async def run_async(loop, *args, executor=None, **kwargs):
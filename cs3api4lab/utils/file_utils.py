@@ -33,14 +33,36 @@ class FileUtils:
 
     @staticmethod
     def calculate_content_size(content, format=None):
-        if format == "text":
-            content_len = len(content.decode('utf-8'))
-        else:
+        """
+        Returns the size in bytes of the content as it is uploaded, without making a copy of it
+        """
+        if isinstance(content, str):
+            if format == 'base64':
+                content_len = FileUtils._calculate_base64_decoded_size(content)
+            elif content.isascii():
+                content_len = len(content)
+            else:
+                step = 1048576
+                content_len = sum(len(content[i:i + step].encode('utf-8')) for i in range(0, len(content), step))
+        elif hasattr(content, '__len__'):
             content_len = len(content)
+        elif hasattr(content, 'seek') and hasattr(content, 'tell'):
+            position = content.tell()
+            content_len = content.seek(0, 2) - position
+            content.seek(position)
+        else:
+            raise ValueError('Unable to calculate the size of the content')
 
         content_size = str(content_len)
         return content_size
 
+    @staticmethod
+    def _calculate_base64_decoded_size(content):
+        encoded_len = len(content) - content.count('\n') - content.count('\r')
+        tail = content[-8:].rstrip()
+        padding = len(tail) - len(tail.rstrip('='))
+        return encoded_len // 4 * 3 - padding
+
     @staticmethod
     def normalize_path(path):
         if len(path) > 0 and path[0] != '/':
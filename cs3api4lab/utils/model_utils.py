@@ -1,3 +1,4 @@
+import functools
 import mimetypes
 import cs3.storage.provider.v1beta1.resources_pb2 as resource_types
 from tornado import web
@@ -64,7 +65,7 @@ class ModelUtils:
         model = ModelUtils.map_share_to_base_model(share, stat, optional)
         model['size'] = stat['size']
         model['type'] = 'file'
-        model['mimetype'] = mimetypes.guess_type(stat['filepath'])[0]
+        model['mimetype'] = ModelUtils.guess_mimetype(stat['filepath'])
 
         return model
 
@@ -79,7 +80,11 @@ class ModelUtils:
 
     @staticmethod
     def convert_container_to_base_model(path, cs3_container):
-        created, last_modified, size, writable = ModelUtils.get_info_from_container(cs3_container, path)
+        return ModelUtils.convert_info_to_base_model(path, ModelUtils.find_info_in_container(cs3_container, path))
+
+    @staticmethod
+    def convert_info_to_base_model(path, cs3_model):
+        created, last_modified, size, writable = ModelUtils.get_info(cs3_model)
 
         model = {}
         model['name'] = path.rsplit('/', 1)[-1]
@@ -96,54 +101,54 @@ class ModelUtils:
         return model
 
     @staticmethod
-    def convert_container_to_file_model(cs3_model, cs3_container):
+    def convert_container_to_file_model(cs3_model, cs3_container=None):
 
-        model = ModelUtils.convert_container_to_base_model(cs3_model.path, cs3_container)
+        model = ModelUtils.convert_info_to_base_model(cs3_model.path, cs3_model)
         model['type'] = 'file'
-        model['mimetype'] = mimetypes.guess_type(cs3_model.path)[0]
+        model['mimetype'] = ModelUtils.guess_mimetype(cs3_model.path)
 
         return model
 
     @staticmethod
-    def convert_container_to_notebook_model(cs3_model, cs3_container):
+    def convert_container_to_notebook_model(cs3_model, cs3_container=None):
 
-        model = ModelUtils.convert_container_to_base_model(cs3_model.path, cs3_container)
+        model = ModelUtils.convert_info_to_base_model(cs3_model.path, cs3_model)
         model['type'] = 'notebook'
-        model['mimetype'] = mimetypes.guess_type(cs3_model.path)[0]
+        model['mimetype'] = ModelUtils.guess_mimetype(cs3_model.path)
 
         return model
 
     @staticmethod
     def convert_container_to_directory_model(path, cs3_container, content=True):
-
+        """
+        Converts the listing of a directory in a single pass, every entry is converted from its own ResourceInfo
+        """
         model = ModelUtils.convert_container_to_base_model(path, cs3_container)
         model['size'] = None
         model['type'] = 'directory'
 
         if content:
-            model['content'] = contents = []
+            model['content'] = ModelUtils.convert_container_to_content_models(cs3_container)
             model['format'] = 'json'
 
-            for cs3_model in cs3_container:
-                if cs3_model.type == resource_types.RESOURCE_TYPE_CONTAINER:
-                    sub_model = ModelUtils.convert_container_to_base_model(cs3_model.path, cs3_container)
-                    sub_model['size'] = None
-                    sub_model['type'] = 'directory'
-                    contents.append(sub_model)
-                elif cs3_model.type == resource_types.RESOURCE_TYPE_FILE:
-                    if type == 'notebook' or (type is None and path.endswith('.ipynb')):
-                        contents.append(
-                            ModelUtils.convert_container_to_notebook_model(cs3_model, cs3_container)
-                        )
-                    else:
-                        contents.append(
-                            ModelUtils.convert_container_to_file_model(cs3_model, cs3_container)
-                        )
-                else: #(TODO check why this wasnt here)
-                    raise web.HTTPError(500, u'Unexpected type: %s %s' % (cs3_model.path, cs3_model.type))
-
         return model
 
+    @staticmethod
+    def convert_container_to_content_models(cs3_container):
+        contents = []
+        for cs3_model in cs3_container:
+            if cs3_model.type == resource_types.RESOURCE_TYPE_CONTAINER:
+                sub_model = ModelUtils.convert_info_to_base_model(cs3_model.path, cs3_model)
+                sub_model['size'] = None
+                sub_model['type'] = 'directory'
+                contents.append(sub_model)
+            elif cs3_model.type == resource_types.RESOURCE_TYPE_FILE:
+                contents.append(ModelUtils.convert_container_to_file_model(cs3_model))
+            else: #(TODO check why this wasnt here)
+                raise web.HTTPError(500, u'Unexpected type: %s %s' % (cs3_model.path, cs3_model.type))
+
+        return contents
+
     @staticmethod
     def create_base_model_from_cs3_container(path, cs3_container):
         cs3_model = None
@@ -154,26 +159,46 @@ class ModelUtils:
         if cs3_model is None:
             raise web.HTTPError(404, u'%s does not exist' % path)
 
-        model = ModelUtils.convert_container_to_base_model(cs3_model.path, cs3_container)
+        model = ModelUtils.convert_info_to_base_model(cs3_model.path, cs3_model)
         return model, cs3_model
 
+    @staticmethod
+    def find_info_in_container(cs3_container, path):
+        cs3_model = None
+        for cs3_tmp_model in cs3_container:
+            if cs3_tmp_model.path == path:
+                cs3_model = cs3_tmp_model
+        return cs3_model
+
     @staticmethod
     def get_info_from_container(cs3_container, path):
-        size = None
-        writable = False
-        created = ModelUtils.parse_date(0)
-        last_modified = ModelUtils.parse_date(0)
+        return ModelUtils.get_info(ModelUtils.find_info_in_container(cs3_container, path))
 
-        for cs3_model in cs3_container:
-            if cs3_model.path == path:
-                size = cs3_model.size
-                created = ModelUtils.parse_date(cs3_model.mtime.seconds)
-                last_modified = ModelUtils.parse_date(cs3_model.mtime.seconds)
+    @staticmethod
+    def get_info(cs3_model):
+        if cs3_model is None:
+            return ModelUtils.parse_date(0), ModelUtils.parse_date(0), None, False
+
+        date = ModelUtils.parse_date(cs3_model.mtime.seconds)
+        writable = ShareUtils.map_permissions_to_role(cs3_model.permission_set) == "editor"
+        return date, date, cs3_model.size, writable
 
-                if ShareUtils.map_permissions_to_role(cs3_model.permission_set) == "editor":
-                    writable = True
+    @staticmethod
+    def guess_mimetype(path):
+        """
+        mimetypes.guess_type only looks at the extensions of the file name, so the result is memoized
+        by the extensions instead of calling it for every file of a directory
+        """
+        name = path.rsplit('/', 1)[-1].lstrip('.')
+        extension_start = name.find('.')
+        if extension_start == -1:
+            return None
+        return ModelUtils._guess_mimetype_by_extension(name[extension_start:])
 
-        return created, last_modified, size, writable
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _guess_mimetype_by_extension(extensions):
+        return mimetypes.guess_type('file' + extensions)[0]
 
     @staticmethod
     def create_empty_file_model(path):
@@ -196,7 +221,7 @@ class ModelUtils:
         model['name'] = stat['filepath'].rsplit('/', 1)[-1]
         model['path'] = stat['filepath']
         model['size'] = stat['size']
-        model['mimetype'] = mimetypes.guess_type(stat['filepath'])[0]
+        model['mimetype'] = ModelUtils.guess_mimetype(stat['filepath'])
         model['writable'] = True
         model['last_modified'] = datetime.fromtimestamp(stat['mtime']).strftime(ModelUtils.date_fmt)
         model['created'] = datetime.fromtimestamp(stat['mtime']).strftime(ModelUtils.date_fmt)
@@ -0,0 +1,53 @@
+import binascii
+
+
+class UploadStream:
+    """
+    Upload body that is streamed to the data gateway in chunks of chunk_size bytes.
+    The content can be bytes, text, base64 encoded text (format 'base64'), a file-like object
+    or an iterator of bytes. The size is known up front, so requests sends it with Content-Length
+    instead of reading the whole body into memory.
+    """
+
+    def __init__(self, content, content_size, format=None, chunk_size=4194304):
+        self.content = content
+        self.content_size = int(content_size)
+        self.format = format
+        self.chunk_size = int(chunk_size)
+
+    def __len__(self):
+        return self.content_size
+
+    def __iter__(self):
+        if isinstance(self.content, (bytes, bytearray, memoryview)):
+            return self._iter_bytes(memoryview(self.content))
+        if isinstance(self.content, str):
+            if self.format == 'base64':
+                return self._iter_base64(self.content)
+            return self._iter_text(self.content)
+        if hasattr(self.content, 'read'):
+            return iter(lambda: self.content.read(self.chunk_size), b'')
+        return iter(self.content)
+
+    def _iter_bytes(self, content):
+        for i in range(0, len(content), self.chunk_size):
+            yield bytes(content[i:i + self.chunk_size])
+
+    def _iter_text(self, content):
+        for i in range(0, len(content), self.chunk_size):
+            yield content[i:i + self.chunk_size].encode('utf-8')
+
+    def _iter_base64(self, content):
+        # every 4 base64 characters decode to 3 bytes, leftovers are carried over to the next slice
+        step = max(self.chunk_size // 3 * 4, 4)
+        rest = ''
+        for i in range(0, len(content), step):
+            part = rest + content[i:i + step]
+            if '\n' in part or '\r' in part:
+                part = part.replace('\n', '').replace('\r', '')
+            cut = len(part) - len(part) % 4
+            rest = part[cut:]
+            if cut:
+                yield binascii.a2b_base64(part[:cut])
+        if rest:
+            yield binascii.a2b_base64(rest)
@@ -1,10 +1,15 @@
-import { requestAPI } from './services';
+import {
+  requestAPI,
+  requestContents,
+  requestContentsWithEtag
+} from './services';
 import { ReadonlyJSONObject } from '@lumino/coreutils';
 import { Contents, ServerConnection } from '@jupyterlab/services';
 import { DocumentRegistry } from '@jupyterlab/docregistry';
 import { ISignal, Signal } from '@lumino/signaling';
 import { IStateDB } from '@jupyterlab/statedb';
 import { IDocumentManager } from '@jupyterlab/docmanager';
+import { DirectoryPage, FileRange } from './types';
 
 export class CS3Contents implements Contents.IDrive {
   protected _docRegistry: DocumentRegistry;
@@ -241,10 +246,18 @@ async function getFileList(
   if (format && type !== 'notebook') {
     url += '&format=' + format;
   }
-  const result: Contents.IModel = await requestAPI(
-    '/api/contents/' + path + '' + url,
-    { method: 'get' }
-  );
+  let result: Contents.IModel;
+  if (type === 'directory' && content) {
+    result = await getDirectory(path || '');
+  } else if (
+    type === 'file' &&
+    content &&
+    (format === 'text' || format === 'base64')
+  ) {
+    result = await getFile(path || '', url, format);
+  } else {
+    result = await requestContents('/api/contents/' + path + '' + url);
+  }
 
   // if it is a directory, count hidden files inside
   if (Array.isArray(result.content) && result.type === 'directory') {
@@ -264,6 +277,100 @@ async function getFileList(
   return result;
 }
 
+/**
+ * Listings of the latest directories read page by page, with the ETag of the directory model they belong to
+ */
+const directoryListings = new Map<
+  string,
+  { etag: string; content: Contents.IModel[] }
+>();
+const DIRECTORY_LISTINGS_SIZE = 8;
+
+/**
+ * Get the model of a directory with its entries. The directory itself is revalidated with its ETag,
+ * its entries are read page by page only if it changed.
+ */
+async function getDirectory(path: string): Promise<Contents.IModel> {
+  const { etag, model } = await requestContentsWithEtag<Contents.IModel>(
+    '/api/contents/' + path + '?content=0&type=directory'
+  );
+
+  const cached = directoryListings.get(path);
+  const content =
+    etag && cached && cached.etag === etag
+      ? cached.content
+      : await readDirectoryInPages(path);
+
+  directoryListings.delete(path);
+  if (etag) {
+    directoryListings.set(path, { etag, content });
+    if (directoryListings.size > DIRECTORY_LISTINGS_SIZE) {
+      directoryListings.delete(directoryListings.keys().next().value);
+    }
+  }
+
+  return {
+    ...model,
+    content: JSON.parse(JSON.stringify(content)),
+    format: 'json'
+  };
+}
+
+/**
+ * Length of the ranges large files are read in, a multiple of 3 so that the base64 ranges can be joined
+ */
+const FILE_RANGE_LENGTH = 3 * 1024 * 1024;
+
+/**
+ * Get the model of a file with its content. Files larger than FILE_RANGE_LENGTH are read range by range,
+ * so that the server never holds more than a range of the file in memory for a request. The next range
+ * is requested while the previous one is decoded, text is decoded range by range instead of joining
+ * the base64 ranges first. The model needs the whole content, it's returned once the last range is read.
+ */
+async function getFile(
+  path: string,
+  url: string,
+  format: 'text' | 'base64'
+): Promise<Contents.IModel> {
+  const modelUrl = '/api/contents/' + path + '?content=0&type=file';
+  const model = await requestContents<Contents.IModel>(modelUrl);
+  if (!model.size || model.size <= FILE_RANGE_LENGTH) {
+    return await requestContents('/api/contents/' + path + url);
+  }
+
+  const decoder = new TextDecoder();
+  const parts: string[] = [];
+  let next = readFileRange(path, 0, FILE_RANGE_LENGTH);
+  for (let offset = 0; offset < model.size; offset += FILE_RANGE_LENGTH) {
+    const range = await next;
+    if (offset + FILE_RANGE_LENGTH < model.size) {
+      next = readFileRange(path, offset + FILE_RANGE_LENGTH, FILE_RANGE_LENGTH);
+    }
+    if (format === 'text') {
+      const bytes = Uint8Array.from(atob(range.content), char =>
+        char.charCodeAt(0)
+      );
+      parts.push(decoder.decode(bytes, { stream: true }));
+    } else {
+      parts.push(range.content);
+    }
+  }
+  if (format === 'text') {
+    parts.push(decoder.decode());
+  }
+  // reading the file locks it, the model is requested again to tell if it is writable
+  const lockedModel = await requestContents<Contents.IModel>(modelUrl);
+
+  return {
+    ...lockedModel,
+    mimetype:
+      lockedModel.mimetype ||
+      (format === 'text' ? 'text/plain' : 'application/octet-stream'),
+    format,
+    content: parts.join('')
+  };
+}
+
 async function getSharedByMe(): Promise<any> {
   return await requestAPI('/api/cs3/shares/list?filter_duplicates=1', {
     method: 'get'
@@ -275,3 +382,107 @@ async function getSharedWithMe(): Promise<any> {
     method: 'get'
   });
 }
+
+/**
+ * Read a part of a file, so large files can be paged through
+ * without downloading them as a whole.
+ *
+ * @param path: The path to the file.
+ *
+ * @param offset: The first byte to read.
+ *
+ * @param length: The number of bytes to read.
+ *
+ * @param format: The format of the returned content.
+ *
+ * @returns A promise which resolves with the requested part of the file.
+ */
+export async function readFileRange(
+  path: string,
+  offset: number,
+  length: number,
+  format: 'text' | 'base64' = 'base64'
+): Promise<FileRange> {
+  return await requestAPI(
+    '/api/cs3/files/range?file_path=' +
+      encodeURIComponent(path) +
+      '&offset=' +
+      offset +
+      '&length=' +
+      length +
+      '&format=' +
+      format,
+    { method: 'get' }
+  );
+}
+
+/**
+ * Read a page of a directory, so the entries of large directories
+ * can be shown before the whole listing is received.
+ *
+ * @param path: The path to the directory.
+ *
+ * @param limit: The maximum number of entries to return.
+ *
+ * @param cursor: The cursor returned with the previous page, if any.
+ *
+ * @returns A promise which resolves with the requested page of the directory.
+ */
+export async function readDirectoryPage(
+  path: string,
+  limit = 100,
+  cursor: string | null = null
+): Promise<DirectoryPage> {
+  return await requestAPI(
+    '/api/cs3/files/list?path=' +
+      encodeURIComponent(path) +
+      '&limit=' +
+      limit +
+      (cursor ? '&cursor=' + encodeURIComponent(cursor) : ''),
+    { method: 'get' }
+  );
+}
+
+/**
+ * Read all entries of a directory page by page, onPage is called
+ * with the entries of every page as soon as it is received.
+ *
+ * @param path: The path to the directory.
+ *
+ * @param onPage: Called with the models of each page.
+ *
+ * @param limit: The number of entries per page.
+ *
+ * @returns A promise which resolves with all entries of the directory.
+ */
+export async function readDirectoryInPages(
+  path: string,
+  onPage: (content: Contents.IModel[]) => void = () => undefined,
+  limit = 500
+): Promise<Contents.IModel[]> {
+  const content: Contents.IModel[] = [];
+  let page = await readDirectoryPage(path, limit);
+  for (;;) {
+    content.push(...page.content);
+    onPage(page.content);
+    if (page.next_cursor === null) {
+      return content;
+    }
+    page = await readDirectoryPage(path, limit, page.next_cursor);
+  }
+}
+
+/**
+ * Release the lock of the user on a file, called when its document is closed,
+ * so the lock is removed instead of being kept alive until it's idle.
+ *
+ * @param path: The path to the file.
+ *
+ * @returns A promise which resolves when the lock is released.
+ */
+export async function releaseLock(path: string): Promise<void> {
+  await requestAPI(
+    '/api/cs3/files/lock?file_path=' + encodeURIComponent(path),
+    { method: 'delete' }
+  );
+}
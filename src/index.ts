@@ -23,7 +23,8 @@ import { each, toArray } from '@lumino/algorithm';
 import {
   CS3Contents,
   CS3ContentsShareByMe,
-  CS3ContentsShareWithMe
+  CS3ContentsShareWithMe,
+  releaseLock
 } from './drive';
 import { FileBrowser, FilterFileBrowserModel } from '@jupyterlab/filebrowser';
 import { createInfobox } from './infobox';
@@ -119,6 +120,23 @@ const factory: JupyterFrontEndPlugin<IFileBrowserFactory> = {
     );
     docManager.services.contents.addDrive(drive);
 
+    // Release the lock of a file when the last view of its document is closed
+    const lockedContexts = new WeakSet<object>();
+    for (const widgetName of ['Notebook', 'Editor']) {
+      app.docRegistry.addWidgetExtension(widgetName, {
+        createNew: (widget, context) => {
+          if (lockedContexts.has(context)) {
+            return;
+          }
+          lockedContexts.add(context);
+          context.disposed.connect(() => {
+            const path = docManager.services.contents.localPath(context.path);
+            releaseLock(path).catch(error => console.error(error));
+          });
+        }
+      });
+    }
+
     // Manually restore and load the default file browser.
     const defaultBrowser = createFileBrowser('cs3filebrowser', {
       auto: true,
@@ -71,6 +71,84 @@ export async function requestAPI<T>(
   return data;
 }
 
+/**
+ * Models of the latest contents requests with their ETag, the least recently used are dropped first
+ */
+const contentsCache = new Map<string, { etag: string; model: any }>();
+const CONTENTS_CACHE_SIZE = 32;
+
+/**
+ * Get a contents model, revalidating the cached model with its ETag.
+ * The server answers 304 without downloading the file or listing the directory if it didn't change.
+ *
+ * @param endPoint Contents API end point, with the query arguments
+ * @returns A copy of the model
+ */
+export async function requestContents<T>(endPoint: string): Promise<T> {
+  return (await requestContentsWithEtag<T>(endPoint)).model;
+}
+
+/**
+ * Get a contents model like requestContents, together with its ETag
+ *
+ * @param endPoint Contents API end point, with the query arguments
+ * @returns The ETag, null if the server sent none, and a copy of the model
+ */
+export async function requestContentsWithEtag<T>(
+  endPoint: string
+): Promise<{ etag: string | null; model: T }> {
+  const settings = ServerConnection.makeSettings();
+  const requestUrl = URLExt.join(settings.baseUrl, '', endPoint);
+  const cached = contentsCache.get(endPoint);
+  const headers: Record<string, string> = cached
+    ? { 'If-None-Match': cached.etag }
+    : {};
+
+  let response: Response;
+  try {
+    response = await ServerConnection.makeRequest(
+      requestUrl,
+      { method: 'GET', headers },
+      settings
+    );
+  } catch (error) {
+    // console logging for troubleshooting
+    console.error(JSON.stringify(error));
+    throw new ServerConnection.NetworkError(error);
+  }
+
+  if (response.status === 304 && cached) {
+    contentsCache.delete(endPoint);
+    contentsCache.set(endPoint, cached);
+    return {
+      etag: cached.etag,
+      model: JSON.parse(JSON.stringify(cached.model))
+    };
+  }
+
+  const data = await response.json();
+
+  if (!response.ok) {
+    contentsCache.delete(endPoint);
+    if (data['error_message']) {
+      // console logging for troubleshooting
+      console.error(JSON.stringify(data['error_message']));
+    }
+    throw new ServerConnection.ResponseError(response, data.message);
+  }
+
+  const etag = response.headers.get('ETag');
+  contentsCache.delete(endPoint);
+  if (etag) {
+    contentsCache.set(endPoint, { etag, model: data });
+    if (contentsCache.size > CONTENTS_CACHE_SIZE) {
+      contentsCache.delete(contentsCache.keys().next().value);
+    }
+  }
+
+  return { etag, model: JSON.parse(JSON.stringify(data)) };
+}
+
 /**
  * Format bytes to human readable string.
  */
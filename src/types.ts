@@ -99,3 +99,19 @@ export type PendingSharesContentProps = {
   hideWidget: () => void;
   showWidget: () => void;
 };
+
+export type FileRange = {
+  path: string;
+  offset: number;
+  length: number;
+  size: number;
+  format: 'text' | 'base64';
+  content: string;
+};
+
+export type DirectoryPage = {
+  path: string;
+  limit: number;
+  content: Contents.IModel[];
+  next_cursor: string | null;
+};